@@ -0,0 +1,682 @@
+#!/usr/bin/env python3
+"""
+Benchmark das agregações do COVID-19 Data Analyzer
+
+Gera um store colunar sintético e compara o cálculo antigo das estatísticas
+(uma passada por estatística) e do resumo mensal com o AggregationKernel, nos
+caminhos Python puro e NumPy (quando instalado).
+
+Com --parity, carrega arquivos (ou um CSV sintético e os dados de exemplo) com
+os backends 'python' e 'numpy' e confere se todas as consultas dão o mesmo
+resultado.
+
+Com --memory, mostra os bytes por registro de cada coluna antes (uma string
+por linha nas colunas extras) e depois da codificação por dicionário.
+
+Com --records, compara o registro CovidData compacto (__slots__ e data como
+ordinal) com a classe anterior, baseada em __dict__ e datetime: bytes por
+registro e tempo de construção.
+
+Com --startup, mede a partida a frio em subprocessos (importar o módulo e
+'python -m covid_analyzer --help') e confere que o tkinter não é importado;
+termina com erro se algum tempo passar de STARTUP_LIMIT_MS.
+
+Com --suite, gera conjuntos sintéticos determinísticos no formato dos dois
+arquivos de exemplo (75 municípios, com variações de delimitador, codificação e
+formato de data), mede carga, estatísticas, resumo mensal, exportação e
+preparação dos gráficos e grava os resultados em JSON (--output) para comparar
+entre commits (--compare).
+
+Uso:
+    python benchmark_covid.py                      # 1M e 10M de linhas
+    python benchmark_covid.py --rows 200000 --repeat 5
+    python benchmark_covid.py --parity             # paridade entre backends
+    python benchmark_covid.py --parity dados.csv
+    python benchmark_covid.py --memory dados.csv   # memória por registro
+    python benchmark_covid.py --records 1000000    # CovidData compacto x anterior
+    python benchmark_covid.py --startup            # tempo de importação e de --help
+    python benchmark_covid.py --suite --output antes.json
+    python benchmark_covid.py --suite --sizes 10000 10000000 --data-dir /tmp/dados
+    python benchmark_covid.py --suite --compare antes.json --output depois.json
+    python benchmark_covid.py --compare antes.json depois.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from covid_analyzer import (AggregationKernel, CovidColumnStore, CovidData, FlexibleDataProcessor,
+                            FlexibleMainApplication, _get_numpy, get_compute_backend, set_compute_backend)
+
+BLOCK_ROWS = 100_000
+STARTUP_LIMIT_MS = 100
+
+
+def build_store(rows: int, municipalities: int = 75, seed: int = 42) -> CovidColumnStore:
+    """Cria um store sintético repetindo um bloco aleatório até atingir rows linhas"""
+    rng = random.Random(seed)
+    block = min(rows, BLOCK_ROWS)
+    start = date(2020, 3, 1).toordinal()
+
+    store = CovidColumnStore()
+    for i in range(municipalities):
+        store.municipality_code(f"Município {i:03d}")
+
+    dates = array('i', (start + rng.randrange(900) for _ in range(block)))
+    codes = array('i', (rng.randrange(municipalities) for _ in range(block)))
+    metric_blocks = {}
+    for field in CovidColumnStore.METRIC_FIELDS:
+        limit = 5_000 if field.startswith('new_') else 2_000_000
+        metric_blocks[field] = array('q', (rng.randrange(limit) for _ in range(block)))
+
+    copies, remainder = divmod(rows, block)
+    store.dates = dates * copies + dates[:remainder]
+    store.municipality_codes = codes * copies + codes[:remainder]
+    for field, values in metric_blocks.items():
+        store.metrics[field] = values * copies + values[:remainder]
+    store.touch()
+    return store
+
+
+def _date_formatter(date_format: str) -> Callable[[int], str]:
+    """Formata ordinais de data, guardando o texto de cada dia já visto"""
+    cache: Dict[int, str] = {}
+
+    def format_ordinal(ordinal: int) -> str:
+        text = cache.get(ordinal)
+        if text is None:
+            text = cache[ordinal] = date.fromordinal(ordinal).strftime(date_format)
+        return text
+    return format_ordinal
+
+
+def write_synthetic_csv(path: str, rows: int, municipalities: int = 75, seed: int = 42, delimiter: str = ',',
+                        encoding: str = 'utf-8', date_format: str = '%Y-%m-%d'):
+    """Grava um CSV sintético no formato de dados_exemplo/base_dados_python.csv
+
+    As linhas seguem em ordem de data, com algumas datas atrasadas no fim (como
+    correções que chegam depois) para exercitar a reconstrução dos índices.
+    """
+    rng = random.Random(seed)
+    start = date(2020, 3, 1).toordinal()
+    format_date = _date_formatter(date_format)
+    accumulated = [[0, 0, 0] for _ in range(municipalities)]
+    with open(path, 'w', encoding=encoding, newline='') as file:
+        file.write(delimiter.join(("data", "municipio", "casos_novos", "obitos_novos", "vacinados_novos",
+                                   "casos_acumulados", "obitos_acumulados", "vacinados_acumulados")) + "\n")
+        for row in range(rows):
+            day = start + row // municipalities
+            if row > rows - 50:
+                day -= rng.randrange(30)
+            code = row % municipalities
+            new_values = [rng.randrange(40), rng.randrange(3), rng.randrange(60)]
+            totals = accumulated[code]
+            for i, value in enumerate(new_values):
+                totals[i] += value
+            file.write(f"{format_date(day)}{delimiter}Município {code:03d}{delimiter}"
+                       f"{delimiter.join(map(str, new_values))}{delimiter}{delimiter.join(map(str, totals))}\n")
+
+
+def write_synthetic_java_csv(path: str, rows: int, municipalities: int = 75, seed: int = 42, delimiter: str = ';',
+                             encoding: str = 'utf-8', date_format: str = '%Y-%m-%d'):
+    """Grava um CSV sintético no formato de dados_exemplo/covid19_sergipe_java.csv
+
+    Só há acumulados (confirmados, obitos), em ordem decrescente de data, com uma
+    linha do estado (tipo_local=state) antes das cidades de cada dia, taxas com
+    vírgula decimal e quedas ocasionais do acumulado (correções da fonte).
+    """
+    days = max(1, rows // (municipalities + 1))
+    start = date(2020, 3, 1).toordinal()
+    format_date = _date_formatter(date_format)
+    population = [random.Random(seed + code).randrange(3_000, 650_000) for code in range(municipalities)]
+
+    def increments(rng: random.Random, day_index: int) -> Tuple[int, int]:
+        cases, deaths = rng.randrange(40), rng.randrange(3)
+        if day_index > 60 and rng.random() < 0.002:
+            cases = -rng.randrange(1, 6)
+        return cases, deaths
+
+    # Primeira passada: acumulados finais, para escrever do dia mais recente para trás
+    rng = random.Random(seed)
+    totals = [[0, 0] for _ in range(municipalities)]
+    for day_index in range(days - 1, -1, -1):
+        for code in range(municipalities):
+            cases, deaths = increments(rng, day_index)
+            totals[code][0] += cases
+            totals[code][1] += deaths
+
+    def rates(cases: int, deaths: int, people: int) -> str:
+        per_100k = f"{cases * 100_000 / people:.5f}".replace('.', ',')
+        mortality = f"{deaths / cases if cases else 0:.4f}".replace('.', ',')
+        return f"{per_100k}{delimiter}{mortality}"
+
+    rng = random.Random(seed)
+    state_population = sum(population)
+    with open(path, 'w', encoding=encoding, newline='') as file:
+        file.write(delimiter.join(("data", "estado", "cidade", "tipo_local", "confirmados", "obitos",
+                                   "ultimo_registro", "populacao_estimativa", "city_ibge_code",
+                                   "confirmados_por_100k", "taxa_mortalidade")) + "\n")
+        for day_index in range(days - 1, -1, -1):
+            day_text = format_date(start + day_index)
+            last = 'True' if day_index == days - 1 else 'False'
+            lines = []
+            state_cases = state_deaths = 0
+            for code in range(municipalities):
+                cases, deaths = totals[code]
+                state_cases += cases
+                state_deaths += deaths
+                lines.append(delimiter.join((day_text, 'SE', f"Município {code:03d}", 'city', str(cases),
+                                             str(deaths), last, str(population[code]),
+                                             str(2_800_000 + 100 * code), rates(cases, deaths, population[code]))))
+                cases_increment, deaths_increment = increments(rng, day_index)
+                totals[code][0] -= cases_increment
+                totals[code][1] -= deaths_increment
+
+            file.write(delimiter.join((day_text, 'SE', '', 'state', str(state_cases), str(state_deaths), last,
+                                       str(state_population), '28',
+                                       rates(state_cases, state_deaths, state_population))) + "\n")
+            file.write("\n".join(lines) + "\n")
+
+
+def legacy_statistics(store: CovidColumnStore) -> Dict[str, int]:
+    """Cálculo anterior: uma passada completa por estatística"""
+    metrics = store.metrics
+    return {
+        'new_cases': sum(metrics['new_cases']),
+        'new_deaths': sum(metrics['new_deaths']),
+        'new_vaccinated': sum(metrics['new_vaccinated']),
+        'max_accumulated_cases': max(metrics['accumulated_cases'], default=0),
+        'max_accumulated_deaths': max(metrics['accumulated_deaths'], default=0),
+        'max_accumulated_vaccinated': max(metrics['accumulated_vaccinated'], default=0),
+        'unique_municipalities': len(set(store.municipality_codes)),
+        'first_date': min(store.dates),
+        'last_date': max(store.dates),
+    }
+
+
+def legacy_monthly_summary(store: CovidColumnStore) -> Dict[str, Dict[str, int]]:
+    """Cálculo anterior do resumo mensal: laço Python com um dicionário por mês"""
+    monthly_data: Dict[str, Dict[str, int]] = {}
+    month_keys: Dict[int, str] = {}
+    metrics = store.metrics
+    for ordinal, new_cases, new_deaths, new_vaccinated, acc_cases, acc_deaths, acc_vaccinated in zip(
+            store.dates,
+            metrics['new_cases'], metrics['new_deaths'], metrics['new_vaccinated'],
+            metrics['accumulated_cases'], metrics['accumulated_deaths'], metrics['accumulated_vaccinated']):
+        month_key = month_keys.get(ordinal)
+        if month_key is None:
+            month_key = month_keys[ordinal] = FlexibleDataProcessor._month_key(ordinal)
+        summary = monthly_data.get(month_key)
+        if summary is None:
+            summary = monthly_data[month_key] = dict.fromkeys(
+                ('new_cases', 'new_deaths', 'new_vaccinated', 'max_accumulated_cases',
+                 'max_accumulated_deaths', 'max_accumulated_vaccinated'), 0)
+        summary['new_cases'] += new_cases
+        summary['new_deaths'] += new_deaths
+        summary['new_vaccinated'] += new_vaccinated
+        summary['max_accumulated_cases'] = max(summary['max_accumulated_cases'], acc_cases)
+        summary['max_accumulated_deaths'] = max(summary['max_accumulated_deaths'], acc_deaths)
+        summary['max_accumulated_vaccinated'] = max(summary['max_accumulated_vaccinated'], acc_vaccinated)
+    return monthly_data
+
+
+class LegacyCovidData:
+    """Registro anterior: atributos em __dict__, datetime completo e dicionário de extras"""
+
+    def __init__(self, date: datetime, municipality: str, new_cases: int = 0, new_deaths: int = 0,
+                 new_vaccinated: int = 0, accumulated_cases: int = 0, accumulated_deaths: int = 0,
+                 accumulated_vaccinated: int = 0, **kwargs):
+        self.date = date
+        self.municipality = str(municipality)
+        self.new_cases = int(new_cases) if str(new_cases).isdigit() else 0
+        self.new_deaths = int(new_deaths) if str(new_deaths).isdigit() else 0
+        self.new_vaccinated = int(new_vaccinated) if str(new_vaccinated).isdigit() else 0
+        self.accumulated_cases = int(accumulated_cases) if str(accumulated_cases).isdigit() else 0
+        self.accumulated_deaths = int(accumulated_deaths) if str(accumulated_deaths).isdigit() else 0
+        self.accumulated_vaccinated = int(accumulated_vaccinated) if str(accumulated_vaccinated).isdigit() else 0
+        self.extra_fields = kwargs
+
+    @classmethod
+    def from_values(cls, date: datetime, municipality: str, metrics: Sequence[int],
+                    extra_fields: Dict[str, Any] = None) -> 'LegacyCovidData':
+        record = cls.__new__(cls)
+        record.date = date
+        record.municipality = municipality
+        (record.new_cases, record.new_deaths, record.new_vaccinated,
+         record.accumulated_cases, record.accumulated_deaths, record.accumulated_vaccinated) = metrics
+        record.extra_fields = extra_fields if extra_fields is not None else {}
+        return record
+
+    def get_month_year(self) -> str:
+        return f"{self.date.month:02d}/{self.date.year}"
+
+
+def run_records(count: int, repeat: int) -> List[str]:
+    """Bytes por registro e tempo para criar count registros, classe anterior x compacta"""
+    store = build_store(min(count, BLOCK_ROWS))
+    names = store.municipalities
+    rows = [(store.dates[i], names[store.municipality_codes[i]],
+             [store.metrics[field][i] for field in CovidColumnStore.METRIC_FIELDS])
+            for i in range(len(store))]
+    rows = (rows * (count // len(rows) + 1))[:count]
+
+    # Como o store materializava cada linha antes e depois da mudança
+    variants = [
+        ('anterior (from_values)',
+         lambda: [LegacyCovidData.from_values(datetime.fromordinal(ordinal), name, metrics, {})
+                  for ordinal, name, metrics in rows]),
+        ('compacto (from_ordinal)',
+         lambda: [CovidData.from_ordinal(ordinal, name, metrics, {}) for ordinal, name, metrics in rows]),
+        ('anterior (construtor)',
+         lambda: [LegacyCovidData(datetime.fromordinal(ordinal), name, *metrics) for ordinal, name, metrics in rows]),
+        ('compacto (construtor)',
+         lambda: [CovidData(datetime.fromordinal(ordinal), name, *metrics) for ordinal, name, metrics in rows]),
+    ]
+
+    lines = [f"\n{count:,} registros CovidData"]
+    for variant, build in variants:
+        elapsed = best_time(build, repeat)
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        records = build()
+        size = tracemalloc.get_traced_memory()[0] - before - sys.getsizeof(records)
+        tracemalloc.stop()
+        month = records[-1].get_month_year()
+        del records
+        lines.append(f"  {variant:<24} {elapsed * 1000:10.1f} ms  {size / count:7.1f} bytes/registro  ({month})")
+    return lines
+
+
+def best_time(function: Callable[[], object], repeat: int) -> float:
+    """Menor tempo de execução entre repeat rodadas"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(rows: int, repeat: int) -> List[str]:
+    store = build_store(rows)
+    month_key = FlexibleDataProcessor._month_key
+    cases = [
+        ('estatísticas', 'legado (9 passadas)', lambda: legacy_statistics(store)),
+        ('estatísticas', 'kernel Python', lambda: AggregationKernel(store, use_numpy=False).totals()),
+        ('resumo mensal', 'legado (laço Python)', lambda: legacy_monthly_summary(store)),
+        ('resumo mensal', 'kernel Python',
+         lambda: AggregationKernel(store, use_numpy=False).grouped(month_key)),
+    ]
+    if _get_numpy() is not None:
+        cases.insert(2, ('estatísticas', 'kernel NumPy', lambda: AggregationKernel(store).totals()))
+        cases.append(('resumo mensal', 'kernel NumPy', lambda: AggregationKernel(store).grouped(month_key)))
+
+    # Os caminhos precisam concordar antes de serem comparados
+    expected = legacy_monthly_summary(store)
+    assert AggregationKernel(store, use_numpy=False).grouped(month_key) == expected
+    assert AggregationKernel(store).grouped(month_key) == expected
+
+    lines = [f"\n{rows:,} linhas"]
+    baseline: Dict[str, float] = {}
+    for operation, variant, function in cases:
+        elapsed = best_time(function, repeat)
+        baseline.setdefault(operation, elapsed)
+        speedup = baseline[operation] / elapsed if elapsed else float('inf')
+        lines.append(f"  {operation:<14} {variant:<22} {elapsed * 1000:10.1f} ms  {speedup:6.1f}x")
+    return lines
+
+
+def parity_results(file_path: str, use_mmap: bool) -> Dict[str, Any]:
+    """Carrega o arquivo e coleta o resultado de cada consulta do processador"""
+    processor = FlexibleDataProcessor(use_mmap=use_mmap)
+    if not processor.load_from_csv_file(file_path):
+        return {'load': False}
+
+    store = processor.store
+    names = processor.get_municipalities()
+    first, last = min(store.dates), max(store.dates)
+    middle = (first + last) // 2
+    results: Dict[str, Any] = {
+        'dates': store.dates.tolist(),
+        'municipalities': [store.municipalities[code] for code in store.municipality_codes],
+        'metrics': {field: values.tolist() for field, values in store.metrics.items()},
+        'extras': store.extra_values,
+        'statistics': processor.get_statistics(),
+        'monthly_summary': list(processor.get_monthly_summary().items()),
+        'municipalities_index': names,
+        'range_stats': [processor.range_stats(first, middle), processor.range_stats(middle, last)],
+    }
+    for metric in CovidColumnStore.METRIC_FIELDS:
+        results[f"top_k:{metric}"] = processor.top_k_municipalities(metric, 10)
+    for name in names[:5]:
+        results[f"statistics:{name}"] = processor.get_municipality_statistics(name)
+        results[f"range_stats:{name}"] = processor.range_stats(first, middle, name)
+        results[f"monthly_range:{name}"] = list(processor.get_monthly_summary(name, middle, last).items())
+        for freq in processor.SERIES_FREQUENCIES:
+            results[f"series:{name}:{freq}"] = processor.series_for(name, 'accumulated_cases', freq)
+        rolling = processor.rolling_metrics(name)
+        results[f"rolling:{name}"] = {series: rolling.series(series) for series in rolling.SERIES}
+    for period in AggregationKernel.PERIODS:
+        for by_municipality in (False, True):
+            results[f"group_by:{period}:{by_municipality}"] = processor.group_by(
+                period, CovidColumnStore.METRIC_FIELDS, AggregationKernel.AGGREGATIONS, by_municipality)
+    if processor.line_index is not None:
+        results['line_offsets'] = processor.line_index.offsets.tolist()
+    processor.close_line_index()
+    return results
+
+
+def run_parity(paths: List[str]) -> bool:
+    """Compara os backends 'python' e 'numpy' em cada arquivo; retorna True se todos concordam
+
+    Sem NumPy não há o que comparar: retorna False, para que a verificação não
+    passe em silêncio.
+    """
+    if _get_numpy() is None:
+        print("❌ NumPy não instalado: só o backend 'python' está disponível, paridade não verificada")
+        return False
+
+    temporary = None
+    if not paths:
+        temporary = tempfile.NamedTemporaryFile(suffix='.csv', delete=False)
+        temporary.close()
+        write_synthetic_csv(temporary.name, 20_000)
+        paths = [temporary.name] + example_files()
+
+    backend = get_compute_backend()
+    all_equal = True
+    try:
+        for path in paths:
+            for use_mmap in (False, True):
+                results = {}
+                for name in ('python', 'numpy'):
+                    set_compute_backend(name)
+                    results[name] = parity_results(path, use_mmap)
+                different = sorted(key for key in results['python']
+                                   if results['python'][key] != results['numpy'].get(key))
+                mode = "mmap" if use_mmap else "leitura sequencial"
+                if different:
+                    all_equal = False
+                    print(f"❌ {os.path.basename(path)} ({mode}): diferenças em {', '.join(different)}")
+                else:
+                    print(f"✅ {os.path.basename(path)} ({mode}): {len(results['python'])} consultas idênticas")
+    finally:
+        set_compute_backend(backend if backend == 'python' else 'auto')
+        if temporary is not None:
+            os.unlink(temporary.name)
+    return all_equal
+
+
+def example_files() -> List[str]:
+    """Arquivos CSV de dados_exemplo"""
+    examples = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados_exemplo')
+    return sorted(os.path.join(examples, name) for name in os.listdir(examples) if name.endswith('.csv'))
+
+
+def run_memory(paths: List[str]) -> List[str]:
+    """Relatório de memória do store de cada arquivo"""
+    lines = []
+    for path in paths or example_files():
+        processor = FlexibleDataProcessor()
+        if not processor.load_from_csv_file(path):
+            lines.append(f"\n{os.path.basename(path)}: não foi possível carregar")
+            continue
+
+        report = processor.store.memory_report()
+        rows = max(report['rows'], 1)
+        lines.append(f"\n{os.path.basename(path)} ({report['rows']:,} registros)")
+        for column, info in report['columns'].items():
+            lines.append(f"  {column:<28} {info['encoding']:<28} "
+                         f"{info['before'] / rows:8.1f} -> {info['after'] / rows:8.1f} bytes/registro")
+        lines.append(f"  {'total':<28} {'':<28} {report['before_per_record']:8.1f} -> "
+                     f"{report['after_per_record']:8.1f} bytes/registro")
+    return lines
+
+
+def run_startup(repeat: int) -> bool:
+    """Partida a frio em subprocessos; retorna True se tudo ficou abaixo de STARTUP_LIMIT_MS"""
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    commands = [
+        ('import covid_analyzer',
+         [sys.executable, '-c', "import sys, covid_analyzer; sys.exit('tkinter' in sys.modules)"]),
+        ('python -m covid_analyzer --help', [sys.executable, '-m', 'covid_analyzer', '--help']),
+    ]
+    # Referência: o próprio interpretador, sem importar nada
+    baseline = best_time(lambda: subprocess.run([sys.executable, '-c', 'pass'], check=True), repeat)
+    print(f"   {'python -c pass':<32} {baseline * 1000:8.1f} ms")
+
+    passed = True
+    for label, command in commands:
+        result = subprocess.run(command, cwd=module_dir, stdout=subprocess.DEVNULL)
+        if result.returncode != 0:
+            print(f"❌ {label}: saiu com código {result.returncode} (tkinter importado?)")
+            passed = False
+            continue
+        elapsed = best_time(lambda: subprocess.run(command, cwd=module_dir, stdout=subprocess.DEVNULL), repeat)
+        ok = elapsed * 1000 < STARTUP_LIMIT_MS
+        passed = passed and ok
+        print(f"{'✅' if ok else '❌'} {label:<32} {elapsed * 1000:8.1f} ms (limite {STARTUP_LIMIT_MS} ms)")
+    return passed
+
+
+# Conjuntos sintéticos da suíte: gerador e variações de delimitador, codificação e data
+SUITE_DATASETS = {
+    'python': (write_synthetic_csv, ',', 'utf-8', '%Y-%m-%d'),
+    'python_tsv_latin1': (write_synthetic_csv, '\t', 'latin-1', '%d/%m/%Y'),
+    'python_pipe_bom': (write_synthetic_csv, '|', 'utf-8-sig', '%d.%m.%Y'),
+    'java': (write_synthetic_java_csv, ';', 'utf-8', '%Y-%m-%d'),
+}
+SUITE_SIZES = [10_000, 100_000, 1_000_000]
+SUITE_SEED = 42
+# A partir desse tamanho cada operação roda uma única vez
+SUITE_SINGLE_RUN_ROWS = 1_000_000
+RESULTS_SCHEMA = 1
+
+
+def suite_dataset(directory: str, name: str, rows: int) -> str:
+    """Caminho do conjunto sintético, gerado só se ainda não existir no diretório"""
+    writer, delimiter, encoding, date_format = SUITE_DATASETS[name]
+    path = os.path.join(directory, f"{name}_{rows}_{SUITE_SEED}.csv")
+    if not os.path.exists(path):
+        partial = path + '.tmp'
+        writer(partial, rows, seed=SUITE_SEED, delimiter=delimiter, encoding=encoding, date_format=date_format)
+        os.replace(partial, path)
+    return path
+
+
+def cold_processor(loaded: FlexibleDataProcessor) -> FlexibleDataProcessor:
+    """Processador novo sobre o mesmo store, sem resultados memorizados nem índices"""
+    processor = FlexibleDataProcessor()
+    processor.store = loaded.store
+    processor.original_columns = loaded.original_columns
+    processor.column_mapping = loaded.column_mapping
+    return processor
+
+
+def chart_series(processor: FlexibleDataProcessor, municipality: Optional[str] = None) -> int:
+    """Prepara os dados de todos os gráficos da interface, como generate_chart, sem desenhar"""
+    monthly_summary = processor.get_monthly_summary(municipality)
+    series = [
+        {month: summary[field] for month, summary in monthly_summary.items()}
+        for field in ('new_cases', 'new_deaths', 'new_vaccinated', 'max_accumulated_cases',
+                      'max_accumulated_deaths', 'max_accumulated_vaccinated')
+    ]
+    comparison = {}
+    for month, summary in monthly_summary.items():
+        comparison[f"{month}(C)"] = summary['new_cases']
+        comparison[f"{month}(O)"] = summary['new_deaths']
+    series.append(comparison)
+    series.append({month: summary['new_cases'] + summary['new_deaths'] for month, summary in monthly_summary.items()})
+    for metric, name, _ in FlexibleMainApplication.ROLLING_CHARTS.values():
+        rolling = processor.rolling_metrics(municipality, metric)
+        series.append(rolling.series(name) if rolling else {})
+    return sum(len(data) for data in series)
+
+
+def run_suite(sizes: List[int], datasets: List[str], repeat: int, data_dir: Optional[str]) -> Dict[str, Any]:
+    """Mede as operações principais em cada conjunto e tamanho; devolve os resultados em JSON"""
+    directory = data_dir or tempfile.mkdtemp(prefix='covid_benchmark_')
+    os.makedirs(directory, exist_ok=True)
+    export_path = os.path.join(directory, 'export.csv')
+    export_gzip_path = export_path + '.gz'
+    results = []
+    try:
+        for rows in sizes:
+            runs = 1 if rows >= SUITE_SINGLE_RUN_ROWS else repeat
+            for name in datasets:
+                path = suite_dataset(directory, name, rows)
+                loaded = FlexibleDataProcessor()
+                if not loaded.load_from_csv_file(path):
+                    print(f"❌ {name} ({rows:,} linhas): não foi possível carregar")
+                    continue
+                municipality = loaded.get_municipalities()[0]
+
+                def load():
+                    processor = FlexibleDataProcessor()
+                    processor.load_from_csv_file(path)
+                    processor.close_line_index()
+
+                operations = [
+                    ('load_from_csv_file', load),
+                    ('get_statistics', lambda: cold_processor(loaded).get_statistics()),
+                    ('get_monthly_summary', lambda: cold_processor(loaded).get_monthly_summary()),
+                    ('export_to_csv', lambda: loaded.export_to_csv(export_path)),
+                    ('export_to_csv_gzip', lambda: loaded.export_to_csv(export_gzip_path)),
+                    ('chart_series', lambda: chart_series(cold_processor(loaded))),
+                    ('chart_series_municipality', lambda: chart_series(cold_processor(loaded), municipality)),
+                ]
+                for operation, function in operations:
+                    elapsed = best_time(function, runs)
+                    results.append({
+                        'dataset': name,
+                        'rows': rows,
+                        'records': len(loaded.store),
+                        'file_bytes': os.path.getsize(path),
+                        'operation': operation,
+                        'seconds': elapsed,
+                        'rows_per_second': rows / elapsed if elapsed else None,
+                    })
+                    print(f"  {name:<18} {rows:>11,} {operation:<26} {elapsed * 1000:11.1f} ms")
+                loaded.close_line_index()
+    finally:
+        for path in (export_path, export_gzip_path):
+            if os.path.exists(path):
+                os.unlink(path)
+        if data_dir is None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    return {
+        'schema': RESULTS_SCHEMA,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': getattr(_get_numpy(), '__version__', None),
+        'backend': get_compute_backend(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Commit atual do repositório (com '+' se houver alterações), ou None fora do git"""
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=module_dir, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=module_dir,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('+' if dirty else '')
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.10) -> List[str]:
+    """Compara duas execuções da suíte medição a medição; marca variações acima de threshold"""
+    def keyed(run: Dict[str, Any]) -> Dict[Tuple[str, int, str], float]:
+        return {(item['dataset'], item['rows'], item['operation']): item['seconds'] for item in run['results']}
+
+    before, after = keyed(baseline), keyed(current)
+    lines = [f"{baseline.get('commit') or '?'} -> {current.get('commit') or '?'}"]
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        ratio = old / new if new else float('inf')
+        mark = '🟢' if ratio > 1 + threshold else '🔴' if ratio < 1 - threshold else '  '
+        dataset, rows, operation = key
+        lines.append(f"{mark} {dataset:<18} {rows:>11,} {operation:<26} "
+                     f"{old * 1000:10.1f} -> {new * 1000:10.1f} ms  {ratio:6.2f}x")
+    missing = sorted(before.keys() ^ after.keys())
+    if missing:
+        lines.append(f"({len(missing)} medições presentes em só uma das execuções)")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das agregações do COVID-19 Data Analyzer")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000],
+                        help="quantidades de linhas a testar")
+    parser.add_argument('--repeat', type=int, default=3, help="rodadas por medição (vale a menor)")
+    parser.add_argument('--parity', nargs='*', metavar='ARQUIVO',
+                        help="confere a paridade entre os backends (sem arquivos: dados sintéticos e de exemplo)")
+    parser.add_argument('--records', type=int, metavar='N',
+                        help="compara o CovidData compacto com a classe anterior em N registros")
+    parser.add_argument('--suite', action='store_true',
+                        help="suíte completa: carga, estatísticas, resumo mensal, exportação e gráficos")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SUITE_SIZES,
+                        help="tamanhos da suíte, em linhas (de 10 mil a 10 milhões)")
+    parser.add_argument('--datasets', nargs='+', choices=list(SUITE_DATASETS), default=list(SUITE_DATASETS),
+                        help="conjuntos sintéticos da suíte")
+    parser.add_argument('--data-dir', help="diretório onde os conjuntos gerados são guardados e reaproveitados")
+    parser.add_argument('--output', help="grava os resultados da suíte em JSON")
+    parser.add_argument('--compare', nargs='+', metavar='RESULTADOS',
+                        help="compara um JSON de resultados com outro (ou com a execução atual da suíte)")
+    parser.add_argument('--startup', action='store_true',
+                        help=f"mede a importação e o --help em subprocessos (limite {STARTUP_LIMIT_MS} ms)")
+    parser.add_argument('--memory', nargs='*', metavar='ARQUIVO',
+                        help="bytes por registro de cada coluna (sem arquivos: dados de exemplo)")
+    args = parser.parse_args()
+
+    if args.parity is not None:
+        sys.exit(0 if run_parity(args.parity) else 1)
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[0], encoding='utf-8') as first, open(args.compare[1], encoding='utf-8') as second:
+            print("\n".join(compare_results(json.load(first), json.load(second))))
+        return
+    if args.suite or args.compare:
+        print(f"NumPy: {'disponível' if _get_numpy() is not None else 'não instalado'}")
+        results = run_suite(args.sizes, args.datasets, args.repeat, args.data_dir)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as file:
+                json.dump(results, file, indent=2)
+        if args.compare:
+            with open(args.compare[0], encoding='utf-8') as file:
+                print("\n".join(compare_results(json.load(file), results)))
+        return
+    if args.startup:
+        sys.exit(0 if run_startup(max(args.repeat, 10)) else 1)
+    if args.memory is not None:
+        print("\n".join(run_memory(args.memory)))
+        return
+    if args.records:
+        print("\n".join(run_records(args.records, args.repeat)))
+        return
+
+    print(f"NumPy: {'disponível' if _get_numpy() is not None else 'não instalado'}")
+    for rows in args.rows:
+        print("\n".join(run(rows, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,160 @@
-import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+import argparse
 import csv
-from datetime import datetime
-from typing import List, Dict, Optional, Any, Tuple
+from array import array
+from datetime import date, datetime
+from typing import List, Dict, Optional, Any, Tuple, Iterator, Iterable, Sequence, Union
+import bisect
+import codecs
+import collections
+import contextlib
+import hashlib
+import heapq
 import io
+import itertools
+import json
+import math
+import mmap
+import os
 import re
+import sys
+import time
+import warnings
+
+
+class DateParser:
+    """Conversor de datas compilado para o formato detectado em uma coluna
+
+    O formato é escolhido uma única vez a partir de uma amostra. Cada valor passa
+    então por um único conversor (date.fromisoformat ou fatiamento de largura fixa)
+    e os textos já vistos ficam memorizados. Só os valores fora do formato detectado
+    recorrem à busca completa em DATE_FORMATS.
+    """
+
+    DATE_FORMATS = [
+        "%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%Y/%m/%d",
+        "%d-%m-%Y", "%m-%d-%Y", "%d.%m.%Y", "%m.%d.%Y",
+        "%Y.%m.%d", "%Y%m%d", "%d%m%Y"
+    ]
+
+    # Formatos de largura fixa: comprimento, separadores (posição, caractere) e fatias de ano, mês e dia
+    FIXED_WIDTH_FORMATS = {
+        "%d/%m/%Y": (10, ((2, '/'), (5, '/')), (6, 10), (3, 5), (0, 2)),
+        "%m/%d/%Y": (10, ((2, '/'), (5, '/')), (6, 10), (0, 2), (3, 5)),
+        "%Y/%m/%d": (10, ((4, '/'), (7, '/')), (0, 4), (5, 7), (8, 10)),
+        "%d-%m-%Y": (10, ((2, '-'), (5, '-')), (6, 10), (3, 5), (0, 2)),
+        "%m-%d-%Y": (10, ((2, '-'), (5, '-')), (6, 10), (0, 2), (3, 5)),
+        "%d.%m.%Y": (10, ((2, '.'), (5, '.')), (6, 10), (3, 5), (0, 2)),
+        "%m.%d.%Y": (10, ((2, '.'), (5, '.')), (6, 10), (0, 2), (3, 5)),
+        "%Y.%m.%d": (10, ((4, '.'), (7, '.')), (0, 4), (5, 7), (8, 10)),
+        "%Y%m%d": (8, (), (0, 4), (4, 6), (6, 8)),
+        "%d%m%Y": (8, (), (4, 8), (2, 4), (0, 2)),
+    }
+
+    # Limite de textos memorizados (há poucos milhares de dias distintos em um arquivo típico)
+    MEMO_LIMIT = 100_000
+
+    def __init__(self, date_format: Optional[str] = None):
+        self.date_format = date_format
+        self.fallback_count = 0
+        self._memo: Dict[str, int] = {}
+        self._convert = self._compile(date_format)
+
+    @classmethod
+    def detect(cls, values: Iterable[str]) -> Optional[str]:
+        """Detecta o formato de data que melhor descreve a amostra de valores"""
+        values = [str(value).strip() for value in values if value and str(value).strip()]
+        if not values:
+            return None
 
+        best_format, best_hits = None, 0
+        for fmt in cls.DATE_FORMATS:
+            hits = 0
+            for value in values:
+                try:
+                    datetime.strptime(value, fmt)
+                    hits += 1
+                except ValueError:
+                    continue
 
-class CovidData:
-    """Classe responsável por armazenar e gerenciar os dados de COVID-19"""
+            if hits > best_hits:
+                best_format, best_hits = fmt, hits
+            if hits == len(values):
+                break
 
-    def __init__(self, date: str, municipality: str, new_cases: int = 0, new_deaths: int = 0,
-                 new_vaccinated: int = 0, accumulated_cases: int = 0, accumulated_deaths: int = 0,
-                 accumulated_vaccinated: int = 0, **kwargs):
-        try:
-            # Tenta diferentes formatos de data
-            self.date = self._parse_date(date)
-        except:
-            self.date = datetime.now()
+        return best_format
 
-        self.municipality = str(municipality)
-        self.new_cases = int(new_cases) if str(new_cases).isdigit() else 0
-        self.new_deaths = int(new_deaths) if str(new_deaths).isdigit() else 0
-        self.new_vaccinated = int(new_vaccinated) if str(new_vaccinated).isdigit() else 0
-        self.accumulated_cases = int(accumulated_cases) if str(accumulated_cases).isdigit() else 0
-        self.accumulated_deaths = int(accumulated_deaths) if str(accumulated_deaths).isdigit() else 0
-        self.accumulated_vaccinated = int(accumulated_vaccinated) if str(accumulated_vaccinated).isdigit() else 0
+    @classmethod
+    def _compile(cls, date_format: Optional[str]):
+        """Gera o conversor texto -> ordinal para o formato informado"""
+        if date_format is None or date_format == "%Y-%m-%d":
+            from_iso = date.fromisoformat
 
-        # Armazena campos extras
-        self.extra_fields = kwargs
+            def convert(value: str) -> int:
+                if len(value) == 10 and value[4] == '-' and value[7] == '-':
+                    return from_iso(value).toordinal()
+                raise ValueError(value)
 
-    def _parse_date(self, date_str: str) -> datetime:
+            return convert
+
+        layout = cls.FIXED_WIDTH_FORMATS.get(date_format)
+        if layout is None:
+            def convert(value: str) -> int:
+                return datetime.strptime(value, date_format).toordinal()
+
+            return convert
+
+        length, separators, (y0, y1), (m0, m1), (d0, d1) = layout
+
+        def convert(value: str) -> int:
+            if len(value) != length:
+                raise ValueError(value)
+            for position, separator in separators:
+                if value[position] != separator:
+                    raise ValueError(value)
+            year, month, day = value[y0:y1], value[m0:m1], value[d0:d1]
+            if not (year.isdigit() and month.isdigit() and day.isdigit()):
+                raise ValueError(value)
+            return date(int(year), int(month), int(day)).toordinal()
+
+        return convert
+
+    def parse_ordinal(self, value: str) -> int:
+        """Converte o texto em ordinal de data; lança ValueError se nenhum formato servir"""
+        ordinal = self._memo.get(value)
+        if ordinal is not None:
+            return ordinal
+
+        try:
+            ordinal = self._convert(value)
+        except ValueError:
+            # Valor fora do formato detectado: busca completa
+            self.fallback_count += 1
+            ordinal = self.parse_any(value).toordinal()
+
+        if len(self._memo) >= self.MEMO_LIMIT:
+            self._memo.clear()
+        self._memo[value] = ordinal
+        return ordinal
+
+    def parse(self, value: str) -> datetime:
+        """Converte o texto em datetime usando o formato detectado"""
+        return datetime.fromordinal(self.parse_ordinal(value))
+
+    @classmethod
+    def parse_any(cls, date_str: str) -> datetime:
         """Tenta parsear diferentes formatos de data"""
-        date_formats = [
-            "%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%Y/%m/%d",
-            "%d-%m-%Y", "%m-%d-%Y", "%d.%m.%Y", "%m.%d.%Y",
-            "%Y.%m.%d", "%Y%m%d", "%d%m%Y"
-        ]
+        text = str(date_str).strip()
 
-        for fmt in date_formats:
+        # Caminho rápido para datas ISO (primeiro formato da lista)
+        if len(text) == 10 and text[4] == '-' and text[7] == '-':
             try:
-                return datetime.strptime(str(date_str).strip(), fmt)
+                return datetime.combine(date.fromisoformat(text), datetime.min.time())
+            except ValueError:
+                pass
+
+        for fmt in cls.DATE_FORMATS:
+            try:
+                return datetime.strptime(text, fmt)
             except ValueError:
                 continue
 
@@ -60,14 +174,495 @@ class CovidData:
 
         raise ValueError(f"Formato de data não reconhecido: {date_str}")
 
+
+class CovidData:
+    """Classe responsável por armazenar e gerenciar os dados de COVID-19
+
+    Registro compacto: usa __slots__ (sem __dict__ por instância) e guarda a data
+    como ordinal de dia (date.toordinal). O atributo date continua devolvendo um
+    datetime, criado sob demanda, e extra_fields só aloca um dicionário quando a
+    linha tem campos extras.
+    """
+
+    __slots__ = ('date_ordinal', 'municipality', 'new_cases', 'new_deaths', 'new_vaccinated',
+                 'accumulated_cases', 'accumulated_deaths', 'accumulated_vaccinated', '_extra_fields')
+
+    # Rótulo MM/YYYY por ordinal; há poucos milhares de dias distintos em um arquivo
+    _month_labels: Dict[int, str] = {}
+
+    def __init__(self, date: Union[str, datetime], municipality: str, new_cases: int = 0, new_deaths: int = 0,
+                 new_vaccinated: int = 0, accumulated_cases: int = 0, accumulated_deaths: int = 0,
+                 accumulated_vaccinated: int = 0, **kwargs):
+        if isinstance(date, datetime):
+            # Data já convertida (por exemplo, por um DateParser de coluna)
+            self.date_ordinal = date.toordinal()
+        else:
+            try:
+                # Tenta diferentes formatos de data
+                self.date_ordinal = self._parse_date(date).toordinal()
+            except:
+                self.date_ordinal = datetime.now().toordinal()
+
+        self.municipality = str(municipality)
+        self.new_cases = int(new_cases) if str(new_cases).isdigit() else 0
+        self.new_deaths = int(new_deaths) if str(new_deaths).isdigit() else 0
+        self.new_vaccinated = int(new_vaccinated) if str(new_vaccinated).isdigit() else 0
+        self.accumulated_cases = int(accumulated_cases) if str(accumulated_cases).isdigit() else 0
+        self.accumulated_deaths = int(accumulated_deaths) if str(accumulated_deaths).isdigit() else 0
+        self.accumulated_vaccinated = int(accumulated_vaccinated) if str(accumulated_vaccinated).isdigit() else 0
+
+        # Armazena campos extras
+        self._extra_fields = kwargs or None
+
+    def _parse_date(self, date_str: str) -> datetime:
+        """Tenta parsear diferentes formatos de data"""
+        return DateParser.parse_any(date_str)
+
+    @property
+    def date(self) -> datetime:
+        return datetime.fromordinal(self.date_ordinal)
+
+    @date.setter
+    def date(self, value: datetime):
+        self.date_ordinal = value.toordinal()
+
+    @property
+    def extra_fields(self) -> Dict[str, Any]:
+        if self._extra_fields is None:
+            self._extra_fields = {}
+        return self._extra_fields
+
+    @extra_fields.setter
+    def extra_fields(self, value: Optional[Dict[str, Any]]):
+        self._extra_fields = value or None
+
+    @classmethod
+    def from_values(cls, date: datetime, municipality: str, metrics: Sequence[int],
+                    extra_fields: Optional[Dict[str, Any]] = None) -> 'CovidData':
+        """Cria um registro a partir de valores já convertidos, sem reprocessar texto"""
+        return cls.from_ordinal(date.toordinal(), municipality, metrics, extra_fields)
+
+    @classmethod
+    def from_ordinal(cls, date_ordinal: int, municipality: str, metrics: Sequence[int],
+                     extra_fields: Optional[Dict[str, Any]] = None) -> 'CovidData':
+        """Cria um registro a partir do ordinal da data, sem criar um datetime"""
+        record = cls.__new__(cls)
+        record.date_ordinal = date_ordinal
+        record.municipality = municipality
+        (record.new_cases, record.new_deaths, record.new_vaccinated,
+         record.accumulated_cases, record.accumulated_deaths, record.accumulated_vaccinated) = metrics
+        record._extra_fields = extra_fields or None
+        return record
+
+    @property
+    def month_index(self) -> int:
+        """Mês como inteiro (ano * 12 + mês - 1), adequado para ordenar e agrupar"""
+        return AggregationKernel.period_code(self.date_ordinal, 'month')
+
     def get_month_year(self) -> str:
         """Retorna mês e ano no formato MM/YYYY"""
-        return f"{self.date.month:02d}/{self.date.year}"
+        label = self._month_labels.get(self.date_ordinal)
+        if label is None:
+            label = self._month_labels[self.date_ordinal] = AggregationKernel.period_label(self.month_index, 'month')
+        return label
+
+
+class CategoricalColumn:
+    """Coluna de texto codificada por dicionário
+
+    Cada valor distinto é guardado uma única vez em categories e cada linha guarda
+    apenas o código do seu valor em um array tipado, que começa com 1 byte por
+    linha e é alargado quando o dicionário cresce. Comporta-se como uma lista de
+    strings somente para leitura e acréscimo (len, índice, fatia, iteração).
+    """
+
+    CODE_TYPES = (('B', 1 << 8), ('H', 1 << 16), ('i', 1 << 31))
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.categories: List[str] = []
+        self._lookup: Dict[str, int] = {}
+        self.codes = array('B')
+        self.extend(values)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __iter__(self) -> Iterator[str]:
+        categories = self.categories
+        return (categories[code] for code in self.codes)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            categories = self.categories
+            return [categories[code] for code in self.codes[index]]
+        return self.categories[self.codes[index]]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (CategoricalColumn, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"CategoricalColumn({len(self)} linhas, {len(self.categories)} valores distintos)"
+
+    @classmethod
+    def from_codes(cls, categories: List[str], codes: array) -> 'CategoricalColumn':
+        """Recria a coluna a partir do dicionário e dos códigos, sem recodificar os valores"""
+        column = cls()
+        column.categories = categories
+        column._lookup = {value: code for code, value in enumerate(categories)}
+        column.codes = codes
+        return column
+
+    def code(self, value: str) -> int:
+        """Código do valor, registrando-o no dicionário se for novo"""
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(value)
+            self._lookup[value] = code
+        return code
+
+    def _fit_codes(self):
+        """Alarga o array de códigos quando o dicionário passa do limite do tipo atual"""
+        count = len(self.categories)
+        for typecode, limit in self.CODE_TYPES:
+            if count <= limit:
+                if typecode != self.codes.typecode:
+                    self.codes = array(typecode, self.codes)
+                return
+
+    def append(self, value: str):
+        code = self.code(value)
+        self._fit_codes()
+        self.codes.append(code)
+
+    def extend(self, values: Iterable[str]):
+        if not isinstance(values, (list, tuple)):
+            values = list(values)
+        lookup = self._lookup
+        codes = self.codes
+        count = len(codes)
+        try:
+            # Caso comum depois dos primeiros lotes: nenhum valor novo, codificação toda em C
+            codes.extend(map(lookup.__getitem__, values))
+            return
+        except KeyError:
+            del codes[count:]
+
+        # Valores novos na ordem da primeira aparição: códigos iguais a cada execução
+        new_values = list(dict.fromkeys(value for value in values if value not in lookup))
+        start = len(self.categories)
+        self.categories.extend(new_values)
+        lookup.update(zip(new_values, range(start, start + len(new_values))))
+        self._fit_codes()
+        self.codes.extend(map(lookup.__getitem__, values))
+
+    def take(self, positions: Sequence[int]) -> 'CategoricalColumn':
+        """Nova coluna com as linhas indicadas, reaproveitando o dicionário"""
+        column = CategoricalColumn()
+        column.categories = list(self.categories)
+        column._lookup = dict(self._lookup)
+        codes = self.codes
+        column.codes = array(codes.typecode, [codes[i] for i in positions])
+        return column
+
+    def nbytes(self) -> int:
+        """Bytes ocupados pelos códigos, pelo dicionário e pelas strings distintas"""
+        return (self.codes.itemsize * len(self.codes) + sys.getsizeof(self.categories)
+                + sys.getsizeof(self._lookup) + sum(sys.getsizeof(value) for value in self.categories))
+
+
+class CovidColumnStore:
+    """Armazenamento colunar dos registros de COVID-19
+
+    Cada métrica fica em um buffer tipado (array), as datas são guardadas como
+    ordinais inteiros e os municípios como códigos de um dicionário de strings.
+    Colunas extras de baixa cardinalidade (UF, tipo de local, flags, códigos IBGE)
+    também são codificadas por dicionário (CategoricalColumn); as de valores
+    quase todos distintos, como taxas, ficam como listas simples.
+    Objetos CovidData só são criados sob demanda, ao indexar ou iterar o store.
+    Cada alteração recebe um novo número de versão, único entre todos os stores,
+    o que permite guardar resultados derivados enquanto os dados não mudam. A
+    geração só muda quando linhas existentes são alteradas ou removidas; enquanto
+    ela se mantém, o store apenas cresceu e agregados podem ser atualizados.
+    """
+
+    METRIC_FIELDS = ('new_cases', 'new_deaths', 'new_vaccinated',
+                     'accumulated_cases', 'accumulated_deaths', 'accumulated_vaccinated')
+
+    # Colunas extras deixam de ser codificadas ao passar de CATEGORICAL_MAX_VALUES
+    # valores distintos ou, depois de CATEGORICAL_MIN_ROWS linhas, dessa fração das linhas
+    CATEGORICAL_MAX_VALUES = 1 << 16
+    CATEGORICAL_MAX_RATIO = 0.5
+    CATEGORICAL_MIN_ROWS = 1024
+
+    _versions = itertools.count(1)
+
+    def __init__(self):
+        self.version = next(self._versions)
+        self.generation = self.version
+        self.dates = array('i')
+        self.municipality_codes = array('i')
+        self.municipalities: List[str] = []
+        self._municipality_lookup: Dict[str, int] = {}
+        self.metrics: Dict[str, array] = {field: array('q') for field in self.METRIC_FIELDS}
+        self.extra_columns: List[str] = []
+        self.extra_values: Dict[str, Union[CategoricalColumn, List[str]]] = {}
+
+    @classmethod
+    def from_records(cls, records: Iterable[CovidData]) -> 'CovidColumnStore':
+        """Constrói o store a partir de objetos CovidData já existentes"""
+        store = cls()
+        for record in records:
+            store.append_record(record)
+        return store
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __iter__(self) -> Iterator[CovidData]:
+        for index in range(len(self.dates)):
+            yield self.record(index)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[CovidData, List[CovidData]]:
+        if isinstance(index, slice):
+            return [self.record(i) for i in range(*index.indices(len(self.dates)))]
+        if index < 0:
+            index += len(self.dates)
+        if not 0 <= index < len(self.dates):
+            raise IndexError("índice de registro fora do intervalo")
+        return self.record(index)
+
+    def touch(self, rewritten: bool = False):
+        """Marca o store como alterado, invalidando resultados derivados
+
+        Use rewritten=True ao alterar ou remover linhas existentes (em vez de só
+        acrescentar), para que agregados incrementais sejam recalculados.
+        """
+        self.version = next(self._versions)
+        if rewritten:
+            self.generation = self.version
+
+    def new_extra_column(self, values: Iterable[str] = ()) -> Union[CategoricalColumn, List[str]]:
+        """Cria uma coluna extra codificada por dicionário, ou lista se os valores quase não se repetem"""
+        return self._fit_extra_column(CategoricalColumn(values))
+
+    def _fit_extra_column(self, column: Union[CategoricalColumn, List[str]]
+                          ) -> Union[CategoricalColumn, List[str]]:
+        """Troca a codificação por uma lista quando o dicionário não compensa"""
+        if isinstance(column, CategoricalColumn):
+            distinct = len(column.categories)
+            if distinct > self.CATEGORICAL_MAX_VALUES or (len(column) >= self.CATEGORICAL_MIN_ROWS
+                                                          and distinct > len(column) * self.CATEGORICAL_MAX_RATIO):
+                return list(column)
+        return column
+
+    def _fit_extra_columns(self):
+        for column in self.extra_columns:
+            self.extra_values[column] = self._fit_extra_column(self.extra_values[column])
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Bytes por coluna e por registro, antes (uma string por linha) e depois da codificação
+
+        O "antes" corresponde às colunas extras como listas com uma string por
+        linha, como saem do csv.reader; datas, municípios e métricas já eram
+        colunas tipadas e contam igual nos dois lados.
+        """
+        rows = len(self)
+        columns: Dict[str, Dict[str, Any]] = {}
+
+        def typed(name: str, values: array, extra: int = 0):
+            size = values.itemsize * len(values) + extra
+            columns[name] = {'encoding': f"array '{values.typecode}'", 'before': size, 'after': size}
+
+        typed('date', self.dates)
+        typed('municipality', self.municipality_codes,
+              sys.getsizeof(self.municipalities) + sum(sys.getsizeof(name) for name in self.municipalities))
+        for field in self.METRIC_FIELDS:
+            typed(field, self.metrics[field])
+
+        for column in self.extra_columns:
+            values = self.extra_values[column]
+            if isinstance(values, CategoricalColumn):
+                sizes = [sys.getsizeof(value) for value in values.categories]
+                counts = collections.Counter(values.codes)
+                before = sum(sizes[code] * count for code, count in counts.items())
+                columns[column] = {'encoding': f"dicionário ({len(values.categories)} valores)",
+                                   'after': values.nbytes()}
+            else:
+                before = sum(sys.getsizeof(value) for value in values)
+                columns[column] = {'encoding': 'lista', 'after': sys.getsizeof(values) + before}
+            columns[column]['before'] = 8 * rows + before
+
+        before = sum(info['before'] for info in columns.values())
+        after = sum(info['after'] for info in columns.values())
+        return {
+            'rows': rows,
+            'columns': columns,
+            'before_bytes': before,
+            'after_bytes': after,
+            'before_per_record': before / rows if rows else 0,
+            'after_per_record': after / rows if rows else 0,
+        }
+
+    def find_municipality(self, municipality: str) -> Optional[int]:
+        """Código do município, ou None se ele nunca foi registrado"""
+        return self._municipality_lookup.get(municipality)
+
+    def municipality_code(self, municipality: str) -> int:
+        """Retorna o código do município, registrando-o no dicionário se for novo"""
+        code = self._municipality_lookup.get(municipality)
+        if code is None:
+            code = len(self.municipalities)
+            self.municipalities.append(municipality)
+            self._municipality_lookup[municipality] = code
+        return code
+
+    def append(self, date_ordinal: int, municipality: str, metrics: Sequence[int],
+               extra_fields: Optional[Dict[str, Any]] = None):
+        """Adiciona uma linha ao store"""
+        self.dates.append(date_ordinal)
+        self.municipality_codes.append(self.municipality_code(municipality))
+        for field, value in zip(self.METRIC_FIELDS, metrics):
+            self.metrics[field].append(value)
+
+        row_count = len(self.dates)
+        extra_fields = extra_fields or {}
+        for column in extra_fields:
+            if column not in self.extra_values:
+                # Colunas extras novas começam vazias para as linhas anteriores
+                self.extra_columns.append(column)
+                self.extra_values[column] = self.new_extra_column([''] * (row_count - 1))
+        for column in self.extra_columns:
+            self.extra_values[column].append(str(extra_fields.get(column, '')))
+        self.touch()
+
+    def set_extra_columns(self, columns: Sequence[str]):
+        """Define as colunas extras do store (as linhas existentes ficam vazias nelas)"""
+        row_count = len(self.dates)
+        self.extra_columns = list(columns)
+        self.extra_values = {column: self.extra_values[column] if column in self.extra_values
+                             else self.new_extra_column([''] * row_count) for column in columns}
+        self.touch()
+
+    def append_values(self, date_ordinal: int, municipality: str, metrics: Sequence[int],
+                      extra_values: Sequence[str]):
+        """Adiciona uma linha já extraída, com extras alinhados a extra_columns"""
+        self.dates.append(date_ordinal)
+        self.municipality_codes.append(self.municipality_code(municipality))
+        for field, value in zip(self.METRIC_FIELDS, metrics):
+            self.metrics[field].append(value)
+        for column, value in zip(self.extra_columns, extra_values):
+            self.extra_values[column].append(value)
+        self.touch()
+
+    def extend_columns(self, date_ordinals: Sequence[int], municipalities: Sequence[str],
+                       metric_columns: Sequence[Sequence[int]], extra_columns: Sequence[List[str]]):
+        """Adiciona um lote de linhas já convertidas, coluna a coluna"""
+        self.dates.extend(date_ordinals)
+        code_of = self.municipality_code
+        lookup = self._municipality_lookup
+        self.municipality_codes.extend(
+            [lookup[name] if name in lookup else code_of(name) for name in municipalities])
+        for field, values in zip(self.METRIC_FIELDS, metric_columns):
+            self.metrics[field].extend(values)
+        for column, values in zip(self.extra_columns, extra_columns):
+            self.extra_values[column].extend(values)
+        self._fit_extra_columns()
+        self.touch()
+
+    def extend_store(self, other: 'CovidColumnStore'):
+        """Anexa as linhas de outro store, reconciliando os códigos de município"""
+        code_map = [self.municipality_code(name) for name in other.municipalities]
+        self.dates.extend(other.dates)
+        self.municipality_codes.extend([code_map[code] for code in other.municipality_codes])
+        for field in self.METRIC_FIELDS:
+            self.metrics[field].extend(other.metrics[field])
+        for column in self.extra_columns:
+            values = other.extra_values.get(column)
+            self.extra_values[column].extend(values if values is not None else [''] * len(other))
+        self._fit_extra_columns()
+        self.touch()
+
+    def take(self, positions: Sequence[int]) -> 'CovidColumnStore':
+        """Cria um novo store só com as linhas indicadas, na ordem dada"""
+        store = CovidColumnStore()
+        names, codes = self.municipalities, self.municipality_codes
+        store.extend_columns(
+            array('i', [self.dates[i] for i in positions]),
+            [names[codes[i]] for i in positions],
+            [array('q', [values[i] for i in positions]) for values in self.metrics.values()],
+            []
+        )
+        store.extra_columns = list(self.extra_columns)
+        for column in self.extra_columns:
+            values = self.extra_values[column]
+            store.extra_values[column] = values.take(positions) if isinstance(values, CategoricalColumn) \
+                else [values[i] for i in positions]
+        store.touch()
+        return store
+
+    def append_record(self, record: CovidData):
+        """Adiciona um objeto CovidData ao store"""
+        self.append(
+            record.date_ordinal,
+            record.municipality,
+            [getattr(record, field) for field in self.METRIC_FIELDS],
+            record._extra_fields
+        )
+
+    def record(self, index: int) -> CovidData:
+        """Materializa a linha indicada como um objeto CovidData"""
+        extra_fields = {column: self.extra_values[column][index] for column in self.extra_columns}
+        return CovidData.from_ordinal(
+            self.dates[index],
+            self.municipalities[self.municipality_codes[index]],
+            [self.metrics[field][index] for field in self.METRIC_FIELDS],
+            extra_fields
+        )
+
+
+class CsvSchema:
+    """Estrutura detectada de um arquivo CSV: delimitador, cabeçalho e tipos de coluna"""
+
+    def __init__(self, delimiter: str, has_header: bool, headers: List[str], column_mapping: Dict[str, str],
+                 sample_rows: Optional[List[List[str]]] = None):
+        self.delimiter = delimiter
+        self.has_header = has_header
+        self.headers = headers
+        self.column_mapping = column_mapping
+        self.sample_rows = sample_rows or []
+        self.date_formats: Dict[str, Optional[str]] = {}
+
+    def date_format_for(self, column: str) -> Optional[str]:
+        """Retorna o formato de data detectado para a coluna (detectado uma vez, sob demanda)"""
+        if column not in self.date_formats:
+            if column in self.headers:
+                col_index = self.headers.index(column)
+                self.date_formats[column] = FlexibleCSVProcessor.detect_date_format(self.sample_rows, col_index)
+            else:
+                self.date_formats[column] = None
+        return self.date_formats[column]
 
 
 class FlexibleCSVProcessor:
     """Processador CSV/TXT flexível com detecção automática de estrutura"""
 
+    # Quantidade de linhas usada para inferir a estrutura do arquivo
+    SCHEMA_SAMPLE_ROWS = 10
+
+    # Tipos de colunas que não são métricas nem identificam a linha
+    AUXILIARY_PATTERNS = {
+        'place_type': ['tipo_local', 'place_type'],
+        'municipality_code': ['ibge', 'codigo_municipio', 'cod_municipio', 'city_code'],
+        'population': ['populacao', 'population'],
+        'rate': ['por_100k', 'per_100k', 'taxa', '_rate', 'rate_'],
+        'flag': ['ultimo_registro', 'is_last', 'last_available'],
+    }
+    STATE_HEADERS = ('estado', 'state', 'uf')
+    AUXILIARY_TYPES = ('state',) + tuple(AUXILIARY_PATTERNS)
+
     @staticmethod
     def detect_delimiter(sample_text: str) -> str:
         """Detecta automaticamente o delimitador do arquivo"""
@@ -77,14 +672,14 @@ class FlexibleCSVProcessor:
         # Tenta usar o Sniffer do CSV
         try:
             sniffer = csv.Sniffer()
-            sample_lines = '\n'.join(sample_text.split('\n')[:10])
+            sample_lines = '\n'.join(sample_text.split('\n', 10)[:10])
             delimiter = sniffer.sniff(sample_lines, delimiters=',;\t|').delimiter
             return delimiter
         except:
             pass
 
         # Detecção manual baseada na primeira linha
-        first_line = sample_text.split('\n')[0] if sample_text else ""
+        first_line = sample_text.split('\n', 1)[0] if sample_text else ""
 
         # Conta ocorrências de diferentes delimitadores
         delimiter_counts = {
@@ -117,13 +712,15 @@ class FlexibleCSVProcessor:
         # Classificação por nome do cabeçalho
         date_patterns = ['data', 'date', 'fecha', 'dia', 'day', 'datum']
         municipality_patterns = ['municipio', 'cidade', 'city', 'municipality', 'localidade', 'local', 'lugar']
-        new_cases_patterns = ['novos_casos', 'new_cases', 'casos_novos', 'daily_cases', 'casos_diarios']
+        new_cases_patterns = ['novos_casos', 'new_cases', 'casos_novos', 'daily_cases', 'casos_diarios',
+                              'novos_confirmados', 'confirmados_novos']
         new_deaths_patterns = ['novos_obitos', 'novos_mortes', 'new_deaths', 'obitos_novos', 'mortes_novas',
                                'daily_deaths']
         new_vaccinated_patterns = ['novos_vacinados', 'new_vaccinated', 'vacinados_novos', 'daily_vaccinated']
-        acc_cases_patterns = ['casos_acumulados', 'accumulated_cases', 'total_casos', 'cumulative_cases']
+        acc_cases_patterns = ['casos_acumulados', 'accumulated_cases', 'total_casos', 'cumulative_cases',
+                              'confirmados']
         acc_deaths_patterns = ['obitos_acumulados', 'mortes_acumuladas', 'accumulated_deaths', 'total_obitos',
-                               'total_mortes']
+                               'total_mortes', 'obitos']
         acc_vaccinated_patterns = ['vacinados_acumulados', 'accumulated_vaccinated', 'total_vacinados',
                                    'cumulative_vaccinated']
 
@@ -132,6 +729,16 @@ class FlexibleCSVProcessor:
             if pattern in header:
                 return 'date'
 
+        # Colunas auxiliares (UF, tipo de local, código IBGE, taxas...) antes das de
+        # município e métricas, para que 'city_ibge_code' ou 'confirmados_por_100k'
+        # não sejam tomadas por elas
+        if header in FlexibleCSVProcessor.STATE_HEADERS:
+            return 'state'
+        for column_type, patterns in FlexibleCSVProcessor.AUXILIARY_PATTERNS.items():
+            for pattern in patterns:
+                if pattern in header:
+                    return column_type
+
         for pattern in municipality_patterns:
             if pattern in header:
                 return 'municipality'
@@ -173,7 +780,7 @@ class FlexibleCSVProcessor:
             return None
 
         sample_values = []
-        for row in sample_rows[:10]:  # Analisa apenas as primeiras 10 linhas
+        for row in sample_rows:  # A amostra já vem limitada (SCHEMA_SAMPLE_ROWS ou amostra espalhada)
             if col_index < len(row):
                 sample_values.append(row[col_index].strip())
 
@@ -220,55 +827,93 @@ class FlexibleCSVProcessor:
         return None
 
     @staticmethod
-    def parse_flexible_csv(content: str) -> List[Dict]:
-        """Processa conteúdo CSV de forma flexível"""
-        if not content.strip():
-            return []
+    def stream_flexible_csv(lines: Iterable[str], delimiter: Optional[str] = None,
+                            has_header: Optional[bool] = None) -> Tuple[Optional['CsvSchema'], Iterator[List[str]]]:
+        """Detecta a estrutura a partir de um prefixo limitado e devolve as linhas em fluxo
 
-        delimiter = FlexibleCSVProcessor.detect_delimiter(content)
+        Apenas as primeiras linhas são mantidas em memória para detectar delimitador,
+        cabeçalho e tipos de coluna; o restante é lido sob demanda pelo iterador retornado.
+        Delimitador e cabeçalho já conhecidos (por exemplo, de um FileProbe) não são redetectados.
+        """
+        lines = iter(lines)
+        sample_size = FlexibleCSVProcessor.SCHEMA_SAMPLE_ROWS
+        prefix = list(itertools.islice(lines, sample_size))
 
-        try:
-            csv_reader = csv.reader(io.StringIO(content), delimiter=delimiter)
-            rows = list(csv_reader)
-        except Exception as e:
-            print(f"Erro ao ler CSV: {e}")
-            return []
+        if not ''.join(prefix).strip():
+            return None, iter(())
 
-        if not rows:
-            return []
+        if delimiter is None:
+            delimiter = FlexibleCSVProcessor.detect_delimiter(''.join(prefix))
+        csv_reader = csv.reader(itertools.chain(prefix, lines), delimiter=delimiter)
+
+        first_row = next(csv_reader, None)
+        if first_row is None:
+            return None, iter(())
 
         # Detecta se há cabeçalho
-        has_header = FlexibleCSVProcessor._has_header_row(rows[0])
+        if has_header is None:
+            has_header = FlexibleCSVProcessor._has_header_row(first_row)
 
         if has_header:
-            headers = [h.strip() for h in rows[0]]
-            data_rows = rows[1:]
+            headers = [h.strip() for h in first_row]
+            sample_rows = list(itertools.islice(csv_reader, sample_size))
         else:
             # Gera cabeçalhos genéricos
-            headers = [f"coluna_{i + 1}" for i in range(len(rows[0]))]
-            data_rows = rows
+            headers = [f"coluna_{i + 1}" for i in range(len(first_row))]
+            sample_rows = [first_row] + list(itertools.islice(csv_reader, sample_size - 1))
 
-        if not data_rows:
-            return []
+        if not sample_rows:
+            return None, iter(())
+
+        # Detecta tipos de coluna usando só a amostra inicial
+        schema = FlexibleCSVProcessor.build_schema(delimiter, has_header, headers, sample_rows)
+        return schema, itertools.chain(sample_rows, csv_reader)
+
+    @staticmethod
+    def build_schema(delimiter: str, has_header: bool, headers: List[str],
+                     sample_rows: List[List[str]]) -> 'CsvSchema':
+        """Classifica as colunas a partir de uma amostra e monta a estrutura do arquivo"""
+        column_mapping = FlexibleCSVProcessor.detect_column_types(headers, sample_rows)
 
-        # Detecta tipos de coluna
-        column_mapping = FlexibleCSVProcessor.detect_column_types(headers, data_rows[:10])
+        schema = CsvSchema(delimiter, has_header, headers, column_mapping, sample_rows)
+        for header, column_type in column_mapping.items():
+            if column_type == 'date':
+                schema.date_format_for(header)
+
+        return schema
+
+    @staticmethod
+    def detect_date_format(sample_rows: List[List[str]], col_index: int) -> Optional[str]:
+        """Detecta o formato de data de uma coluna a partir da amostra"""
+        values = [row[col_index] for row in sample_rows if col_index < len(row)]
+        return DateParser.detect(values)
 
-        # Converte para lista de dicionários
-        parsed_data = []
-        for row in data_rows:
+    @staticmethod
+    def iter_row_dicts(schema: 'CsvSchema', rows: Iterable[List[str]]) -> Iterator[Dict[str, str]]:
+        """Converte as linhas do leitor CSV em dicionários, uma de cada vez"""
+        headers = schema.headers
+        for row in rows:
             if len(row) < 2:  # Pula linhas muito vazias
                 continue
 
-            row_dict = {}
-            for i, value in enumerate(row):
-                if i < len(headers):
-                    header = headers[i]
-                    row_dict[header] = value.strip() if value else ""
+            yield {header: value.strip() if value else "" for header, value in zip(headers, row)}
 
-            # Adiciona mapeamento de tipos
-            row_dict['_column_mapping'] = column_mapping
-            parsed_data.append(row_dict)
+    @staticmethod
+    def parse_flexible_csv(content: str) -> List[Dict]:
+        """Processa conteúdo CSV de forma flexível"""
+        try:
+            schema, rows = FlexibleCSVProcessor.stream_flexible_csv(io.StringIO(content))
+            if schema is None:
+                return []
+
+            parsed_data = []
+            for row_dict in FlexibleCSVProcessor.iter_row_dicts(schema, rows):
+                # Adiciona mapeamento de tipos
+                row_dict['_column_mapping'] = schema.column_mapping
+                parsed_data.append(row_dict)
+        except Exception as e:
+            print(f"Erro ao ler CSV: {e}")
+            return []
 
         return parsed_data
 
@@ -297,124 +942,2133 @@ class FlexibleCSVProcessor:
         return text_cells > len(first_row) / 2
 
 
-class FlexibleDataProcessor:
-    """Processador de dados flexível que trabalha com qualquer estrutura"""
+_numpy_module = None
+_numpy_checked = False
 
-    def __init__(self):
-        self.data: List[CovidData] = []
-        self.original_columns: List[str] = []
-        self.column_mapping: Dict[str, str] = {}
+# Backend de cálculo: 'auto' (NumPy quando instalado), 'numpy' ou 'python'. Os dois
+# caminhos produzem os mesmos resultados; o puro Python roda sem dependências.
+COMPUTE_BACKENDS = ('auto', 'numpy', 'python')
+_compute_backend = os.environ.get('COVID_ANALYZER_BACKEND', 'auto')
+if _compute_backend not in COMPUTE_BACKENDS:
+    _compute_backend = 'auto'
 
-    def load_data_from_text(self, text_data: str) -> bool:
-        """Carrega dados a partir de texto de forma flexível"""
+
+def _import_numpy():
+    """Importa o NumPy uma única vez; retorna None quando ele não está instalado"""
+    global _numpy_module, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
         try:
-            parsed_data = FlexibleCSVProcessor.parse_flexible_csv(text_data)
+            import numpy
+            _numpy_module = numpy
+        except ImportError:
+            _numpy_module = None
+    return _numpy_module
 
-            if parsed_data:
-                return self._process_flexible_data(parsed_data)
+
+def _get_numpy():
+    """NumPy para os kernels vetorizados, ou None quando o backend é puro Python"""
+    if _compute_backend == 'python':
+        return None
+    return _import_numpy()
+
+
+def set_compute_backend(name: str):
+    """Seleciona o backend de cálculo em tempo de execução ('auto', 'numpy' ou 'python')
+
+    A escolha também vale para os processos do carregamento paralelo, que a
+    recebem pela variável de ambiente COVID_ANALYZER_BACKEND.
+    """
+    global _compute_backend
+    if name not in COMPUTE_BACKENDS:
+        raise ValueError(f"Backend desconhecido: {name}")
+    if name == 'numpy' and _import_numpy() is None:
+        raise ImportError("O backend 'numpy' exige o NumPy instalado")
+    _compute_backend = name
+    os.environ['COVID_ANALYZER_BACKEND'] = name
+
+
+def get_compute_backend() -> str:
+    """Backend efetivamente em uso: 'numpy' ou 'python'"""
+    return 'numpy' if _get_numpy() is not None else 'python'
+
+
+class NumericColumnConverter:
+    """Conversor em lote de uma coluna numérica
+
+    O estilo da coluna é detectado uma vez a partir da amostra: colunas só com
+    dígitos usam int() direto (ou o parser do NumPy, quando instalado) e colunas
+    com separadores usam o decimal/milhar detectado (ex.: 14027,55365). Células
+    que não seguem o estilo detectado caem na conversão tolerante original.
+    """
+
+    # Maior contagem representável nas colunas array('q')
+    INT64_MAX = (1 << 63) - 1
+
+    def __init__(self, digits_only: bool = False, decimal: str = '.', thousands: str = ''):
+        self.digits_only = digits_only
+        self.decimal = decimal
+        self.thousands = thousands
+        self.fallback_count = 0
+
+    @classmethod
+    def detect(cls, values: Iterable[str]) -> 'NumericColumnConverter':
+        """Detecta o estilo numérico da coluna a partir de uma amostra"""
+        values = [str(value).strip() for value in values]
+        values = [value for value in values if value]
+
+        if values and all(value.lstrip('-').isdigit() for value in values):
+            return cls(digits_only=True)
+
+        mixed = [value for value in values if ',' in value and '.' in value]
+        if mixed:
+            # Em valores com os dois separadores, o último é o decimal
+            decimal = ',' if mixed[0].rfind(',') > mixed[0].rfind('.') else '.'
+            return cls(decimal=decimal, thousands='.' if decimal == ',' else ',')
+
+        if any(value.count('.') > 1 for value in values):
+            return cls(decimal=',', thousands='.')
+        if any(value.count(',') > 1 for value in values):
+            return cls(decimal='.', thousands=',')
+
+        has_comma = any(',' in value for value in values)
+        return cls(decimal=',' if has_comma else '.')
+
+    def convert(self, values: List[str]) -> array:
+        """Converte um lote de células em contagens inteiras não negativas"""
+        if self.digits_only:
+            parsed = self._convert_digits(values)
+        else:
+            parsed = self._convert_decimal(values)
+
+        if isinstance(parsed, array):
+            return parsed
+        try:
+            return array('q', [value if value > 0 else 0 for value in parsed])
+        except OverflowError:
+            # Células com mais dígitos do que cabem em 64 bits ficam no valor máximo
+            return array('q', [min(value, self.INT64_MAX) if value > 0 else 0 for value in parsed])
+
+    def _convert_digits(self, values: List[str]):
+        """Caminho rápido para colunas de inteiros"""
+        np = _get_numpy()
+        if np is not None and values:
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('error', DeprecationWarning)
+                    parsed = np.fromstring(' '.join(values), dtype=np.int64, sep=' ')
+                if len(parsed) == len(values):
+                    np.maximum(parsed, 0, out=parsed)
+                    result = array('q')
+                    result.frombytes(parsed.tobytes())
+                    return result
+            except (ValueError, DeprecationWarning):
+                pass
+
+        try:
+            return list(map(int, values))
+        except ValueError:
+            pass
+
+        parsed = []
+        for value in values:
+            try:
+                parsed.append(int(value))
+            except ValueError:
+                self.fallback_count += 1
+                parsed.append(FlexibleDataProcessor._safe_get_numeric(value))
+        return parsed
+
+    def _convert_decimal(self, values: List[str]) -> List[int]:
+        """Converte células com separador decimal/milhar detectado"""
+        decimal, thousands = self.decimal, self.thousands
+        parsed = []
+        for value in values:
+            text = value.strip()
+            if thousands:
+                text = text.replace(thousands, '')
+            whole, _, fraction = text.partition(decimal)
+            digits = whole[1:] if whole[:1] == '-' else whole
+            if digits.isdigit() and (not fraction or fraction.isdigit()):
+                parsed.append(int(whole))
             else:
-                return False
+                if text:
+                    self.fallback_count += 1
+                parsed.append(FlexibleDataProcessor._safe_get_numeric(value))
+        return parsed
 
-        except Exception as e:
-            print(f"Erro ao carregar dados: {e}")
-            return False
 
-    def _process_flexible_data(self, parsed_data: List[Dict]) -> bool:
-        """Processa dados flexíveis extraindo informações relevantes"""
-        if not parsed_data:
-            return False
+class ExtractionPlan:
+    """Plano de extração de linhas compilado uma única vez por arquivo
 
-        self.data = []
+    Resolve, a partir da estrutura detectada, os índices fixos das colunas de data e
+    município, o índice e o conversor de cada métrica, o fallback posicional e os
+    índices das colunas extras. As listas vindas do csv.reader são convertidas
+    diretamente, sem dicionários intermediários por linha.
+    """
 
-        # Pega o mapeamento de colunas do primeiro item
-        first_item = parsed_data[0]
-        column_mapping = first_item.get('_column_mapping', {})
+    def __init__(self, schema: CsvSchema, date_parser: Optional[DateParser] = None,
+                 numeric_converter=None):
+        # Colunas únicas na ordem do arquivo; nomes repetidos usam a última ocorrência
+        self.columns = list(dict.fromkeys(schema.headers))
+        index_of = {header: i for i, header in enumerate(schema.headers)}
 
         # Cria mapeamento reverso para encontrar colunas por tipo
         type_to_column = {}
-        for column, col_type in column_mapping.items():
+        for column, col_type in schema.column_mapping.items():
             type_to_column[col_type] = column
 
-        self.original_columns = list(first_item.keys())
-        self.original_columns = [col for col in self.original_columns if col != '_column_mapping']
-        self.column_mapping = column_mapping
+        # Se não encontrou data e município pelos tipos, usa a posição
+        date_col = type_to_column.get('date')
+        municipality_col = type_to_column.get('municipality')
+        if not date_col or not municipality_col:
+            if len(self.columns) >= 2:
+                date_col = date_col or self.columns[0]
+                municipality_col = municipality_col or self.columns[1]
+
+        self.date_column = date_col
+        self.municipality_column = municipality_col
+        self.date_index = index_of.get(date_col) if date_col else None
+        self.municipality_index = index_of.get(municipality_col) if municipality_col else None
+
+        # Linhas agregadas por estado costumam vir com o município vazio: usa a UF no lugar
+        state_col = type_to_column.get('state')
+        self.state_index = index_of.get(state_col) if state_col and state_col != municipality_col else None
+
+        self.metric_indices = [
+            index_of.get(type_to_column[field]) if field in type_to_column else None
+            for field in CovidColumnStore.METRIC_FIELDS
+        ]
+
+        # Fallback posicional: métricas na ordem padrão após data e município. Com
+        # colunas auxiliares reconhecidas a ordem do arquivo não é a padrão, e a
+        # posição traria população ou códigos para as métricas
+        self.positional_indices = None
+        has_auxiliary = any(col_type in FlexibleCSVProcessor.AUXILIARY_TYPES
+                            for col_type in schema.column_mapping.values())
+        if len(self.columns) >= 3 and not has_auxiliary:
+            self.positional_indices = [
+                index_of[self.columns[i + 2]] if i + 2 < len(self.columns) else None
+                for i in range(len(CovidColumnStore.METRIC_FIELDS))
+            ]
+        self.positional_only = all(index is None for index in self.metric_indices)
+
+        # Campos extras: todas as colunas exceto data e município
+        self.extra_columns = [col for col in self.columns if col not in (date_col, municipality_col)]
+        self.extra_indices = [index_of[col] for col in self.extra_columns]
+
+        self.date_parser = date_parser or DateParser(schema.date_format_for(date_col) if date_col else None)
+        self.convert = numeric_converter or FlexibleDataProcessor._safe_get_numeric
+        self.sample_rows = schema.sample_rows
+        self._column_converters: Dict[int, NumericColumnConverter] = {}
+
+    @property
+    def is_valid(self) -> bool:
+        """Indica se há colunas de data e município para extrair registros"""
+        return self.date_index is not None and self.municipality_index is not None
+
+    def _metrics(self, row: List[str], indices: List[Optional[int]]) -> List[int]:
+        """Converte as métricas da linha nos índices informados (negativos viram zero)"""
+        convert = self.convert
+        row_length = len(row)
+        values = []
+        for index in indices:
+            if index is None or index >= row_length:
+                values.append(0)
+            else:
+                value = convert(row[index])
+                values.append(value if value > 0 else 0)
+        return values
+
+    def extract(self, row: List[str]) -> Optional[Tuple[int, str, List[int], List[str]]]:
+        """Extrai (ordinal da data, município, métricas, extras) de uma linha do csv.reader"""
+        row_length = len(row)
+        if row_length < 2:  # Pula linhas muito vazias
+            return None
+
+        date_index, municipality_index = self.date_index, self.municipality_index
+        date_value = row[date_index].strip() if date_index < row_length else ''
+        municipality_value = row[municipality_index].strip() if municipality_index < row_length else ''
+        if not municipality_value and self.state_index is not None and self.state_index < row_length:
+            municipality_value = row[self.state_index].strip()
+        if not date_value or not municipality_value:
+            return None
+
+        try:
+            ordinal = self.date_parser.parse_ordinal(date_value)
+        except ValueError:
+            ordinal = datetime.now().toordinal()
+
+        if self.positional_only:
+            metrics = self._metrics(row, self.positional_indices) if self.positional_indices \
+                else [0] * len(self.metric_indices)
+        else:
+            metrics = self._metrics(row, self.metric_indices)
+            # Linha zerada nas colunas mapeadas: tenta inferir pela posição
+            if self.positional_indices and not any(metrics):
+                metrics = self._metrics(row, self.positional_indices)
+
+        extras = [row[index].strip() if index < row_length else '' for index in self.extra_indices]
+
+        return ordinal, municipality_value, metrics, extras
+
+    def column_converter(self, index: int) -> NumericColumnConverter:
+        """Conversor em lote da coluna, detectado uma vez a partir da amostra"""
+        converter = self._column_converters.get(index)
+        if converter is None:
+            converter = NumericColumnConverter.detect(
+                row[index] for row in self.sample_rows if index < len(row))
+            self._column_converters[index] = converter
+        return converter
+
+    def _convert_columns(self, rows: List[List[str]], indices: List[Optional[int]]) -> List[array]:
+        """Converte em lote as colunas de métricas indicadas"""
+        columns = []
+        for index in indices:
+            if index is None:
+                columns.append(array('q', bytes(8 * len(rows))))
+                continue
+            values = [row[index] if index < len(row) else '' for row in rows]
+            columns.append(self.column_converter(index).convert(values))
+        return columns
+
+    def extract_batch(self, rows: List[List[str]], report: Optional['LoadReport'] = None
+                      ) -> Tuple[array, List[str], List[array], List[List[str]]]:
+        """Extrai um lote de linhas do csv.reader, convertendo cada coluna de uma vez"""
+        stage = report.stage if report is not None else contextlib.nullcontext
+        with stage('dates'):
+            ordinals, municipalities, kept_rows = self._extract_keys(rows)
+        with stage('metrics'):
+            metrics = self._extract_metrics(kept_rows)
+        with stage('extras'):
+            extras = [[row[index].strip() if index < len(row) else '' for row in kept_rows]
+                      for index in self.extra_indices]
+
+        return ordinals, municipalities, metrics, extras
+
+    def _extract_keys(self, rows: List[List[str]]) -> Tuple[array, List[str], List[List[str]]]:
+        """Converte datas e municípios do lote; retorna também as linhas mantidas"""
+        date_index, municipality_index, state_index = self.date_index, self.municipality_index, self.state_index
+        parse_ordinal = self.date_parser.parse_ordinal
+
+        kept_rows = []
+        ordinals = array('i')
+        municipalities = []
+        for row in rows:
+            row_length = len(row)
+            if row_length < 2:  # Pula linhas muito vazias
+                continue
+
+            date_value = row[date_index].strip() if date_index < row_length else ''
+            municipality_value = row[municipality_index].strip() if municipality_index < row_length else ''
+            if not municipality_value and state_index is not None and state_index < row_length:
+                municipality_value = row[state_index].strip()
+            if not date_value or not municipality_value:
+                continue
 
-        # Processa cada linha
-        for row_dict in parsed_data:
             try:
-                # Extrai campos principais usando mapeamento
-                covid_data = self._extract_covid_data(row_dict, type_to_column)
-                if covid_data:
-                    self.data.append(covid_data)
-            except Exception as e:
-                print(f"Erro ao processar linha: {e}")
+                ordinal = parse_ordinal(date_value)
+            except ValueError:
+                ordinal = datetime.now().toordinal()
+
+            kept_rows.append(row)
+            ordinals.append(ordinal)
+            municipalities.append(municipality_value)
+
+        return ordinals, municipalities, kept_rows
+
+    def _extract_metrics(self, kept_rows: List[List[str]]) -> List[array]:
+        """Converte as colunas de métricas das linhas mantidas, com o fallback posicional"""
+        if self.positional_only:
+            if self.positional_indices:
+                metrics = self._convert_columns(kept_rows, self.positional_indices)
+            else:
+                metrics = self._convert_columns(kept_rows, self.metric_indices)
+        else:
+            metrics = self._convert_columns(kept_rows, self.metric_indices)
+            if self.positional_indices:
+                # Linhas zeradas nas colunas mapeadas: tenta inferir pela posição
+                zero_rows = [i for i, values in enumerate(zip(*metrics)) if not any(values)]
+                if zero_rows:
+                    positional = self._convert_columns([kept_rows[i] for i in zero_rows],
+                                                       self.positional_indices)
+                    for column, replacement in zip(metrics, positional):
+                        for position, i in enumerate(zero_rows):
+                            column[i] = replacement[position]
+        return metrics
+
+
+class CumulativeFeedNormalizer:
+    """Etapa de ingestão para arquivos que só trazem totais acumulados
+
+    Alguns feeds (como o do Brasil.IO) publicam apenas os acumulados, em ordem
+    decrescente de data e misturando linhas agregadas por estado às das cidades.
+    Aqui as linhas agregadas são separadas das municipais, para não contar os
+    totais em dobro, e as métricas diárias ausentes são derivadas como diferença
+    entre acumulados consecutivos de cada município. A série de cada município é
+    ordenada uma única vez; quedas no acumulado (correções da fonte) viram
+    deltas negativos, de modo que a soma dos diários bate com o último acumulado.
+
+    A ordem (data, posição) das linhas de cada município fica guardada por store,
+    de modo que linhas acrescentadas depois são derivadas só a partir do vizinho
+    anterior na série, sem reordenar o store inteiro.
+    """
+
+    DERIVED_PAIRS = (('new_cases', 'accumulated_cases'),
+                     ('new_deaths', 'accumulated_deaths'),
+                     ('new_vaccinated', 'accumulated_vaccinated'))
+    AGGREGATE_PLACE_TYPES = ('state', 'estado', 'uf', 'region', 'regiao', 'country', 'pais')
+
+    def __init__(self, column_mapping: Dict[str, str]):
+        type_to_column = {col_type: column for column, col_type in column_mapping.items()}
+        self.derived_fields = [(new_field, accumulated_field) for new_field, accumulated_field in self.DERIVED_PAIRS
+                               if new_field not in type_to_column and accumulated_field in type_to_column]
+        self.place_type_column = type_to_column.get('place_type')
+        self.state_column = type_to_column.get('state')
+        self.corrections = 0
+        self.aggregate_rows = 0
+        # Por store: (store, linhas derivadas, correções, {código: (datas, posições)} em ordem)
+        self._series: Dict[int, Tuple[CovidColumnStore, int, int, Dict[int, Tuple[array, array]]]] = {}
+
+    @property
+    def is_needed(self) -> bool:
+        """Indica se o arquivo tem métricas a derivar ou linhas agregadas a separar"""
+        return bool(self.derived_fields or self.place_type_column or self.state_column)
+
+    def aggregate_positions(self, store: CovidColumnStore) -> List[int]:
+        """Posições das linhas agregadas (estado, país...) em vez de municipais"""
+        place_types = store.extra_values.get(self.place_type_column) if self.place_type_column else None
+        if place_types is not None:
+            aggregate_types = self.AGGREGATE_PLACE_TYPES
+            if isinstance(place_types, CategoricalColumn):
+                # Compara cada valor distinto uma vez e depois só os códigos
+                codes = {code for code, value in enumerate(place_types.categories)
+                         if value.strip().lower() in aggregate_types}
+                return [i for i, code in enumerate(place_types.codes) if code in codes] if codes else []
+            return [i for i, value in enumerate(place_types) if value.strip().lower() in aggregate_types]
+
+        # Sem tipo de local: a linha é agregada quando o "município" é a própria UF
+        states = store.extra_values.get(self.state_column) if self.state_column else None
+        if states is None:
+            return []
+        names, codes = store.municipalities, store.municipality_codes
+        return [i for i, state in enumerate(states) if state and names[codes[i]] == state.strip()]
+
+    def split_aggregate_rows(self, store: CovidColumnStore
+                             ) -> Tuple[CovidColumnStore, Optional[CovidColumnStore]]:
+        """Separa o store em (linhas municipais, linhas agregadas ou None)"""
+        positions = self.aggregate_positions(store)
+        if not positions:
+            return store, None
+
+        self.aggregate_rows += len(positions)
+        aggregate = set(positions)
+        city_positions = [i for i in range(len(store)) if i not in aggregate]
+        return store.take(city_positions), store.take(positions)
+
+    def derive_daily(self, store: CovidColumnStore, appended_from: int = 0):
+        """Deriva as métricas diárias ausentes a partir dos acumulados de cada município
+
+        Linhas a partir de appended_from são consideradas novas e, se a série do
+        store já é conhecida, só elas (e a linha seguinte a cada uma na série do
+        município) são calculadas. Se alguma linha anterior mudar (dado atrasado
+        no meio da série), o store é marcado como reescrito para que os agregados
+        incrementais sejam refeitos.
+        """
+        if not self.derived_fields or not len(store):
+            return
+
+        known = self._series.get(id(store))
+        if appended_from and known is not None and known[0] is store and known[1] == appended_from:
+            store.touch(rewritten=self._derive_appended(store, appended_from))
+            return
+
+        np = _get_numpy()
+        if np is not None:
+            changed_from = self._derive_numpy(np, store)
+        else:
+            changed_from = self._derive_python(store)
+        store.touch(rewritten=changed_from is not None and changed_from < appended_from)
+
+    def _remember_series(self, store: CovidColumnStore, series: Dict[int, Tuple[array, array]]):
+        """Guarda a ordem das séries do store para as próximas linhas acrescentadas"""
+        self._series[id(store)] = (store, len(store), self.corrections, series)
+
+    def _derive_appended(self, store: CovidColumnStore, appended_from: int) -> bool:
+        """Deriva só as linhas novas; retorna True se alguma linha anterior mudou
+
+        Cada linha nova entra na série do seu município depois das de mesma data
+        (por busca binária) e seu delta vem do vizinho anterior; a linha seguinte,
+        se já existia, tem o delta recalculado em relação à nova.
+        """
+        _, _, corrections, series = self._series[id(store)]
+        dates, codes = store.dates, store.municipality_codes
+        fields = [(store.metrics[new_field], store.metrics[accumulated_field])
+                  for new_field, accumulated_field in self.derived_fields]
+
+        rewritten = False
+        # Em ordem de (data, posição), como a ordenação completa
+        for position in sorted(range(appended_from, len(store)), key=dates.__getitem__):
+            day = dates[position]
+            series_dates, series_positions = series.setdefault(codes[position], (array('i'), array('q')))
+            at = bisect.bisect_right(series_dates, day)
+            series_dates.insert(at, day)
+            series_positions.insert(at, position)
+            before = series_positions[at - 1] if at else -1
+            after = series_positions[at + 1] if at + 1 < len(series_positions) else -1
+
+            for new_values, accumulated in fields:
+                delta = accumulated[position] - accumulated[before] if before >= 0 else accumulated[position]
+                new_values[position] = delta
+                corrections += delta < 0
+                if after >= 0:
+                    old_delta = new_values[after]
+                    delta = accumulated[after] - accumulated[position]
+                    if delta != old_delta:
+                        new_values[after] = delta
+                        corrections += (delta < 0) - (old_delta < 0)
+                        rewritten = rewritten or after < appended_from
+
+        self.corrections = corrections
+        self._series[id(store)] = (store, len(store), corrections, series)
+        return rewritten
+
+    def _derive_numpy(self, np, store: CovidColumnStore) -> Optional[int]:
+        """Diferença agrupada vetorizada; retorna a primeira posição alterada"""
+        count = len(store)
+        codes = np.frombuffer(store.municipality_codes, dtype=np.dtype(f"i{store.municipality_codes.itemsize}"))
+        dates = np.frombuffer(store.dates, dtype=np.dtype(f"i{store.dates.itemsize}"))
+
+        # Uma única ordenação por (município, data, posição no arquivo)
+        order = np.lexsort((np.arange(count), dates, codes))
+        previous_sorted = np.empty(count, dtype=np.int64)
+        previous_sorted[0] = -1
+        previous_sorted[1:] = order[:-1]
+        previous_sorted[1:][codes[order[1:]] != codes[order[:-1]]] = -1
+        previous = np.empty(count, dtype=np.int64)
+        previous[order] = previous_sorted
+        has_previous = previous >= 0
+        previous[~has_previous] = 0
+
+        changed_from = None
+        corrections = 0
+        for new_field, accumulated_field in self.derived_fields:
+            accumulated = np.frombuffer(store.metrics[accumulated_field], dtype=np.int64)
+            deltas = accumulated - np.where(has_previous, accumulated[previous], 0)
+            corrections += int(np.count_nonzero(deltas < 0))
+
+            current = np.frombuffer(store.metrics[new_field], dtype=np.int64)
+            changed = np.flatnonzero(deltas != current)
+            if changed.size:
+                first = int(changed[0])
+                changed_from = first if changed_from is None else min(changed_from, first)
+                column = array('q')
+                column.frombytes(deltas.tobytes())
+                store.metrics[new_field] = column
+
+        self.corrections = corrections
+        sorted_codes = codes[order]
+        bounds = [0, *(np.flatnonzero(sorted_codes[1:] != sorted_codes[:-1]) + 1).tolist(), count]
+        sorted_dates = dates[order]
+        series = {}
+        for start, end in zip(bounds, bounds[1:]):
+            series_dates, series_positions = array('i'), array('q')
+            series_dates.frombytes(sorted_dates[start:end].astype(np.int32).tobytes())
+            series_positions.frombytes(order[start:end].astype(np.int64).tobytes())
+            series[int(sorted_codes[start])] = (series_dates, series_positions)
+        self._remember_series(store, series)
+        return changed_from
+
+    def _derive_python(self, store: CovidColumnStore) -> Optional[int]:
+        """Diferença agrupada em Python puro; retorna a primeira posição alterada"""
+        series: Dict[int, List[int]] = {}
+        for position, code in enumerate(store.municipality_codes):
+            series.setdefault(code, []).append(position)
+
+        dates = store.dates
+        previous = [-1] * len(store)
+        for positions in series.values():
+            positions.sort(key=dates.__getitem__)  # sort estável: empate mantém a ordem do arquivo
+            for before, position in zip(positions, positions[1:]):
+                previous[position] = before
+
+        changed_from = None
+        corrections = 0
+        for new_field, accumulated_field in self.derived_fields:
+            accumulated = store.metrics[accumulated_field]
+            deltas = array('q', [value - accumulated[before] if before >= 0 else value
+                                 for value, before in zip(accumulated, previous)])
+            corrections += sum(1 for delta in deltas if delta < 0)
+
+            current = store.metrics[new_field]
+            if deltas != current:
+                first = next(i for i, (delta, value) in enumerate(zip(deltas, current)) if delta != value)
+                changed_from = first if changed_from is None else min(changed_from, first)
+                store.metrics[new_field] = deltas
+
+        self.corrections = corrections
+        self._remember_series(store, {code: (array('i', map(dates.__getitem__, positions)), array('q', positions))
+                                      for code, positions in series.items()})
+        return changed_from
+
+
+class DatasetCache:
+    """Cache binário de arquivos já processados, indexado pela impressão digital do arquivo
+
+    Cada entrada guarda as colunas tipadas do CovidColumnStore já normalizado
+    (com o store de linhas agregadas, se houver), as colunas extras categóricas
+    como dicionário e códigos, e o mapeamento de colunas detectado. A entrada só é usada se caminho, tamanho, data de modificação
+    e hash do conteúdo coincidirem. O tamanho total é limitado e as entradas menos
+    usadas recentemente são removidas primeiro.
+    """
+
+    MAGIC = b'COVIDCACHE3\n'
+    FILE_SUFFIX = '.covidcache'
+    HASH_CHUNK_SIZE = 1 << 20
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 256 * 1024 * 1024,
+                 max_entries: int = 32):
+        self.cache_dir = cache_dir or os.environ.get('COVID_ANALYZER_CACHE_DIR') or \
+            os.path.join(os.path.expanduser('~'), '.cache', 'covid_analyzer')
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+    @classmethod
+    def fingerprint(cls, file_path: str) -> Dict[str, Any]:
+        """Calcula a impressão digital do arquivo: caminho, tamanho, mtime e hash do conteúdo"""
+        stat = os.stat(file_path)
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(cls.HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+
+        return {
+            'path': os.path.abspath(file_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'hash': digest.hexdigest()
+        }
+
+    def _entry_path(self, file_path: str) -> str:
+        """Caminho da entrada de cache correspondente ao arquivo"""
+        key = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key + self.FILE_SUFFIX)
+
+    def load(self, file_path: str, fingerprint: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Lê a entrada do arquivo se ela ainda corresponder ao conteúdo atual
+
+        Retorna um dicionário com 'store', 'state_store' (ou None), 'original_columns',
+        'column_mapping' e 'feed' (resumo da normalização, ou None).
+        """
+        entry_path = self._entry_path(file_path)
+        if not os.path.exists(entry_path):
+            return None
+
+        try:
+            with open(entry_path, 'rb') as file:
+                if file.read(len(self.MAGIC)) != self.MAGIC:
+                    return None
+                header_size = int.from_bytes(file.read(8), 'little')
+                header = json.loads(file.read(header_size).decode('utf-8'))
+
+                fingerprint = fingerprint or self.fingerprint(file_path)
+                if header.get('fingerprint') != fingerprint or header.get('byteorder') != sys.byteorder:
+                    return None
+
+                stores = [self._read_store(file, store_header) for store_header in header['stores']]
+
+            # Marca a entrada como usada recentemente (ordem do LRU)
+            os.utime(entry_path)
+            return {
+                'store': stores[0],
+                'state_store': stores[1] if len(stores) > 1 else None,
+                'original_columns': header['original_columns'],
+                'column_mapping': header['column_mapping'],
+                'feed': header.get('feed'),
+            }
+
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Erro ao ler cache: {e}")
+            return None
+
+    @classmethod
+    def _read_store(cls, file, header: Dict[str, Any]) -> CovidColumnStore:
+        """Lê as colunas de um store; extras categóricas voltam com dicionário e códigos prontos"""
+        rows = header['rows']
+        store = CovidColumnStore()
+        store.dates = cls._read_array(file, 'i', rows)
+        store.municipality_codes = cls._read_array(file, 'i', rows)
+        for field in CovidColumnStore.METRIC_FIELDS:
+            store.metrics[field] = cls._read_array(file, 'q', rows)
+
+        for name in header['municipalities']:
+            store.municipality_code(name)
+
+        store.extra_columns = list(header['extra_columns'])
+        for column, extra in zip(header['extra_columns'], header['extras']):
+            if 'categories' in extra:
+                codes = cls._read_array(file, extra['typecode'], rows)
+                store.extra_values[column] = CategoricalColumn.from_codes(extra['categories'], codes)
+            else:
+                blob = file.read(extra['size']).decode('utf-8')
+                store.extra_values[column] = blob.split('\x00') if rows else []
+        store.touch()
+        return store
+
+    @staticmethod
+    def _read_array(file, typecode: str, count: int) -> array:
+        """Lê um array tipado com a quantidade esperada de itens"""
+        values = array(typecode)
+        values.frombytes(file.read(count * values.itemsize))
+        if len(values) != count:
+            raise ValueError("entrada de cache truncada")
+        return values
+
+    def save(self, file_path: str, store: CovidColumnStore, original_columns: List[str],
+             column_mapping: Dict[str, str], fingerprint: Optional[Dict[str, Any]] = None,
+             state_store: Optional[CovidColumnStore] = None, feed: Optional[Dict[str, int]] = None) -> bool:
+        """Grava as colunas do store (e do store de linhas agregadas, se houver) como entrada do arquivo
+
+        Os stores devem estar já normalizados, para que uma leitura do cache não
+        precise repetir a normalização do feed.
+        """
+        try:
+            stores = [store] if state_store is None else [store, state_store]
+            store_headers, blobs = [], []
+            for item in stores:
+                store_header = self._store_header(item, blobs)
+                if store_header is None:
+                    return False  # Valores com NUL não podem ser separados de forma segura
+                store_headers.append(store_header)
+
+            header = {
+                'fingerprint': fingerprint or self.fingerprint(file_path),
+                'byteorder': sys.byteorder,
+                'stores': store_headers,
+                'original_columns': original_columns,
+                'column_mapping': column_mapping,
+                'feed': feed
+            }
+            header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entry_path = self._entry_path(file_path)
+            temp_path = f"{entry_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as file:
+                file.write(self.MAGIC)
+                file.write(len(header_bytes).to_bytes(8, 'little'))
+                file.write(header_bytes)
+                for item, item_blobs in zip(stores, blobs):
+                    file.write(item.dates.tobytes())
+                    file.write(item.municipality_codes.tobytes())
+                    for field in CovidColumnStore.METRIC_FIELDS:
+                        file.write(item.metrics[field].tobytes())
+                    for blob in item_blobs:
+                        file.write(blob)
+            os.replace(temp_path, entry_path)
+
+            self._evict()
+            return True
+
+        except OSError as e:
+            print(f"Erro ao gravar cache: {e}")
+            return False
+
+    @staticmethod
+    def _store_header(store: CovidColumnStore, blobs: List[List[bytes]]) -> Optional[Dict[str, Any]]:
+        """Descreve as colunas do store e acrescenta a blobs os bytes das extras; None se não couber"""
+        extras, store_blobs = [], []
+        for column in store.extra_columns:
+            values = store.extra_values[column]
+            if isinstance(values, CategoricalColumn):
+                # Dicionário no cabeçalho e códigos como array tipado
+                extras.append({'categories': values.categories, 'typecode': values.codes.typecode})
+                store_blobs.append(values.codes.tobytes())
                 continue
+            blob = '\x00'.join(values)
+            if values and blob.count('\x00') != len(values) - 1:
+                return None
+            store_blobs.append(blob.encode('utf-8'))
+            extras.append({'size': len(store_blobs[-1])})
+
+        blobs.append(store_blobs)
+        return {
+            'rows': len(store),
+            'municipalities': store.municipalities,
+            'extra_columns': store.extra_columns,
+            'extras': extras,
+        }
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """Lista as entradas como (último uso, tamanho, caminho)"""
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(self.FILE_SUFFIX):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        """Remove as entradas menos usadas até respeitar os limites de tamanho e quantidade"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        while entries and (total > self.max_bytes or len(entries) > self.max_entries):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
 
-        return len(self.data) > 0
+    def invalidate(self, file_path: str) -> bool:
+        """Remove a entrada de um arquivo específico"""
+        try:
+            os.remove(self._entry_path(file_path))
+            return True
+        except OSError:
+            return False
 
-    def _extract_covid_data(self, row_dict: Dict, type_to_column: Dict) -> Optional[CovidData]:
-        """Extrai dados COVID-19 de uma linha usando mapeamento flexível"""
+    def clear(self) -> int:
+        """Remove todas as entradas; retorna quantas foram apagadas"""
+        removed = 0
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+class FileProbe:
+    """Sondagem do início de um arquivo: codificação, delimitador e cabeçalho
+
+    Lê apenas um prefixo de tamanho fixo em bytes. A codificação é decidida pelo BOM,
+    depois por uma validação UTF-8 e, por fim, pelo fallback cp1252/latin1; o
+    delimitador e a presença de cabeçalho são detectados nas primeiras linhas do
+    mesmo prefixo. O resultado fica disponível para a interface sem reprocessar o arquivo.
+    Também localiza a última quebra de linha do arquivo: uma linha final ainda sem
+    quebra (arquivo em gravação) não é carregada e fica para append_from_file.
+    """
+
+    PREFIX_SIZE = 64 * 1024
+
+    # Tamanho dos blocos lidos do fim do arquivo ao procurar a última quebra de linha
+    TAIL_BLOCK_SIZE = 64 * 1024
+
+    DELIMITER_NAMES = {',': 'vírgula', ';': 'ponto e vírgula', '\t': 'tabulação', '|': 'pipe'}
+
+    def __init__(self, file_path: str, encoding: str, has_bom: bool, delimiter: str, has_header: bool,
+                 prefix_size: int, file_size: int, data_end: Optional[int] = None):
+        self.file_path = file_path
+        self.encoding = encoding
+        self.has_bom = has_bom
+        self.delimiter = delimiter
+        self.has_header = has_header
+        self.prefix_size = prefix_size
+        self.file_size = file_size
+        self.data_end = file_size if data_end is None else data_end
+
+    @property
+    def pending_bytes(self) -> int:
+        """Bytes da linha final incompleta, deixados para a próxima leitura incremental"""
+        return self.file_size - self.data_end
+
+    @classmethod
+    def from_file(cls, file_path: str, prefix_size: Optional[int] = None,
+                  report: Optional['LoadReport'] = None) -> 'FileProbe':
+        """Sonda o arquivo lendo apenas o prefixo em bytes"""
+        stage = report.stage if report is not None else contextlib.nullcontext
+        with stage('encoding'):
+            with open(file_path, 'rb') as file:
+                prefix = file.read(prefix_size or cls.PREFIX_SIZE)
+                file_size = os.fstat(file.fileno()).st_size
+                data_end = cls.complete_data_end(file, file_size)
+            complete = len(prefix) >= file_size
+
+            encoding, has_bom = cls.detect_encoding(prefix, complete)
+            text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(prefix, final=complete)
+
+            # Descarta a última linha se ela foi cortada pelo limite do prefixo
+            if not complete:
+                last_break = max(text.rfind('\n'), text.rfind('\r'))
+                if last_break >= 0:
+                    text = text[:last_break + 1]
+
+        with stage('delimiter'):
+            lines = list(itertools.islice(io.StringIO(text, newline=''), FlexibleCSVProcessor.SCHEMA_SAMPLE_ROWS))
+            delimiter = FlexibleCSVProcessor.detect_delimiter(''.join(lines))
+        with stage('header'):
+            first_row = next(csv.reader(lines, delimiter=delimiter), [])
+            has_header = FlexibleCSVProcessor._has_header_row(first_row)
+
+        return cls(file_path, encoding, has_bom, delimiter, has_header, len(prefix), file_size, data_end)
+
+    @classmethod
+    def complete_data_end(cls, file, size: int) -> int:
+        """Posição logo após a última quebra de linha do arquivo binário (0 se não houver)"""
+        end = size
+        while end > 0:
+            start = max(0, end - cls.TAIL_BLOCK_SIZE)
+            file.seek(start)
+            last_break = file.read(end - start).rfind(b'\n')
+            if last_break >= 0:
+                return start + last_break + 1
+            end = start
+        return 0
 
-        # Campos obrigatórios
-        date_col = type_to_column.get('date')
-        municipality_col = type_to_column.get('municipality')
+    @staticmethod
+    def detect_encoding(prefix: bytes, complete: bool = True) -> Tuple[str, bool]:
+        """Detecta a codificação do prefixo; retorna (codificação, possui BOM)"""
+        if prefix.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig', True
 
-        # Se não encontrou data e município pelos tipos, tenta pela posição
-        if not date_col or not municipality_col:
-            columns = [col for col in row_dict.keys() if col != '_column_mapping']
-            if len(columns) >= 2:
-                date_col = date_col or columns[0]  # Primeira coluna como data
-                municipality_col = municipality_col or columns[1]  # Segunda coluna como município
+        try:
+            # O prefixo pode terminar no meio de um caractere multibyte
+            codecs.getincrementaldecoder('utf-8')().decode(prefix, final=complete)
+            return 'utf-8', False
+        except UnicodeDecodeError:
+            pass
 
-        if not date_col or not municipality_col:
+        # Bytes 0x80-0x9F só têm caracteres imprimíveis no cp1252
+        if re.search(rb'[\x80-\x9f]', prefix):
+            try:
+                prefix.decode('cp1252')
+                return 'cp1252', False
+            except UnicodeDecodeError:
+                pass
+
+        return 'latin1', False
+
+    def fallback_encodings(self) -> List[str]:
+        """Codificações a tentar, em ordem, caso o restante do arquivo não decodifique"""
+        return [self.encoding] + [encoding for encoding in ('cp1252', 'latin1') if encoding != self.encoding]
+
+    def describe(self) -> List[str]:
+        """Linhas descritivas da sondagem para exibição"""
+        return [
+            f"Codificação: {self.encoding}" + (" (com BOM)" if self.has_bom else ""),
+            f"Delimitador: {self.DELIMITER_NAMES.get(self.delimiter, repr(self.delimiter))}",
+            f"Cabeçalho: {'sim' if self.has_header else 'não (colunas genéricas)'}",
+            f"Prefixo analisado: {self.prefix_size:,} de {self.file_size:,} bytes"
+        ] + ([f"Linha final incompleta: {self.pending_bytes:,} bytes aguardando a próxima leitura"]
+             if self.pending_bytes else [])
+
+
+class _BoundedReader(io.RawIOBase):
+    """Leitura binária de um arquivo que para em um limite de bytes"""
+
+    def __init__(self, file, limit: int):
+        self._file = file
+        self._remaining = limit
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._remaining <= 0:
+            return 0
+        with memoryview(buffer) as view:
+            read = self._file.readinto(view[:min(len(view), self._remaining)])
+        self._remaining -= read or 0
+        return read
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class LineIndex:
+    """Índice compacto de deslocamentos de linha sobre um arquivo mapeado em memória
+
+    O arquivo é aberto com mmap e os inícios de linha ficam em um array('Q'),
+    construído em uma única passagem. Com o índice é possível ler qualquer linha,
+    amostrar linhas espalhadas pelo arquivo e dividir o arquivo em faixas de bytes
+    alinhadas a linhas, sem copiar o conteúdo para strings Python. Só linhas
+    terminadas em quebra entram no índice; end marca o fim da última delas.
+    """
+
+    # Tamanho dos blocos varridos de uma vez ao procurar quebras de linha com NumPy
+    SCAN_BLOCK_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._file = open(file_path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+        self.offsets = self._build_offsets()
+        self.end = self.offsets[-1] if self.offsets else 0
+
+    def _build_offsets(self) -> array:
+        """Registra o início de cada linha e, por último, o fim da última linha completa"""
+        offsets = array('Q', [0]) if self.size else array('Q')
+        data, size = self._map, self.size
+
+        np = _get_numpy()
+        if np is not None and size:
+            for block_start in range(0, size, self.SCAN_BLOCK_SIZE):
+                block = np.frombuffer(data, dtype=np.uint8, count=min(self.SCAN_BLOCK_SIZE, size - block_start),
+                                      offset=block_start)
+                starts = np.flatnonzero(block == 10).astype(np.uint64) + np.uint64(block_start + 1)
+                offsets.frombytes(starts.tobytes())
+        else:
+            find = data.find
+            position = find(b'\n')
+            while position >= 0:
+                offsets.append(position + 1)
+                position = find(b'\n', position + 1)
+
+        # O último início registrado é o fim dos dados: o tamanho do arquivo, ou o
+        # início de uma linha final ainda sem quebra, que fica fora do índice
+        return offsets
+
+    def __len__(self) -> int:
+        return max(0, len(self.offsets) - 1)
+
+    def line(self, line_number: int) -> bytes:
+        """Bytes de uma linha, incluindo a quebra de linha"""
+        return self._map[self.offsets[line_number]:self.offsets[line_number + 1]]
+
+    def iter_lines(self, start: int = 0, stop: Optional[int] = None) -> Iterator[bytes]:
+        """Itera as linhas no intervalo, copiando uma linha de cada vez"""
+        data, offsets = self._map, self.offsets
+        stop = len(self) if stop is None else min(stop, len(self))
+        for line_number in range(start, stop):
+            yield data[offsets[line_number]:offsets[line_number + 1]]
+
+    def iter_blocks(self, start: int = 0, lines_per_block: int = 65536) -> Iterator[bytes]:
+        """Itera blocos de linhas inteiras, para decodificação em lote"""
+        data, offsets, total = self._map, self.offsets, len(self)
+        for block_start in range(start, total, lines_per_block):
+            block_stop = min(block_start + lines_per_block, total)
+            yield data[offsets[block_start]:offsets[block_stop]]
+
+    def sample_line_numbers(self, start: int, count: int) -> List[int]:
+        """Números de linha espalhados uniformemente a partir de start"""
+        total = len(self) - start
+        if total <= 0:
+            return []
+        if total <= count:
+            return list(range(start, len(self)))
+        step = total / count
+        return [start + int(i * step) for i in range(count)]
+
+    def byte_ranges(self, start_line: int, parts: int) -> List[Tuple[int, int]]:
+        """Divide as linhas a partir de start_line em até parts faixas de bytes alinhadas a linhas"""
+        total = len(self) - start_line
+        if total <= 0:
+            return []
+        parts = max(1, min(parts, total))
+        step = total / parts
+        bounds = [start_line + int(i * step) for i in range(parts)] + [len(self)]
+        return [(self.offsets[bounds[i]], self.offsets[bounds[i + 1]])
+                for i in range(parts) if bounds[i] < bounds[i + 1]]
+
+    def close(self):
+        """Libera o mapeamento e o arquivo"""
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> 'LineIndex':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AggregationKernel:
+    """Agregações sobre as colunas do store, calculadas de uma só vez
+
+    Com NumPy disponível, as colunas são lidas sem cópia (frombuffer) e reduzidas
+    de forma vetorizada. Sem NumPy, os totais usam sum/max nativos (que percorrem
+    os buffers em C) e os agrupamentos fazem uma única passada por todas as
+    colunas. O parâmetro positions restringe a agregação a um subconjunto de linhas.
+    """
+
+    SUM_FIELDS = ('new_cases', 'new_deaths', 'new_vaccinated')
+    MAX_FIELDS = ('accumulated_cases', 'accumulated_deaths', 'accumulated_vaccinated')
+
+    # Períodos e agregações aceitos por group_by
+    PERIODS = ('day', 'week', 'month', 'quarter', 'year')
+    AGGREGATIONS = ('sum', 'max', 'min', 'mean', 'last')
+
+    # Somas com bincount passam por float64, exato para inteiros até 2 ** 53
+    EXACT_FLOAT_SUM = 1 << 53
+
+    def __init__(self, store: CovidColumnStore, positions: Optional[Sequence[int]] = None,
+                 use_numpy: Optional[bool] = None):
+        self.store = store
+        self.positions = positions
+        np = _get_numpy() if use_numpy is not False else None
+        self.np = np if np is not None and len(store) else None
+
+    def __len__(self) -> int:
+        return len(self.store) if self.positions is None else len(self.positions)
+
+    def column(self, name: str):
+        """Coluna 'dates', 'municipality_codes' ou métrica, já restrita às posições"""
+        values = getattr(self.store, name) if name in ('dates', 'municipality_codes') else self.store.metrics[name]
+        positions = self.positions
+        if isinstance(positions, range) and positions.step == 1:
+            # Faixa contínua de linhas (ex.: lote recém-acrescentado): fatia direta
+            if self.np is not None or (positions.start, positions.stop) != (0, len(values)):
+                values = values[positions.start:positions.stop]
+            positions = None
+
+        if self.np is not None:
+            # dtype canônico (int32/int64): 'q' viraria longlong, que força o caminho lento do ufunc.at
+            column = self.np.frombuffer(values, dtype=self.np.dtype(f"i{values.itemsize}"))
+            return column if positions is None else column[self.np.asarray(positions, dtype=self.np.intp)]
+        if positions is None:
+            return values
+        return array(values.typecode, [values[i] for i in positions])
+
+    def municipality_codes(self) -> List[int]:
+        """Códigos distintos de município presentes nas linhas selecionadas"""
+        codes = self.column('municipality_codes')
+        if self.np is not None and len(codes):
+            present = self.np.bincount(codes, minlength=len(self.store.municipalities))
+            return self.np.flatnonzero(present).tolist()
+        return list(set(codes))
+
+    def per_municipality(self, field: str) -> Dict[int, int]:
+        """Total do campo por código de município (máximo para campos acumulados)"""
+        if not len(self):
+            return {}
+        codes = self.column('municipality_codes')
+        values = self.column(field)
+        use_max = field in self.MAX_FIELDS
+
+        np = self.np
+        if np is not None:
+            if use_max:
+                order = self._stable_order(codes, len(self.store.municipalities))
+                starts = self._run_starts(codes[order])
+                present = codes[order][starts]
+                totals = np.maximum.reduceat(values[order], starts)
+            else:
+                present = np.flatnonzero(np.bincount(codes, minlength=len(self.store.municipalities)))
+                totals = self._group_sums(codes, values, len(self.store.municipalities))[present]
+            return dict(zip(present.tolist(), totals.tolist()))
+
+        result: Dict[int, int] = {}
+        for code, value in zip(codes, values):
+            current = result.get(code)
+            if current is None:
+                result[code] = value
+            elif use_max:
+                if value > current:
+                    result[code] = value
+            else:
+                result[code] = current + value
+        return result
+
+    def totals(self, sum_fields: Sequence[str] = SUM_FIELDS,
+               max_fields: Sequence[str] = MAX_FIELDS) -> Dict[str, int]:
+        """Soma, máximo, municípios distintos e datas extremas das linhas selecionadas
+
+        Chaves: 'records', 'unique_municipalities', 'first_date' e 'last_date'
+        (ordinais, ou None sem linhas), além de um total por campo somado e um
+        'max_<campo>' por campo de máximo.
+        """
+        result: Dict[str, Any] = {'records': len(self)}
+        if not len(self):
+            result.update(unique_municipalities=0, first_date=None, last_date=None)
+            result.update({field: 0 for field in sum_fields})
+            result.update({f"max_{field}": 0 for field in max_fields})
+            return result
+
+        np = self.np
+        dates = self.column('dates')
+        codes = self.column('municipality_codes')
+        if np is not None:
+            present = np.bincount(codes, minlength=len(self.store.municipalities))
+            result['unique_municipalities'] = int(np.count_nonzero(present))
+            result['first_date'] = int(dates.min())
+            result['last_date'] = int(dates.max())
+            for field in sum_fields:
+                result[field] = int(self.column(field).sum())
+            for field in max_fields:
+                result[f"max_{field}"] = max(int(self.column(field).max()), 0)
+        else:
+            result['unique_municipalities'] = len(set(codes))
+            result['first_date'] = min(dates)
+            result['last_date'] = max(dates)
+            for field in sum_fields:
+                result[field] = sum(self.column(field))
+            for field in max_fields:
+                result[f"max_{field}"] = max(max(self.column(field)), 0)
+        return result
+
+    def grouped(self, key_for_ordinal, sum_fields: Sequence[str] = SUM_FIELDS,
+                max_fields: Sequence[str] = MAX_FIELDS) -> Dict[Any, Dict[str, int]]:
+        """Agrupa as linhas pela chave derivada da data (ex.: mês) e agrega cada grupo
+
+        key_for_ordinal recebe o ordinal da data e é chamado uma vez por data
+        distinta. Os grupos aparecem na ordem da primeira linha de cada um; cada
+        grupo tem um total por campo somado e um 'max_<campo>' por campo de máximo
+        (começando em 0).
+        """
+        if not len(self):
+            return {}
+        if self.np is not None:
+            return self._grouped_numpy(key_for_ordinal, sum_fields, max_fields)
+
+        dates = self.column('dates')
+        sum_columns = [self.column(field) for field in sum_fields]
+        max_columns = [self.column(field) for field in max_fields]
+        offset = len(sum_fields)
+        sum_range = range(offset)
+        max_range = range(len(max_fields))
+
+        # Acumuladores por grupo em listas: [somas..., máximos...]
+        group_of_ordinal: Dict[int, List[int]] = {}
+        groups: Dict[Any, List[int]] = {}
+        for values in zip(dates, *sum_columns, *max_columns):
+            ordinal = values[0]
+            totals = group_of_ordinal.get(ordinal)
+            if totals is None:
+                key = key_for_ordinal(ordinal)
+                totals = groups.get(key)
+                if totals is None:
+                    totals = groups[key] = [0] * (offset + len(max_fields))
+                group_of_ordinal[ordinal] = totals
+            for i in sum_range:
+                totals[i] += values[1 + i]
+            for i in max_range:
+                value = values[1 + offset + i]
+                if value > totals[offset + i]:
+                    totals[offset + i] = value
+
+        return {key: self._group_dict(totals, sum_fields, max_fields) for key, totals in groups.items()}
+
+    def _grouped_numpy(self, key_for_ordinal, sum_fields: Sequence[str],
+                       max_fields: Sequence[str]) -> Dict[Any, Dict[str, int]]:
+        """Versão vetorizada de grouped (bincount para somas, reduceat para máximos)"""
+        np = self.np
+        dates = self.column('dates')
+
+        # Linhas ordenadas por data (ordenação estável): o início de cada sequência
+        # dá a data distinta e a primeira linha em que ela aparece
+        first_ordinal = int(dates.min())
+        offsets = (dates - first_ordinal).astype(np.intp)
+        order = self._stable_order(offsets, int(offsets.max()) + 1)
+        starts = self._run_starts(offsets[order])
+        present = offsets[order][starts]
+
+        # Chave por data distinta; grupos ordenados pela primeira linha em que aparecem
+        group_first: Dict[Any, int] = {}
+        ordinal_keys = []
+        for offset, first_row in zip(present.tolist(), order[starts].tolist()):
+            key = key_for_ordinal(first_ordinal + offset)
+            ordinal_keys.append(key)
+            if key not in group_first or first_row < group_first[key]:
+                group_first[key] = first_row
+        keys = sorted(group_first, key=group_first.__getitem__)
+        group_index = {key: i for i, key in enumerate(keys)}
+        date_groups = np.array([group_index[key] for key in ordinal_keys], dtype=np.intp)
+
+        columns = []
+        if sum_fields:
+            group_of_offset = np.zeros(int(present[-1]) + 1, dtype=np.intp)
+            group_of_offset[present] = date_groups
+            row_groups = group_of_offset[offsets]
+            for field in sum_fields:
+                columns.append(self._group_sums(row_groups, self.column(field), len(keys)).tolist())
+        if max_fields:
+            # Máximo por data sobre as linhas ordenadas e, depois, por grupo sobre as datas
+            group_order = self._stable_order(date_groups, len(keys))
+            group_starts = self._run_starts(date_groups[group_order])
+            for field in max_fields:
+                date_maxima = np.maximum.reduceat(self.column(field)[order], starts)
+                # Os máximos de cada grupo começam em 0
+                maxima = np.maximum(np.maximum.reduceat(date_maxima[group_order], group_starts), 0)
+                columns.append(maxima.tolist())
+
+        return {key: self._group_dict([column[i] for column in columns], sum_fields, max_fields)
+                for i, key in enumerate(keys)}
+
+    @staticmethod
+    def period_code(ordinal: int, period: str) -> int:
+        """Código inteiro do período que contém a data; cresce em ordem cronológica
+
+        day: o próprio ordinal; week: ordinal da segunda-feira da semana ISO;
+        month: ano * 12 + mês - 1; quarter: ano * 4 + trimestre - 1; year: o ano.
+        """
+        if period == 'day':
+            return ordinal
+        if period == 'week':
+            # O ordinal 1 (01/01/0001) é uma segunda-feira
+            return ordinal - (ordinal - 1) % 7
+        day = date.fromordinal(ordinal)
+        if period == 'month':
+            return day.year * 12 + day.month - 1
+        if period == 'quarter':
+            return day.year * 4 + (day.month - 1) // 3
+        if period == 'year':
+            return day.year
+        raise ValueError(f"Período desconhecido: {period}")
+
+    @staticmethod
+    def period_label(code: int, period: str) -> str:
+        """Rótulo legível de um código de período (ex.: 03/2021, 2021-S05, T1/2021)"""
+        if period == 'day':
+            return date.fromordinal(code).strftime('%d/%m/%Y')
+        if period == 'week':
+            iso_year, iso_week, _ = date.fromordinal(code).isocalendar()
+            return f"{iso_year}-S{iso_week:02d}"
+        if period == 'month':
+            return f"{code % 12 + 1:02d}/{code // 12}"
+        if period == 'quarter':
+            return f"T{code % 4 + 1}/{code // 4}"
+        if period == 'year':
+            return str(code)
+        raise ValueError(f"Período desconhecido: {period}")
+
+    def group_by(self, period: str = 'month', metrics: Sequence[str] = SUM_FIELDS,
+                 aggregations: Sequence[str] = ('sum',), by_municipality: bool = False) -> List[Dict[str, Any]]:
+        """Agrupa as linhas por período (e opcionalmente por município)
+
+        Cada grupo vira um dicionário com 'period', 'period_code', 'records',
+        'municipality' (quando by_municipality) e uma chave '<métrica>_<agregação>'
+        por combinação pedida. 'last' é o valor da linha de data mais recente do
+        grupo (em empate, a última linha). Os grupos saem em ordem cronológica e,
+        dentro do período, por nome de município.
+        """
+        if period not in self.PERIODS:
+            raise ValueError(f"Período desconhecido: {period}")
+        for aggregation in aggregations:
+            if aggregation not in self.AGGREGATIONS:
+                raise ValueError(f"Agregação desconhecida: {aggregation}")
+        for metric in metrics:
+            if metric not in CovidColumnStore.METRIC_FIELDS:
+                raise ValueError(f"Métrica desconhecida: {metric}")
+        if not len(self):
+            return []
+
+        if self.np is not None:
+            groups = self._group_by_numpy(period, metrics, aggregations, by_municipality)
+        else:
+            groups = self._group_by_python(period, metrics, aggregations, by_municipality)
+
+        names = self.store.municipalities
+        result = []
+        for (period_code, municipality_code), (records, values) in groups.items():
+            row: Dict[str, Any] = {'period': self.period_label(period_code, period), 'period_code': period_code}
+            if by_municipality:
+                row['municipality'] = names[municipality_code]
+            row['records'] = records
+            row.update(values)
+            result.append(row)
+        result.sort(key=lambda row: (row['period_code'], row.get('municipality', '')))
+        return result
+
+    def _group_by_python(self, period: str, metrics: Sequence[str], aggregations: Sequence[str],
+                         by_municipality: bool) -> Dict[Tuple[int, int], Tuple[int, Dict[str, Any]]]:
+        """group_by em uma única passada Python sobre as colunas"""
+        dates = self.column('dates')
+        codes = self.column('municipality_codes') if by_municipality else itertools.repeat(0)
+        columns = [self.column(metric) for metric in metrics]
+        period_of_ordinal: Dict[int, int] = {}
+        period_code = self.period_code
+
+        # Estado por grupo: [linhas, data mais recente, somas, máximos, mínimos, últimos valores]
+        states: Dict[Tuple[int, int], list] = {}
+        for ordinal, code, *values in zip(dates, codes, *columns):
+            period_key = period_of_ordinal.get(ordinal)
+            if period_key is None:
+                period_key = period_of_ordinal[ordinal] = period_code(ordinal, period)
+            key = (period_key, code)
+            state = states.get(key)
+            if state is None:
+                states[key] = [1, ordinal, list(values), list(values), list(values), values]
+                continue
+
+            state[0] += 1
+            sums, maxima, minima = state[2], state[3], state[4]
+            for i, value in enumerate(values):
+                sums[i] += value
+                if value > maxima[i]:
+                    maxima[i] = value
+                elif value < minima[i]:
+                    minima[i] = value
+            if ordinal >= state[1]:
+                state[1] = ordinal
+                state[5] = values
+
+        groups = {}
+        for key, (records, _, sums, maxima, minima, last) in states.items():
+            computed = {'sum': sums, 'max': maxima, 'min': minima, 'last': last,
+                        'mean': [total / records for total in sums]}
+            groups[key] = (records, {f"{metric}_{aggregation}": computed[aggregation][i]
+                                     for i, metric in enumerate(metrics) for aggregation in aggregations})
+        return groups
+
+    def _group_by_numpy(self, period: str, metrics: Sequence[str], aggregations: Sequence[str],
+                        by_municipality: bool) -> Dict[Tuple[int, int], Tuple[int, Dict[str, Any]]]:
+        """group_by vetorizado: códigos de grupo inteiros, bincount para somas e reduceat para o resto"""
+        np = self.np
+        dates = self.column('dates')
+
+        # Código de período calculado uma vez por data distinta
+        first_ordinal = int(dates.min())
+        offsets = (dates - first_ordinal).astype(np.intp)
+        present = np.flatnonzero(np.bincount(offsets))
+        period_of_offset = np.zeros(int(offsets.max()) + 1, dtype=np.int64)
+        period_of_offset[present] = [self.period_code(first_ordinal + offset, period)
+                                     for offset in present.tolist()]
+        period_codes = np.unique(period_of_offset[present])
+        group = np.searchsorted(period_codes, period_of_offset[offsets])
+
+        municipality_count = len(self.store.municipalities) if by_municipality else 1
+        if by_municipality:
+            group = group * municipality_count + self.column('municipality_codes')
+        group_count = len(period_codes) * municipality_count
+        counts = np.bincount(group, minlength=group_count)
+        groups = np.flatnonzero(counts)
+
+        if not set(aggregations).isdisjoint(('max', 'min', 'last')):
+            # Linhas ordenadas por grupo: uma sequência por grupo presente, na ordem de groups
+            order = self._stable_order(group, group_count)
+            starts = self._run_starts(group[order])
+
+        if 'last' in aggregations:
+            # Linha de data mais recente de cada grupo (em empate, a última)
+            latest = np.zeros(group_count, dtype=np.int64)
+            latest[groups] = np.maximum.reduceat(dates[order], starts)
+            is_latest = dates == latest[group]
+            last_row = np.maximum.reduceat(np.where(is_latest[order], order, -1), starts)
+
+        values: Dict[str, List[Any]] = {}
+        for metric in metrics:
+            column = self.column(metric)
+            totals = None
+            for aggregation in aggregations:
+                if aggregation in ('sum', 'mean'):
+                    if totals is None:
+                        totals = self._group_sums(group, column, group_count)[groups]
+                    result = totals / counts[groups] if aggregation == 'mean' else totals
+                elif aggregation == 'max':
+                    result = np.maximum.reduceat(column[order], starts)
+                elif aggregation == 'min':
+                    result = np.minimum.reduceat(column[order], starts)
+                else:
+                    result = column[last_row]
+                values[f"{metric}_{aggregation}"] = result.tolist()
+
+        keys = [(int(period_codes[g // municipality_count]), int(g % municipality_count) if by_municipality else 0)
+                for g in groups.tolist()]
+        record_counts = counts[groups].tolist()
+        return {key: (record_counts[i], {name: column[i] for name, column in values.items()})
+                for i, key in enumerate(keys)}
+
+    def _stable_order(self, codes, code_count: int):
+        """Ordenação estável de códigos em [0, code_count) (NumPy)
+
+        Com até 65536 códigos, ordena como uint16, caso em que o NumPy usa radix
+        sort, linear no número de linhas.
+        """
+        np = self.np
+        if code_count <= 1 << 16:
+            codes = codes.astype(np.uint16)
+        return np.argsort(codes, kind='stable')
+
+    def _run_starts(self, sorted_codes):
+        """Início de cada sequência de códigos iguais em um vetor ordenado (NumPy)"""
+        np = self.np
+        if not len(sorted_codes):
+            return np.zeros(0, dtype=np.intp)
+        return np.flatnonzero(np.concatenate(([True], sorted_codes[1:] != sorted_codes[:-1])))
+
+    def _group_sums(self, codes, column, group_count: int):
+        """Soma da coluna por código de grupo (NumPy)
+
+        Usa bincount com pesos; se a soma puder passar do limite exato do float64,
+        recorre a np.add.at, exato em int64.
+        """
+        np = self.np
+        if not len(column) or int(np.abs(column).max()) * len(column) < self.EXACT_FLOAT_SUM:
+            return np.bincount(codes, weights=column, minlength=group_count).astype(np.int64)
+        totals = np.zeros(group_count, dtype=np.int64)
+        np.add.at(totals, codes, column)
+        return totals
+
+    @staticmethod
+    def _group_dict(totals: Sequence[int], sum_fields: Sequence[str],
+                    max_fields: Sequence[str]) -> Dict[str, int]:
+        group = dict(zip(sum_fields, totals))
+        group.update((f"max_{field}", value) for field, value in zip(max_fields, totals[len(sum_fields):]))
+        return group
+
+
+class MunicipalityIndex:
+    """Índice das linhas de cada município
+
+    Para cada código de município guarda as posições das suas linhas em ordem
+    crescente (array 'q'), de modo que consultas por município percorram só as
+    linhas necessárias. Como os agregados incrementais, o índice acompanha linhas
+    acrescentadas e é refeito quando o store muda de geração.
+    """
+
+    def __init__(self):
+        self.store: Optional[CovidColumnStore] = None
+        self.generation: Optional[int] = None
+        self.rows = 0
+        self.positions: List[array] = []
+
+    def refresh(self, store: CovidColumnStore) -> 'MunicipalityIndex':
+        """Indexa as linhas do store ainda não indexadas"""
+        if store is not self.store or store.generation != self.generation or len(store) < self.rows:
+            self.__init__()
+            self.store = store
+            self.generation = store.generation
+
+        positions = self.positions
+        while len(positions) < len(store.municipalities):
+            positions.append(array('q'))
+
+        if len(store) > self.rows:
+            np = _get_numpy()
+            if np is not None:
+                codes = np.frombuffer(store.municipality_codes, dtype=np.dtype(
+                    f"i{store.municipality_codes.itemsize}"))[self.rows:len(store)]
+                order = np.argsort(codes, kind='stable').astype(np.int64) + self.rows
+                counts = np.bincount(codes, minlength=len(positions))
+                for code, rows in enumerate(np.split(order, np.cumsum(counts)[:-1])):
+                    if len(rows):
+                        positions[code].frombytes(rows.tobytes())
+            else:
+                codes = store.municipality_codes
+                for row in range(self.rows, len(store)):
+                    positions[codes[row]].append(row)
+            self.rows = len(store)
+        return self
+
+    def rows_for(self, municipality: str) -> Optional[array]:
+        """Posições das linhas do município, ou None se ele não estiver no store"""
+        code = self.store.find_municipality(municipality) if self.store is not None else None
+        if code is None or not self.positions[code]:
             return None
+        return self.positions[code]
+
+    def names(self) -> List[str]:
+        """Municípios com pelo menos uma linha, em ordem alfabética"""
+        if self.store is None:
+            return []
+        return sorted(name for name, rows in zip(self.store.municipalities, self.positions) if rows)
 
-        date_value = row_dict.get(date_col, '')
-        municipality_value = row_dict.get(municipality_col, '')
 
-        if not date_value or not municipality_value:
+class DateIndex:
+    """Linhas do store ordenadas por data, com somas prefixadas
+
+    Guarda as posições das linhas em ordem de data (ordenação estável), as datas
+    ordenadas e, para cada campo somado, a soma acumulada até cada posição: o
+    total de um intervalo de datas custa duas buscas binárias e uma subtração.
+    Linhas acrescentadas com datas a partir da última indexada entram em O(lote);
+    fora de ordem, o índice é refeito. O store em si não é reordenado.
+    """
+
+    SUM_FIELDS = AggregationKernel.SUM_FIELDS
+
+    def __init__(self):
+        self.store: Optional[CovidColumnStore] = None
+        self.generation: Optional[int] = None
+        self.rows = 0
+        self.order = array('q')
+        self.dates = array('i')
+        self.prefix: Dict[str, array] = {field: array('q', [0]) for field in self.SUM_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def refresh(self, store: CovidColumnStore, positions: Optional[array] = None) -> 'DateIndex':
+        """Indexa as linhas novas do store (ou só as de positions, em ordem crescente)"""
+        if store is not self.store or store.generation != self.generation or len(store) < self.rows:
+            self.__init__()
+            self.store = store
+            self.generation = store.generation
+
+        if len(store) > self.rows:
+            rows = self._rows_from(store, positions, self.rows)
+            if len(rows) and len(self.dates) and min(store.dates[row] for row in rows) < self.dates[-1]:
+                # Datas fora de ordem: refaz o índice inteiro
+                self.__init__()
+                self.store = store
+                self.generation = store.generation
+                rows = self._rows_from(store, positions, 0)
+            self._append_sorted(store, rows)
+            self.rows = len(store)
+        return self
+
+    @staticmethod
+    def _rows_from(store: CovidColumnStore, positions: Optional[array], start: int) -> Sequence[int]:
+        """Linhas a partir de start, restritas a positions quando informado"""
+        if positions is None:
+            return range(start, len(store))
+        return positions[bisect.bisect_left(positions, start):]
+
+    def _append_sorted(self, store: CovidColumnStore, rows: Sequence[int]):
+        """Acrescenta as linhas, ordenadas por data, ao fim do índice"""
+        if not len(rows):
+            return
+
+        np = _get_numpy()
+        if np is not None:
+            rows = np.asarray(rows, dtype=np.int64)
+            dates = np.frombuffer(store.dates, dtype=np.dtype(f"i{store.dates.itemsize}"))[rows]
+            sort = np.argsort(dates, kind='stable')
+            self.order.frombytes(rows[sort].tobytes())
+            self.dates.frombytes(dates[sort].astype(np.dtype(f"i{self.dates.itemsize}")).tobytes())
+            for field in self.SUM_FIELDS:
+                values = np.frombuffer(store.metrics[field], dtype=np.int64)[rows[sort]]
+                self.prefix[field].frombytes((np.cumsum(values) + self.prefix[field][-1]).tobytes())
+            return
+
+        dates = store.dates
+        rows = sorted(rows, key=dates.__getitem__)
+        self.order.extend(rows)
+        self.dates.extend(dates[row] for row in rows)
+        for field in self.SUM_FIELDS:
+            values = store.metrics[field]
+            prefix = self.prefix[field]
+            # accumulate repete o valor inicial, que já está no fim do prefixo
+            running = itertools.accumulate((values[row] for row in rows), initial=prefix[-1])
+            prefix.extend(itertools.islice(running, 1, None))
+
+    def bounds(self, start: Optional[int] = None, end: Optional[int] = None) -> Tuple[int, int]:
+        """Faixa [lo, hi) do índice com datas entre start e end (ordinais, inclusivos)"""
+        lo = 0 if start is None else bisect.bisect_left(self.dates, start)
+        hi = len(self.dates) if end is None else bisect.bisect_right(self.dates, end)
+        return lo, max(lo, hi)
+
+    def range_totals(self, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, Any]:
+        """Quantidade de linhas, datas extremas e somas de um intervalo de datas"""
+        lo, hi = self.bounds(start, end)
+        result: Dict[str, Any] = {
+            'records': hi - lo,
+            'first_date': self.dates[lo] if hi > lo else None,
+            'last_date': self.dates[hi - 1] if hi > lo else None,
+        }
+        for field in self.SUM_FIELDS:
+            prefix = self.prefix[field]
+            result[field] = prefix[hi] - prefix[lo]
+        return result
+
+    def positions(self, start: Optional[int] = None, end: Optional[int] = None) -> array:
+        """Posições das linhas do intervalo, em ordem de data"""
+        lo, hi = self.bounds(start, end)
+        return self.order[lo:hi]
+
+
+class RollingMetrics:
+    """Métricas epidemiológicas em janelas móveis sobre uma série diária
+
+    A série é contínua (dias sem registro valem 0) e guarda as somas prefixadas
+    dos valores diários: a soma de qualquer janela sai em O(1), por subtração,
+    sem somar a janela de novo. Dias sem histórico suficiente ficam como None.
+    """
+
+    # Intervalo serial aproximado da COVID-19, usado na razão tipo Rt
+    SERIAL_INTERVAL_DAYS = 4
+
+    # Séries disponíveis em series(): nome -> método
+    SERIES = {
+        'moving_average_7': lambda metrics: metrics.moving_average(7),
+        'moving_average_14': lambda metrics: metrics.moving_average(14),
+        'week_over_week_growth': lambda metrics: metrics.week_over_week_growth(),
+        'doubling_time': lambda metrics: metrics.doubling_time(),
+        'rt_ratio': lambda metrics: metrics.rt_ratio(),
+    }
+
+    def __init__(self, first_ordinal: int, daily: Sequence[int]):
+        self.first_ordinal = first_ordinal
+        self.daily = list(daily)
+        self.prefix = list(itertools.accumulate(self.daily, initial=0))
+
+    @classmethod
+    def from_days(cls, ordinals: Sequence[int], values: Sequence[int]) -> 'RollingMetrics':
+        """Monta a série contínua a partir de (data, valor) em ordem cronológica"""
+        first_ordinal = ordinals[0]
+        daily = [0] * (ordinals[-1] - first_ordinal + 1)
+        for ordinal, value in zip(ordinals, values):
+            daily[ordinal - first_ordinal] += value
+        return cls(first_ordinal, daily)
+
+    def __len__(self) -> int:
+        return len(self.daily)
+
+    def window_sum(self, day: int, window: int) -> Optional[int]:
+        """Soma dos window dias terminados no dia de índice day (None sem histórico)"""
+        if day < 0 or day + 1 < window:
             return None
+        return self.prefix[day + 1] - self.prefix[day + 1 - window]
+
+    def moving_average(self, window: int = 7) -> List[Optional[float]]:
+        """Média móvel de window dias"""
+        return [None if total is None else total / window
+                for total in (self.window_sum(day, window) for day in range(len(self)))]
+
+    def week_over_week_growth(self) -> List[Optional[float]]:
+        """Variação percentual da soma dos últimos 7 dias sobre os 7 anteriores"""
+        result = []
+        for day in range(len(self)):
+            current, previous = self.window_sum(day, 7), self.window_sum(day - 7, 7)
+            result.append(None if not previous else (current / previous - 1) * 100)
+        return result
+
+    def doubling_time(self, window: int = 7) -> List[Optional[float]]:
+        """Dias para o total acumulado dobrar, no ritmo dos últimos window dias
+
+        Só é definido enquanto o total cresce (sem crescimento, não dobra).
+        """
+        result = []
+        for day in range(len(self)):
+            current = self.prefix[day + 1]
+            previous = self.prefix[day + 1 - window] if day + 1 >= window else 0
+            if previous > 0 and current > previous:
+                result.append(window * math.log(2) / math.log(current / previous))
+            else:
+                result.append(None)
+        return result
+
+    def rt_ratio(self) -> List[Optional[float]]:
+        """Razão tipo Rt: soma de 7 dias sobre a soma de 7 dias um intervalo serial antes"""
+        result = []
+        for day in range(len(self)):
+            current = self.window_sum(day, 7)
+            previous = self.window_sum(day - self.SERIAL_INTERVAL_DAYS, 7)
+            result.append(None if not previous else current / previous)
+        return result
+
+    def series(self, name: str, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, float]:
+        """Série nomeada (veja SERIES) por data 'DD/MM/YYYY', sem os dias indefinidos
+
+        start e end (ordinais, inclusivos) recortam a série depois do cálculo,
+        de modo que as primeiras janelas do recorte usam os dias anteriores a ele.
+        """
+        if name not in self.SERIES:
+            raise ValueError(f"Série desconhecida: {name}")
+        values = self.SERIES[name](self)
+        first = 0 if start is None else max(0, start - self.first_ordinal)
+        last = len(self) if end is None else min(len(self), end - self.first_ordinal + 1)
+        return {date.fromordinal(self.first_ordinal + day).strftime('%d/%m/%Y'): values[day]
+                for day in range(first, last) if values[day] is not None}
+
+
+class RunningAggregates:
+    """Estatísticas e grupos por data mantidos de forma incremental
+
+    Linhas acrescentadas ao store são agregadas em O(lote) pelo AggregationKernel
+    e somadas aos acumuladores. Um store diferente, menor ou de outra geração
+    (linhas alteradas ou removidas) provoca o recálculo completo.
+    """
+
+    def __init__(self, key_for_ordinal):
+        self.key_for_ordinal = key_for_ordinal
+        self.reset()
+
+    def reset(self):
+        """Descarta os acumuladores"""
+        self.store: Optional[CovidColumnStore] = None
+        self.generation: Optional[int] = None
+        self.rows = 0
+        self.totals: Dict[str, Any] = AggregationKernel(CovidColumnStore()).totals()
+        self.municipality_codes: set = set()
+        self.groups: Dict[Any, Dict[str, int]] = {}
+
+    def refresh(self, store: CovidColumnStore) -> 'RunningAggregates':
+        """Atualiza os acumuladores com as linhas do store ainda não agregadas"""
+        if store is not self.store or store.generation != self.generation or len(store) < self.rows:
+            self.reset()
+            self.store = store
+            self.generation = store.generation
+
+        if len(store) > self.rows:
+            self._add(AggregationKernel(store, range(self.rows, len(store))))
+            self.rows = len(store)
+        return self
+
+    def _add(self, kernel: AggregationKernel):
+        """Soma um lote de linhas aos acumuladores"""
+        batch = kernel.totals()
+        totals = self.totals
+        for field, value in batch.items():
+            if field in ('unique_municipalities', 'first_date', 'last_date'):
+                continue
+            if field.startswith('max_'):
+                totals[field] = max(totals[field], value)
+            else:
+                totals[field] += value
 
-        # Campos opcionais
-        kwargs = {
-            'new_cases': self._safe_get_numeric(row_dict, type_to_column.get('new_cases')),
-            'new_deaths': self._safe_get_numeric(row_dict, type_to_column.get('new_deaths')),
-            'new_vaccinated': self._safe_get_numeric(row_dict, type_to_column.get('new_vaccinated')),
-            'accumulated_cases': self._safe_get_numeric(row_dict, type_to_column.get('accumulated_cases')),
-            'accumulated_deaths': self._safe_get_numeric(row_dict, type_to_column.get('accumulated_deaths')),
-            'accumulated_vaccinated': self._safe_get_numeric(row_dict, type_to_column.get('accumulated_vaccinated'))
+        if totals['first_date'] is None or batch['first_date'] < totals['first_date']:
+            totals['first_date'] = batch['first_date']
+        if totals['last_date'] is None or batch['last_date'] > totals['last_date']:
+            totals['last_date'] = batch['last_date']
+
+        self.municipality_codes.update(kernel.municipality_codes())
+        totals['unique_municipalities'] = len(self.municipality_codes)
+
+        # Grupos novos entram no fim, preservando a ordem de primeira aparição
+        for key, batch_group in kernel.grouped(self.key_for_ordinal).items():
+            group = self.groups.get(key)
+            if group is None:
+                self.groups[key] = batch_group
+                continue
+            for field, value in batch_group.items():
+                group[field] = max(group[field], value) if field.startswith('max_') else group[field] + value
+
+
+class _IntegerStrings(dict):
+    """Textos de inteiros formatados sob demanda; métricas repetem muitos valores"""
+
+    def __missing__(self, value: int) -> str:
+        text = self[value] = str(value)
+        return text
+
+
+class LoadReport:
+    """Relatório de instrumentação de uma carga de dados
+
+    Acumula o tempo de parede de cada etapa do pipeline (sondagem do arquivo,
+    detecção de estrutura, leitura, conversão de datas e métricas, montagem do
+    store, normalização e cache), o total de linhas, o pico de memória medido
+    com tracemalloc (opcional, pois deixa a carga bem mais lenta) e contadores
+    dos caminhos de fallback tomados durante a conversão.
+    """
+
+    # Rótulos das etapas, na ordem em que aparecem no pipeline
+    STAGE_LABELS = {
+        'encoding': 'Detecção de codificação',
+        'delimiter': 'Detecção de delimitador',
+        'header': 'Detecção de cabeçalho',
+        'cache_load': 'Leitura do cache',
+        'line_index': 'Índice de linhas (mmap)',
+        'schema': 'Estrutura e tipos de coluna',
+        'read': 'Leitura e parsing CSV',
+        'dates': 'Conversão de datas',
+        'metrics': 'Conversão de métricas',
+        'extras': 'Colunas extras',
+        'row_fallback': 'Reprocessamento linha a linha',
+        'store': 'Montagem do store',
+        'parallel': 'Processamento paralelo',
+        'normalize': 'Normalização do feed',
+        'cache_save': 'Gravação do cache',
+    }
+    COUNTER_LABELS = {
+        'rows_read': 'Linhas lidas',
+        'skipped_rows': 'Linhas descartadas (sem data ou município)',
+        'encoding_retries': 'Trocas de codificação',
+        'date_fallbacks': 'Datas fora do formato detectado (busca completa)',
+        'numeric_fallbacks': 'Números não convertidos diretamente',
+        'row_fallback_rows': 'Linhas reprocessadas individualmente',
+        'aggregate_rows': 'Linhas agregadas separadas',
+        'corrections': 'Correções de acumulado',
+    }
+
+    def __init__(self, source: Optional[str] = None, trace_memory: bool = False):
+        self.source = source
+        self.trace_memory = trace_memory
+        self.mode: Optional[str] = None
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.rows = 0
+        self.total_seconds = 0.0
+        self.peak_memory: Optional[int] = None
+        self._started_tracing = False
+        self._start = 0.0
+
+    def __enter__(self) -> 'LoadReport':
+        if self.trace_memory:
+            # Importado só aqui: o rastreamento é opcional e o módulo puxa outros
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.total_seconds += time.perf_counter() - self._start
+        if self.trace_memory:
+            import tracemalloc
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+        return False
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Soma ao tempo da etapa o tempo gasto dentro do bloco"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name: str, amount: int = 1):
+        """Incrementa um contador de fallback"""
+        if amount:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_plan_counters(self, plan: 'ExtractionPlan'):
+        """Recolhe os contadores de fallback acumulados pelo plano de extração"""
+        self.count('date_fallbacks', plan.date_parser.fallback_count)
+        self.count('numeric_fallbacks', sum(converter.fallback_count
+                                            for converter in plan._column_converters.values()))
+
+    @property
+    def rows_per_second(self) -> float:
+        """Linhas carregadas por segundo no tempo total da carga"""
+        return self.rows / self.total_seconds if self.total_seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representação serializável do relatório"""
+        return {
+            'source': self.source,
+            'mode': self.mode,
+            'rows': self.rows,
+            'total_seconds': round(self.total_seconds, 6),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'peak_memory': self.peak_memory,
+            'stages': {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            'counters': dict(self.counters),
         }
 
-        # Se não encontrou campos específicos, tenta inferir pela posição
-        if all(v == 0 for v in kwargs.values()):
-            columns = [col for col in row_dict.keys() if col != '_column_mapping']
-            if len(columns) >= 3:
-                # Assume ordem padrão após data e município
-                for i, field in enumerate(['new_cases', 'new_deaths', 'new_vaccinated',
-                                           'accumulated_cases', 'accumulated_deaths', 'accumulated_vaccinated']):
-                    if i + 2 < len(columns):
-                        kwargs[field] = self._safe_get_numeric(row_dict, columns[i + 2])
-
-        # Adiciona campos extras
-        extra_fields = {}
-        for col, value in row_dict.items():
-            if col not in [date_col, municipality_col] and col != '_column_mapping':
-                col_type = type_to_column.get(col)
-                if not col_type or col_type not in ['new_cases', 'new_deaths', 'new_vaccinated',
-                                                    'accumulated_cases', 'accumulated_deaths',
-                                                    'accumulated_vaccinated']:
-                    extra_fields[col] = value
-
-        kwargs.update(extra_fields)
-
-        return CovidData(date_value, municipality_value, **kwargs)
-
-    def _safe_get_numeric(self, row_dict: Dict, column: str) -> int:
-        """Obtém valor numérico de forma segura"""
-        if not column or column not in row_dict:
-            return 0
+    def describe(self) -> List[str]:
+        """Linhas descritivas do relatório para exibição"""
+        lines = [
+            f"Modo: {self.mode or 'desconhecido'}",
+            f"Linhas: {self.rows:,} em {self.total_seconds:.3f} s ({self.rows_per_second:,.0f} linhas/s)",
+        ]
+        if self.peak_memory is not None:
+            lines.append(f"Pico de memória (tracemalloc): {self.peak_memory / (1024 * 1024):.1f} MB")
+
+        ordered = [name for name in self.STAGE_LABELS if name in self.stages]
+        ordered += [name for name in self.stages if name not in self.STAGE_LABELS]
+        for name in ordered:
+            seconds = self.stages[name]
+            share = seconds / self.total_seconds * 100 if self.total_seconds > 0 else 0.0
+            lines.append(f"{self.STAGE_LABELS.get(name, name)}: {seconds * 1000:.1f} ms ({share:.0f}%)")
+
+        for name, value in self.counters.items():
+            lines.append(f"{self.COUNTER_LABELS.get(name, name)}: {value:,}")
+        return lines
+
+
+class FlexibleDataProcessor:
+    """Processador de dados flexível que trabalha com qualquer estrutura"""
+
+    # Tamanho dos blocos lidos do disco durante o carregamento em fluxo
+    READ_CHUNK_SIZE = 1 << 16
+    # Quantidade de linhas convertidas de uma vez, coluna a coluna
+    EXTRACT_BATCH_SIZE = 4096
+    # Carregamento paralelo: tamanho mínimo do arquivo e tamanho máximo de cada faixa de bytes
+    PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+    PARALLEL_CHUNK_BYTES = 32 * 1024 * 1024
+    # Bytes lidos de uma vez ao contar aspas para validar as fronteiras das faixas
+    QUOTE_SCAN_BYTES = 16 * 1024 * 1024
+    # Acesso via mmap (use_mmap=None): automático a partir deste tamanho de arquivo
+    MMAP_MIN_BYTES = 64 * 1024 * 1024
+    # Linhas espalhadas pelo arquivo usadas na inferência de estrutura com o índice de linhas
+    MMAP_SAMPLE_ROWS = 50
+    # Exportação: linhas gravadas por bloco, delimitador por extensão e compressão por sufixo
+    EXPORT_CHUNK_ROWS = 1 << 16
+    EXPORT_LINE_TERMINATOR = '\r\n'
+    EXPORT_DELIMITERS = {'.tsv': '\t', '.tab': '\t'}
+    EXPORT_COMPRESSIONS = {'.gz': 'gzip', '.xz': 'xz'}
+    EXPORT_GZIP_LEVEL = 6
+    EXPORT_XZ_PRESET = 1
+    # Coluna e valores que distinguem linhas municipais e agregadas quando não há tipo de local
+    EXPORT_LEVEL_COLUMN = 'nivel'
+    EXPORT_LEVELS = ('municipio', 'agregado')
+    # Máximo de números formatados guardados durante a exportação
+    EXPORT_MEMO_LIMIT = 1 << 20
+    # Resultados derivados e índices por data guardados (os menos usados saem primeiro)
+    DERIVED_LIMIT = 256
+    DATE_INDEX_LIMIT = 32
+    # Frequências de series_for: os mesmos períodos de group_by
+    SERIES_FREQUENCIES = AggregationKernel.PERIODS
+
+    def __init__(self, cache: Optional[DatasetCache] = None, workers: int = 1, use_mmap: Optional[bool] = None,
+                 profile_memory: bool = False):
+        self.store = CovidColumnStore()
+        self.workers = workers
+        self.use_mmap = use_mmap
+        self.line_index: Optional[LineIndex] = None
+
+        # Instrumentação da última carga; o pico de memória (tracemalloc) é opcional
+        self.profile_memory = profile_memory
+        self.last_load_report: Optional[LoadReport] = None
+
+        # Origem da última carga, usada para ler só o que for acrescentado ao arquivo
+        self.source_path: Optional[str] = None
+        self.source_offset = 0
+        self._source_encoding: Optional[str] = None
+        self._source_schema: Optional[CsvSchema] = None
+        self._source_plan: Optional[ExtractionPlan] = None
+        self.original_columns: List[str] = []
+        self.column_mapping: Dict[str, str] = {}
+        self.cache = cache
+        self.last_probe: Optional[FileProbe] = None
+
+        # Feeds só com acumulados: linhas agregadas (estado) ficam fora do store principal
+        self.feed_normalizer: Optional[CumulativeFeedNormalizer] = None
+        self.state_store: Optional[CovidColumnStore] = None
+
+        # Resultados derivados por nome, todos da versão _derived_version dos dados
+        self._derived: Dict[str, Any] = {}
+        self._derived_version: Optional[int] = None
+        self.aggregates = RunningAggregates(self._month_key)
+        self._municipality_index = MunicipalityIndex()
+        # Índices por data por município (None: todos), do menos para o mais usado
+        self._date_indexes: Dict[Optional[str], DateIndex] = {}
+
+    @property
+    def data_version(self) -> int:
+        """Versão atual dos dados; muda a cada carga ou alteração do store"""
+        return self.store.version
+
+    def _memoized(self, name: str, compute):
+        """Devolve o resultado guardado para a versão atual ou o recalcula
+
+        Resultados de versões anteriores são descartados assim que a versão muda,
+        e no máximo DERIVED_LIMIT ficam guardados (os menos usados saem primeiro).
+        """
+        derived = self._derived
+        version = self.data_version
+        if version != self._derived_version:
+            derived.clear()
+            self._derived_version = version
+        elif name in derived:
+            # Reinsere no fim: a ordem do dicionário é a ordem de uso
+            value = derived[name] = derived.pop(name)
+            return value
+
+        value = compute()
+        # compute pode ter guardado outros resultados (ou mudado a versão) no caminho
+        if self.data_version == self._derived_version:
+            derived[name] = value
+            while len(derived) > self.DERIVED_LIMIT:
+                del derived[next(iter(derived))]
+        return value
+
+    def invalidate_derived(self):
+        """Descarta os resultados derivados guardados"""
+        self._derived.clear()
+        self._derived_version = None
+
+    @property
+    def data(self) -> CovidColumnStore:
+        """Visão sequencial dos registros (CovidData criados sob demanda)"""
+        return self.store
+
+    @data.setter
+    def data(self, records: Iterable[CovidData]):
+        self.store = CovidColumnStore.from_records(records)
+
+    def load_data_from_text(self, text_data: str) -> bool:
+        """Carrega dados a partir de texto de forma flexível"""
+        self.last_probe = None
+        self.source_path = None
+        report = self.last_load_report = LoadReport(trace_memory=self.profile_memory)
+        report.mode = 'text'
+        try:
+            with report:
+                loaded = self._load_from_lines(io.StringIO(text_data))
+                if loaded:
+                    self._normalize_feed()
+                report.rows = len(self.store)
+            return loaded
+
+        except Exception as e:
+            print(f"Erro ao carregar dados: {e}")
+            return False
+
+    def _load_from_lines(self, lines: Iterable[str], probe: Optional[FileProbe] = None) -> bool:
+        """Executa o pipeline em fluxo: leitura -> classificação -> extração, linha a linha"""
+        with self.last_load_report.stage('schema'):
+            if probe is not None:
+                schema, rows = FlexibleCSVProcessor.stream_flexible_csv(lines, probe.delimiter, probe.has_header)
+            else:
+                schema, rows = FlexibleCSVProcessor.stream_flexible_csv(lines)
+        if schema is None:
+            return False
+
+        return self._process_rows(schema, rows)
+
+    def _process_rows(self, schema: CsvSchema, rows: Iterable[List[str]]) -> bool:
+        """Extrai os registros das linhas do csv.reader usando um plano compilado"""
+        plan = ExtractionPlan(schema)
+
+        self.original_columns = plan.columns
+        self.column_mapping = schema.column_mapping
+        self._source_schema = schema
+        self._source_plan = plan
 
-        value = str(row_dict[column]).strip()
+        report = self.last_load_report
+        self.store = self._extract_rows(plan, rows, self.EXTRACT_BATCH_SIZE, report)
+        if report is not None:
+            report.add_plan_counters(plan)
+        return len(self.store) > 0
+
+    @staticmethod
+    def _extract_rows(plan: ExtractionPlan, rows: Iterable[List[str]], batch_size: int,
+                      report: Optional[LoadReport] = None) -> CovidColumnStore:
+        """Extrai as linhas em lotes para um novo store"""
+        store = CovidColumnStore()
+        store.set_extra_columns(plan.extra_columns)
+
+        if not plan.is_valid:
+            return store
+
+        stage = report.stage if report is not None else contextlib.nullcontext
+        rows = iter(rows)
+        rows_read = 0
+        while True:
+            with stage('read'):
+                batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            rows_read += len(batch)
+
+            try:
+                columns = plan.extract_batch(batch, report)
+            except Exception:
+                # Algum valor inesperado no lote: reprocessa linha a linha
+                with stage('row_fallback'):
+                    for row in batch:
+                        try:
+                            extracted = plan.extract(row)
+                            if extracted:
+                                store.append_values(*extracted)
+                        except Exception as e:
+                            print(f"Erro ao processar linha: {e}")
+                            continue
+                if report is not None:
+                    report.count('row_fallback_rows', len(batch))
+                continue
+
+            with stage('store'):
+                store.extend_columns(*columns)
+
+        if report is not None:
+            report.count('rows_read', rows_read)
+            report.count('skipped_rows', rows_read - len(store))
+        return store
+
+    @staticmethod
+    def _safe_get_numeric(value: str) -> int:
+        """Obtém valor numérico de forma segura"""
+        value = str(value).strip()
         if not value:
             return 0
 
@@ -427,142 +3081,973 @@ class FlexibleDataProcessor:
         except (ValueError, TypeError):
             return 0
 
-    def load_from_csv_file(self, file_path: str) -> bool:
-        """Carrega dados diretamente de um arquivo CSV"""
+    def load_from_csv_file(self, file_path: str, workers: Optional[int] = None) -> bool:
+        """Carrega dados diretamente de um arquivo CSV, lendo-o em fluxo por blocos
+
+        Com mais de um worker (argumento ou atributo workers), arquivos grandes são
+        processados em paralelo por faixas de bytes.
+        """
+        self.last_probe = None
+        self.source_path = None
+        self.close_line_index()
+        report = self.last_load_report = LoadReport(file_path, trace_memory=self.profile_memory)
         try:
-            # Tenta diferentes codificações
-            encodings = ['utf-8', 'utf-8-sig', 'latin1', 'cp1252', 'iso-8859-1']
+            with report:
+                loaded = self._load_file(file_path, workers or self.workers, report)
+                report.rows = len(self.store) if loaded else 0
+            return loaded
+
+        except Exception as e:
+            print(f"Erro ao ler arquivo CSV: {e}")
+            return False
+
+    def _load_file(self, file_path: str, workers: int, report: LoadReport) -> bool:
+        """Escolhe o modo de carga (cache, paralelo, mmap ou serial) e executa o pipeline"""
+        # Codificação, delimitador e cabeçalho saem de um único prefixo em bytes
+        probe = FileProbe.from_file(file_path, report=report)
+        self.last_probe = probe
+
+        # Arquivo inalterado desde a última leitura: usa as colunas do cache
+        fingerprint = None
+        if self.cache is not None:
+            with report.stage('cache_load'):
+                fingerprint = self.cache.fingerprint(file_path)
+                cached = self.cache.load(file_path, fingerprint)
+            if cached is not None:
+                report.mode = 'cache'
+                self.store, self.state_store = cached['store'], cached['state_store']
+                self.original_columns, self.column_mapping = cached['original_columns'], cached['column_mapping']
+                self._source_schema = self._source_plan = None
+                self._remember_source(file_path, probe.data_end, probe.encoding)
+                self._restore_feed(cached['feed'])
+                return len(self.store) > 0
+
+        # Arquivos grandes podem ser lidos via mmap com um índice de linhas
+        use_mmap = self.use_mmap if self.use_mmap is not None else probe.file_size >= self.MMAP_MIN_BYTES
+        if use_mmap:
+            with report.stage('line_index'):
+                self.line_index = LineIndex(file_path)
+
+        loaded = None
+        if workers > 1 and probe.file_size >= self.PARALLEL_MIN_BYTES:
+            report.mode = 'parallel'
+            loaded = self._load_parallel(file_path, probe, workers)
+        if loaded is None:
+            report.mode = 'mmap' if self.line_index else 'serial'
+            loaded = self._load_indexed(probe) if self.line_index else self._load_serial(file_path, probe)
+        if loaded:
+            self._remember_source(file_path, self.source_offset, probe.encoding)
+
+        if loaded:
+            self._normalize_feed()
+        if loaded and self.cache is not None:
+            # O cache guarda os stores já normalizados
+            normalizer = self.feed_normalizer
+            feed = {'corrections': normalizer.corrections, 'aggregate_rows': normalizer.aggregate_rows} \
+                if normalizer is not None else None
+            with report.stage('cache_save'):
+                self.cache.save(file_path, self.store, self.original_columns, self.column_mapping, fingerprint,
+                                self.state_store, feed)
+        return loaded
+
+    def _load_serial(self, file_path: str, probe: FileProbe) -> bool:
+        """Carrega o arquivo em fluxo em um único processo"""
+        # O restante é decodificado uma vez, em fluxo; só troca de codificação
+        # se aparecer um byte inválido depois do prefixo
+        for attempt, encoding in enumerate(probe.fallback_encodings()):
+            if attempt:
+                self.last_load_report.count('encoding_retries')
+            try:
+                # A leitura para na última quebra de linha; uma linha final
+                # incompleta fica para append_from_file
+                raw = _BoundedReader(open(file_path, 'rb'), probe.data_end)
+                with io.TextIOWrapper(io.BufferedReader(raw, self.READ_CHUNK_SIZE),
+                                      encoding=encoding, newline='') as file:
+                    loaded = self._load_from_lines(file, probe)
+                    self.source_offset = probe.data_end
+            except UnicodeDecodeError:
+                continue
+
+            probe.encoding = encoding
+            return loaded
+
+        return False
+
+    def _load_indexed(self, probe: FileProbe) -> bool:
+        """Carrega o arquivo lendo as linhas pelo índice sobre o mmap"""
+        index = self.line_index
+        first_data_line = 1 if probe.has_header else 0
+        for attempt, encoding in enumerate(probe.fallback_encodings()):
+            if attempt:
+                self.last_load_report.count('encoding_retries')
+            try:
+                with self.last_load_report.stage('schema'):
+                    schema = self._schema_from_index(index, probe, encoding)
+                if schema is None:
+                    return False
+
+                lines = itertools.chain.from_iterable(
+                    io.StringIO(block.decode(encoding), newline='') for block in index.iter_blocks(first_data_line))
+                loaded = self._process_rows(schema, csv.reader(lines, delimiter=probe.delimiter))
+                self.source_offset = index.end
+            except UnicodeDecodeError:
+                continue
+
+            probe.encoding = encoding
+            return loaded
+
+        return False
+
+    def _schema_from_index(self, index: LineIndex, probe: FileProbe, encoding: str) -> Optional[CsvSchema]:
+        """Detecta a estrutura com as primeiras linhas e uma amostra espalhada por todo o arquivo"""
+        if not len(index):
+            return None
+
+        # As primeiras linhas são contíguas: um único csv.reader sobre iter_lines
+        first_data_line = 1 if probe.has_header else 0
+        head_stop = min(len(index), first_data_line + FlexibleCSVProcessor.SCHEMA_SAMPLE_ROWS)
+        head_rows = list(csv.reader((line.decode(encoding) for line in index.iter_lines(0, head_stop)),
+                                    delimiter=probe.delimiter))
+        if not head_rows:
+            return None
+
+        first_row = head_rows[0]
+        if probe.has_header:
+            headers = [h.strip() for h in first_row]
+        else:
+            headers = [f"coluna_{i + 1}" for i in range(len(first_row))]
+
+        # A amostra espalhada é lida linha a linha, sem juntar linhas distantes
+        sample_rows = head_rows[first_data_line:]
+        for line_number in index.sample_line_numbers(first_data_line, self.MMAP_SAMPLE_ROWS):
+            if line_number >= head_stop:
+                sample_rows.extend(itertools.islice(
+                    csv.reader([index.line(line_number).decode(encoding)], delimiter=probe.delimiter), 1))
+        if not sample_rows:
+            return None
 
-            for encoding in encodings:
+        return FlexibleCSVProcessor.build_schema(probe.delimiter, probe.has_header, headers, sample_rows)
+
+    def close_line_index(self):
+        """Fecha o mmap do último arquivo carregado, se houver"""
+        if self.line_index is not None:
+            self.line_index.close()
+            self.line_index = None
+
+    def _load_parallel(self, file_path: str, probe: FileProbe, workers: int) -> Optional[bool]:
+        """Processa faixas de bytes alinhadas a quebras de linha em um pool de processos
+
+        A estrutura é detectada no prefixo (ou com a amostra do índice de linhas, quando
+        há mmap) e enviada a cada worker, e os stores parciais são concatenados na ordem
+        original. Fronteiras que caem dentro de um campo entre aspas são removidas.
+        Retorna None quando o modo paralelo não se aplica ou falha, para que o chamador
+        use o carregamento serial.
+        """
+        with open(file_path, 'rb') as file:
+            prefix = file.read(FileProbe.PREFIX_SIZE)
+
+        report = self.last_load_report
+        parts = max(workers, -(-probe.file_size // self.PARALLEL_CHUNK_BYTES))
+        with report.stage('schema'):
+            if self.line_index is not None:
+                # A amostra espalhada pode ter bytes inválidos para a codificação do
+                # prefixo: o modo serial troca de codificação
                 try:
-                    with open(file_path, 'r', encoding=encoding, newline='') as file:
-                        content = file.read()
-                        if content.strip():
-                            return self.load_data_from_text(content)
+                    schema = self._schema_from_index(self.line_index, probe, probe.encoding)
                 except UnicodeDecodeError:
-                    continue
+                    return None
+                ranges = self.line_index.byte_ranges(1 if probe.has_header else 0, parts)
+            else:
+                schema, data_start = self._schema_from_prefix(prefix, probe)
+                ranges = self._split_byte_ranges(file_path, data_start, probe.data_end, parts)
 
-            return False
+        if schema is None:
+            return None
+
+        # Aspas podem esconder quebras de linha dentro de um campo
+        with report.stage('parallel'):
+            ranges = self._merge_quoted_ranges(file_path, ranges)
+        if len(ranges) < 2:
+            return None
+
+        # 'utf-8-sig' só remove o BOM se a faixa começar por ele
+        tasks = [(file_path, start, end, probe.encoding, schema, self.EXTRACT_BATCH_SIZE) for start, end in ranges]
 
+        # Importado só aqui: o módulo é caro e a maioria das cargas é serial
+        import concurrent.futures
+        try:
+            # Etapas e contadores de cada faixa ficam nos workers; aqui só o tempo total
+            with report.stage('parallel'):
+                with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                    chunks = list(executor.map(_parse_csv_byte_range, tasks))
+        except UnicodeDecodeError:
+            # Byte inválido após o prefixo: o modo serial troca de codificação
+            return None
         except Exception as e:
-            print(f"Erro ao ler arquivo CSV: {e}")
-            return False
+            print(f"Erro no carregamento paralelo, usando modo serial: {e}")
+            return None
+
+        plan = ExtractionPlan(schema)
+        store = CovidColumnStore()
+        store.set_extra_columns(plan.extra_columns)
+        with report.stage('store'):
+            for chunk in chunks:
+                store.extend_store(chunk)
+
+        self.original_columns = plan.columns
+        self.column_mapping = schema.column_mapping
+        self._source_schema = schema
+        self._source_plan = plan
+        self.source_offset = ranges[-1][1] if ranges else probe.data_end
+        self.store = store
+        return len(self.store) > 0
+
+    @staticmethod
+    def _schema_from_prefix(prefix: bytes, probe: FileProbe) -> Tuple[Optional[CsvSchema], int]:
+        """Detecta a estrutura no prefixo em bytes; retorna (estrutura, início dos dados)"""
+        data_start = len(codecs.BOM_UTF8) if probe.has_bom else 0
+        if probe.has_header:
+            header_end = prefix.find(b'\n', data_start)
+            if header_end < 0:
+                return None, data_start
+            data_start = header_end + 1
+
+        # A amostra da estrutura vem só de linhas completas do prefixo
+        prefix = prefix[:prefix.rfind(b'\n') + 1]
+        text = prefix.decode(probe.encoding, errors='replace')
+        schema, _ = FlexibleCSVProcessor.stream_flexible_csv(
+            io.StringIO(text, newline=''), probe.delimiter, probe.has_header)
+        return schema, data_start
+
+    def _normalize_feed(self):
+        """Separa linhas agregadas e deriva métricas diárias de feeds só com acumulados"""
+        self.state_store = None
+        normalizer = CumulativeFeedNormalizer(self.column_mapping)
+        self.feed_normalizer = normalizer if normalizer.is_needed else None
+        if self.feed_normalizer is None:
+            return
+
+        report = self.last_load_report
+        with report.stage('normalize'):
+            self.store, self.state_store = normalizer.split_aggregate_rows(self.store)
+            if self.state_store is not None:
+                normalizer.derive_daily(self.state_store)
+            # Por último o store principal, cujas correções ficam em normalizer.corrections
+            normalizer.derive_daily(self.store)
+        report.count('aggregate_rows', normalizer.aggregate_rows)
+        report.count('corrections', normalizer.corrections)
+
+    def _restore_feed(self, feed: Optional[Dict[str, int]]):
+        """Recria o normalizador de um store lido do cache, que já vem normalizado"""
+        normalizer = CumulativeFeedNormalizer(self.column_mapping)
+        self.feed_normalizer = normalizer if normalizer.is_needed else None
+        if self.feed_normalizer is None or not feed:
+            return
+
+        normalizer.corrections = feed['corrections']
+        normalizer.aggregate_rows = feed['aggregate_rows']
+        self.last_load_report.count('aggregate_rows', normalizer.aggregate_rows)
+        self.last_load_report.count('corrections', normalizer.corrections)
+
+    def _remember_source(self, file_path: str, offset: int, encoding: str):
+        """Guarda a origem da carga para leituras incrementais"""
+        self.source_path = file_path
+        self.source_offset = offset
+        self._source_encoding = encoding
+
+    def append_from_file(self, file_path: Optional[str] = None) -> int:
+        """Lê apenas os bytes acrescentados ao arquivo desde a última leitura
+
+        Reaproveita o deslocamento e a estrutura da carga anterior e anexa ao store
+        apenas as novas linhas completas; uma linha ainda sem quebra fica para a
+        próxima chamada. Se o arquivo for outro ou tiver encolhido, faz uma carga
+        completa. Retorna a quantidade de registros novos, ou -1 em caso de erro.
+        """
+        file_path = file_path or self.source_path
+        if not file_path:
+            return -1
 
-    def export_to_csv(self, file_path: str) -> bool:
-        """Exporta dados carregados para arquivo CSV"""
         try:
-            with open(file_path, 'w', encoding='utf-8', newline='') as file:
-                writer = csv.writer(file)
-
-                # Cabeçalho básico
-                headers = [
-                    'Data', 'Município', 'Novos Casos', 'Novos Óbitos',
-                    'Novos Vacinados', 'Casos Acumulados', 'Óbitos Acumulados', 'Vacinados Acumulados'
-                ]
-
-                # Adiciona colunas extras se existirem
-                if self.data and hasattr(self.data[0], 'extra_fields') and self.data[0].extra_fields:
-                    extra_headers = list(self.data[0].extra_fields.keys())
-                    headers.extend(extra_headers)
-
-                writer.writerow(headers)
-
-                # Dados
-                for record in self.data:
-                    row = [
-                        record.date.strftime('%Y-%m-%d'),
-                        record.municipality,
-                        record.new_cases,
-                        record.new_deaths,
-                        record.new_vaccinated,
-                        record.accumulated_cases,
-                        record.accumulated_deaths,
-                        record.accumulated_vaccinated
-                    ]
-
-                    # Adiciona campos extras
-                    if hasattr(record, 'extra_fields') and record.extra_fields:
-                        for key in record.extra_fields.keys():
-                            row.append(record.extra_fields[key])
-
-                    writer.writerow(row)
+            size = os.path.getsize(file_path)
+            if file_path != self.source_path or size < self.source_offset:
+                return len(self.store) if self.load_from_csv_file(file_path) else -1
+            if size == self.source_offset:
+                return 0
+
+            with open(file_path, 'rb') as file:
+                file.seek(self.source_offset)
+                new_bytes = file.read(size - self.source_offset)
+
+            # Só consome linhas completas; o restante fica para a próxima leitura
+            last_break = new_bytes.rfind(b'\n')
+            if last_break < 0:
+                return 0
+            new_bytes = new_bytes[:last_break + 1]
+
+            if self._source_plan is None:
+                # Carga veio do cache: detecta a estrutura de novo a partir do prefixo
+                probe = FileProbe.from_file(file_path)
+                with open(file_path, 'rb') as file:
+                    schema, _ = self._schema_from_prefix(file.read(FileProbe.PREFIX_SIZE), probe)
+                if schema is None:
+                    return -1
+                self._source_schema = schema
+                self._source_plan = ExtractionPlan(schema)
+
+            try:
+                text = new_bytes.decode(self._source_encoding or 'utf-8')
+            except UnicodeDecodeError:
+                text = new_bytes.decode('latin1')
+
+            rows = csv.reader(io.StringIO(text, newline=''), delimiter=self._source_schema.delimiter)
+            appended = self._extract_rows(self._source_plan, rows, self.EXTRACT_BATCH_SIZE)
+            normalizer = self.feed_normalizer
+            if normalizer is not None:
+                appended, aggregate = normalizer.split_aggregate_rows(appended)
+                if aggregate is not None:
+                    if self.state_store is None:
+                        self.state_store = aggregate
+                        normalizer.derive_daily(self.state_store)
+                    else:
+                        state_rows = len(self.state_store)
+                        self.state_store.extend_store(aggregate)
+                        normalizer.derive_daily(self.state_store, state_rows)
+
+            known_rows = len(self.store)
+            self.store.extend_store(appended)
+            if normalizer is not None:
+                normalizer.derive_daily(self.store, known_rows)
+            self.source_offset += len(new_bytes)
+            return len(appended)
 
+        except Exception as e:
+            print(f"Erro ao ler dados acrescentados: {e}")
+            return -1
+
+    @staticmethod
+    def _split_byte_ranges(file_path: str, start: int, end: int, parts: int) -> List[Tuple[int, int]]:
+        """Divide [start, end) em faixas que terminam logo após uma quebra de linha"""
+        if end <= start:
+            return []
+
+        step = max(1, (end - start) // max(1, parts))
+        ranges = []
+        with open(file_path, 'rb') as file:
+            position = start
+            while position < end:
+                boundary = position + step
+                if boundary >= end:
+                    boundary = end
+                else:
+                    file.seek(boundary)
+                    file.readline()
+                    boundary = min(file.tell(), end)
+                ranges.append((position, boundary))
+                position = boundary
+        return ranges
+
+    @classmethod
+    def _merge_quoted_ranges(cls, file_path: str, ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Une faixas consecutivas cuja fronteira cai dentro de um campo entre aspas
+
+        Como aspas dentro de um campo são escritas em dobro (""), uma posição está
+        dentro de um campo entre aspas quando a quantidade de aspas antes dela é ímpar.
+        """
+        merged: List[Tuple[int, int]] = []
+        inside = False
+        with open(file_path, 'rb') as file:
+            for start, end in ranges:
+                if inside:
+                    merged[-1] = (merged[-1][0], end)
+                else:
+                    merged.append((start, end))
+
+                file.seek(start)
+                quotes = 0
+                for block_start in range(start, end, cls.QUOTE_SCAN_BYTES):
+                    quotes += file.read(min(cls.QUOTE_SCAN_BYTES, end - block_start)).count(b'"')
+                inside ^= bool(quotes & 1)
+        return merged
+
+    def export_to_csv(self, file_path: str, compression: Optional[str] = None,
+                      include_aggregates: bool = True) -> bool:
+        """Exporta dados carregados para arquivo CSV
+
+        O delimitador segue a extensão escolhida (.tsv usa tabulação) e o arquivo é
+        compactado com gzip ou xz quando o nome termina em .gz ou .xz, ou quando
+        compression é 'gzip' ou 'xz'. As linhas são montadas a partir das colunas
+        em blocos de EXPORT_CHUNK_ROWS: datas são formatadas uma vez por dia
+        distinto e municípios e extras codificados, uma vez por valor distinto.
+
+        As linhas agregadas (estado) separadas pela normalização do feed vão ao
+        fim do arquivo, a menos que include_aggregates seja False; se o arquivo não
+        tiver coluna de tipo de local, uma coluna EXPORT_LEVEL_COLUMN as identifica.
+        """
+        try:
+            delimiter, suffix_compression = self.export_format(file_path)
+            compression = compression or suffix_compression
+            # Módulos de compressão importados só quando pedidos
+            if compression == 'gzip':
+                import gzip
+                file = gzip.open(file_path, 'wt', encoding='utf-8', newline='',
+                                 compresslevel=self.EXPORT_GZIP_LEVEL)
+            elif compression == 'xz':
+                import lzma
+                file = lzma.open(file_path, 'wt', encoding='utf-8', newline='', preset=self.EXPORT_XZ_PRESET)
+            elif compression is None:
+                file = open(file_path, 'w', encoding='utf-8', newline='', buffering=self.READ_CHUNK_SIZE)
+            else:
+                raise ValueError(f"compressão desconhecida: {compression}")
+
+            with file:
+                self._write_delimited(file, delimiter, include_aggregates)
             return True
         except Exception as e:
             print(f"Erro ao exportar CSV: {e}")
             return False
 
-    def get_monthly_summary(self) -> Dict[str, Dict[str, int]]:
-        """Retorna resumo mensal dos dados"""
-        monthly_data = {}
+    @classmethod
+    def export_format(cls, file_path: str) -> Tuple[str, Optional[str]]:
+        """Delimitador e compressão implícitos no nome do arquivo de exportação"""
+        base_path, extension = os.path.splitext(file_path.lower())
+        compression = cls.EXPORT_COMPRESSIONS.get(extension)
+        if compression is not None:
+            extension = os.path.splitext(base_path)[1]
+        return cls.EXPORT_DELIMITERS.get(extension, ','), compression
+
+    @property
+    def aggregate_row_count(self) -> int:
+        """Quantidade de linhas agregadas (estado) separadas do store principal"""
+        return len(self.state_store) if self.state_store is not None else 0
+
+    def _write_delimited(self, file, delimiter: str, include_aggregates: bool = True):
+        """Grava os stores como texto delimitado, em blocos de linhas montados coluna a coluna"""
+        parts = [(self.store, self.EXPORT_LEVELS[0])]
+        if include_aggregates and self.aggregate_row_count:
+            parts.append((self.state_store, self.EXPORT_LEVELS[1]))
+        # Sem coluna de tipo de local no arquivo, uma coluna de nível distingue as linhas agregadas
+        tag_level = len(parts) > 1 and not (self.feed_normalizer and self.feed_normalizer.place_type_column)
+
+        # Cabeçalho básico
+        headers = [
+            'Data', 'Município', 'Novos Casos', 'Novos Óbitos',
+            'Novos Vacinados', 'Casos Acumulados', 'Óbitos Acumulados', 'Vacinados Acumulados'
+        ]
 
-        for record in self.data:
-            month_key = record.get_month_year()
-
-            if month_key not in monthly_data:
-                monthly_data[month_key] = {
-                    'new_cases': 0,
-                    'new_deaths': 0,
-                    'new_vaccinated': 0,
-                    'max_accumulated_cases': 0,
-                    'max_accumulated_deaths': 0,
-                    'max_accumulated_vaccinated': 0
-                }
-
-            monthly_data[month_key]['new_cases'] += record.new_cases
-            monthly_data[month_key]['new_deaths'] += record.new_deaths
-            monthly_data[month_key]['new_vaccinated'] += record.new_vaccinated
-            monthly_data[month_key]['max_accumulated_cases'] = max(
-                monthly_data[month_key]['max_accumulated_cases'],
-                record.accumulated_cases
-            )
-            monthly_data[month_key]['max_accumulated_deaths'] = max(
-                monthly_data[month_key]['max_accumulated_deaths'],
-                record.accumulated_deaths
-            )
-            monthly_data[month_key]['max_accumulated_vaccinated'] = max(
-                monthly_data[month_key]['max_accumulated_vaccinated'],
-                record.accumulated_vaccinated
-            )
+        # Adiciona colunas extras se existirem
+        headers.extend(self.store.extra_columns)
+        if tag_level:
+            headers.append(self.EXPORT_LEVEL_COLUMN)
+        file.write(delimiter.join(self._csv_fields(headers, delimiter)) + self.EXPORT_LINE_TERMINATOR)
+
+        date_strings: Dict[int, str] = {}
+        number_strings = _IntegerStrings()
+        for store, level in parts:
+            self._write_store_rows(file, delimiter, store, level if tag_level else None,
+                                   date_strings, number_strings)
+
+    def _write_store_rows(self, file, delimiter: str, store: CovidColumnStore, level: Optional[str],
+                          date_strings: Dict[int, str], number_strings: '_IntegerStrings'):
+        """Grava as linhas de um store; level, se informado, vai em uma última coluna"""
+        # Textos escapados uma vez por valor distinto; colunas não categóricas, por bloco
+        municipalities = self._csv_fields(store.municipalities, delimiter)
+        extras = []
+        for column in store.extra_columns:
+            values = store.extra_values[column]
+            if isinstance(values, CategoricalColumn):
+                extras.append((self._csv_fields(values.categories, delimiter), values.codes))
+            else:
+                extras.append((None, values))
+
+        metrics = [store.metrics[field] for field in CovidColumnStore.METRIC_FIELDS]
+        for start in range(0, len(store), self.EXPORT_CHUNK_ROWS):
+            end = start + self.EXPORT_CHUNK_ROWS
+            ordinals = store.dates[start:end]
+            for ordinal in set(ordinals).difference(date_strings):
+                date_strings[ordinal] = date.fromordinal(ordinal).isoformat()
+            if len(number_strings) > self.EXPORT_MEMO_LIMIT:
+                number_strings.clear()
+
+            columns = [map(date_strings.__getitem__, ordinals),
+                       map(municipalities.__getitem__, store.municipality_codes[start:end])]
+            columns.extend(map(number_strings.__getitem__, values[start:end]) for values in metrics)
+            for categories, values in extras:
+                if categories is not None:
+                    columns.append(map(categories.__getitem__, values[start:end]))
+                    continue
+                columns.append(self._csv_fields(values[start:end], delimiter))
+            if level is not None:
+                columns.append(itertools.repeat(level, len(ordinals)))
+
+            lines = map(delimiter.join, zip(*columns))
+            file.write(self.EXPORT_LINE_TERMINATOR.join(lines) + self.EXPORT_LINE_TERMINATOR)
+
+    @staticmethod
+    def _csv_fields(values: Sequence[str], delimiter: str = ',') -> Sequence[str]:
+        """Escapa campos como o csv.writer (aspas só quando necessário)
+
+        A busca por caracteres especiais é feita uma vez sobre todos os valores;
+        só quando algum aparece os campos são verificados um a um.
+        """
+        joined = ''.join(values)
+        if delimiter not in joined and '"' not in joined and '\n' not in joined and '\r' not in joined:
+            return values
+
+        needs_quotes = re.compile(f'[{re.escape(delimiter)}"\r\n]').search
+        if '"' not in joined:
+            return ['"' + value + '"' if needs_quotes(value) else value for value in values]
+        return ['"' + value.replace('"', '""') + '"' if needs_quotes(value) else value for value in values]
+
+    def get_monthly_summary(self, municipality: Optional[str] = None, start: Any = None,
+                            end: Any = None) -> Dict[str, Dict[str, int]]:
+        """Retorna resumo mensal dos dados (de todos ou de um município)
+
+        start e end (inclusivos) restringem o resumo a um intervalo de datas. O
+        resultado é reaproveitado enquanto os dados não mudam; trate-o como
+        somente leitura.
+        """
+        if start is not None or end is not None:
+            start, end = self.to_date_ordinal(start), self.to_date_ordinal(end)
+            return self._memoized(f"monthly_summary:{municipality}:{start}:{end}",
+                                  lambda: self._compute_range_monthly_summary(municipality, start, end))
+        if municipality is None:
+            return self._memoized('monthly_summary', self._compute_monthly_summary)
+
+        def compute():
+            rows = self.municipality_index.rows_for(municipality)
+            if not rows:
+                return {}
+            groups = AggregationKernel(self.store, rows).grouped(self._month_key)
+            return {month_key: groups[month_key] for month_key in sorted(groups, key=self._month_order)}
+        return self._memoized(f"monthly_summary:{municipality}", compute)
+
+    def _compute_monthly_summary(self) -> Dict[str, Dict[str, int]]:
+        """Monta o resumo mensal a partir dos acumuladores incrementais"""
+        groups = self.aggregates.refresh(self.store).groups
+        return {month_key: dict(groups[month_key]) for month_key in sorted(groups, key=self._month_order)}
+
+    @staticmethod
+    def _month_order(month_key: str) -> Tuple[int, int]:
+        """Chave de ordenação cronológica para 'MM/YYYY' (ordenar o texto põe o mês antes do ano)"""
+        month, year = month_key.split('/')
+        return int(year), int(month)
+
+    def _compute_range_monthly_summary(self, municipality: Optional[str], start: Optional[int],
+                                       end: Optional[int]) -> Dict[str, Dict[str, int]]:
+        """Resumo mensal de um intervalo de datas a partir do índice por data
+
+        As somas de cada mês vêm das somas prefixadas (buscas binárias); os
+        máximos acumulados percorrem só as linhas do intervalo.
+        """
+        index = self.date_index(municipality)
+        if index is None:
+            return {}
+        lo, hi = index.bounds(start, end)
+        if lo == hi:
+            return {}
+
+        maxima = AggregationKernel(self.store, index.order[lo:hi]).grouped(self._month_key, sum_fields=())
+        first_day, last_day = date.fromordinal(index.dates[lo]), date.fromordinal(index.dates[hi - 1])
 
+        monthly_data = {}
+        year, month = first_day.year, first_day.month
+        while (year, month) <= (last_day.year, last_day.month):
+            next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+            month_start = max(date(year, month, 1).toordinal(), index.dates[lo])
+            month_end = min(date(next_year, next_month, 1).toordinal() - 1, index.dates[hi - 1])
+            totals = index.range_totals(month_start, month_end)
+            if totals['records']:
+                month_key = f"{month:02d}/{year}"
+                monthly_data[month_key] = {field: totals[field] for field in DateIndex.SUM_FIELDS}
+                monthly_data[month_key].update(maxima[month_key])
+            year, month = next_year, next_month
         return monthly_data
 
+    @staticmethod
+    def _month_key(ordinal: int) -> str:
+        return AggregationKernel.period_label(AggregationKernel.period_code(ordinal, 'month'), 'month')
+
     def get_statistics(self) -> Dict[str, Any]:
-        """Retorna estatísticas gerais dos dados"""
-        if not self.data:
-            return {}
+        """Retorna estatísticas gerais dos dados
 
-        total_cases = sum(record.new_cases for record in self.data)
-        total_deaths = sum(record.new_deaths for record in self.data)
-        total_vaccinated = sum(record.new_vaccinated for record in self.data)
+        O resultado é reaproveitado enquanto os dados não mudam; trate-o como
+        somente leitura.
+        """
+        return self._memoized('statistics', self._compute_statistics)
 
-        max_accumulated_cases = max((record.accumulated_cases for record in self.data), default=0)
-        max_accumulated_deaths = max((record.accumulated_deaths for record in self.data), default=0)
-        max_accumulated_vaccinated = max((record.accumulated_vaccinated for record in self.data), default=0)
+    def _compute_statistics(self) -> Dict[str, Any]:
+        """Monta as estatísticas gerais a partir dos acumuladores incrementais"""
+        if not self.store:
+            return {}
+        return self._statistics_from_totals(self.aggregates.refresh(self.store).totals)
 
-        unique_municipalities = len(set(record.municipality for record in self.data))
+    def _statistics_from_totals(self, totals: Dict[str, Any]) -> Dict[str, Any]:
+        """Converte os totais do kernel de agregação no dicionário de estatísticas"""
+        total_cases = totals['new_cases']
+        total_deaths = totals['new_deaths']
 
         return {
-            'total_records': len(self.data),
-            'unique_municipalities': unique_municipalities,
-            'date_range': f"{min(self.data, key=lambda x: x.date).date.strftime('%d/%m/%Y')} - "
-                          f"{max(self.data, key=lambda x: x.date).date.strftime('%d/%m/%Y')}",
+            'total_records': totals['records'],
+            'unique_municipalities': totals['unique_municipalities'],
+            'date_range': f"{datetime.fromordinal(totals['first_date']).strftime('%d/%m/%Y')} - "
+                          f"{datetime.fromordinal(totals['last_date']).strftime('%d/%m/%Y')}",
             'total_new_cases': total_cases,
             'total_new_deaths': total_deaths,
-            'total_new_vaccinated': total_vaccinated,
-            'max_accumulated_cases': max_accumulated_cases,
-            'max_accumulated_deaths': max_accumulated_deaths,
-            'max_accumulated_vaccinated': max_accumulated_vaccinated,
+            'total_new_vaccinated': totals['new_vaccinated'],
+            'max_accumulated_cases': totals['max_accumulated_cases'],
+            'max_accumulated_deaths': totals['max_accumulated_deaths'],
+            'max_accumulated_vaccinated': totals['max_accumulated_vaccinated'],
             'mortality_rate': (total_deaths / total_cases * 100) if total_cases > 0 else 0,
             'columns_detected': len(self.original_columns),
             'column_mapping': self.column_mapping
         }
 
+    @property
+    def municipality_index(self) -> MunicipalityIndex:
+        """Índice de linhas por município, atualizado com o store"""
+        return self._municipality_index.refresh(self.store)
+
+    def get_municipalities(self) -> List[str]:
+        """Municípios presentes nos dados, em ordem alfabética"""
+        return self._memoized('municipalities', lambda: self.municipality_index.names())
+
+    def get_municipality_statistics(self, municipality: str) -> Dict[str, Any]:
+        """Estatísticas gerais de um único município ({} se ele não existir)"""
+        def compute():
+            rows = self.municipality_index.rows_for(municipality)
+            return self._statistics_from_totals(AggregationKernel(self.store, rows).totals()) if rows else {}
+        return self._memoized(f"statistics:{municipality}", compute)
+
+    def series_for(self, municipality: str, metric: str = 'new_cases', freq: str = 'month') -> Dict[str, int]:
+        """Série temporal de uma métrica de um município, em ordem cronológica
+
+        Métricas novas são somadas por período e acumuladas usam o máximo do
+        período. freq aceita os períodos de SERIES_FREQUENCIES (day, week, month,
+        quarter, year), com os rótulos de AggregationKernel.period_label.
+        """
+        if metric not in CovidColumnStore.METRIC_FIELDS:
+            raise ValueError(f"Métrica desconhecida: {metric}")
+        if freq not in self.SERIES_FREQUENCIES:
+            raise ValueError(f"Frequência desconhecida: {freq}")
+
+        aggregation = 'max' if metric in AggregationKernel.MAX_FIELDS else 'sum'
+        rows = self.group_by(freq, [metric], [aggregation], municipality=municipality)
+        return {row['period']: row[f"{metric}_{aggregation}"] for row in rows}
+
+    def group_by(self, period: str = 'month', metrics: Sequence[str] = AggregationKernel.SUM_FIELDS,
+                 aggregations: Sequence[str] = ('sum',), by_municipality: bool = False,
+                 municipality: Optional[str] = None, start: Any = None, end: Any = None) -> List[Dict[str, Any]]:
+        """Agrupa os dados por período (day, week, month, quarter, year) e município
+
+        Filtra opcionalmente por município e intervalo de datas (via índices) e
+        delega ao AggregationKernel.group_by; veja lá o formato das linhas. O
+        resultado é reaproveitado enquanto os dados não mudam.
+        """
+        start, end = self.to_date_ordinal(start), self.to_date_ordinal(end)
+        key = f"group_by:{period}:{tuple(metrics)}:{tuple(aggregations)}:{by_municipality}:{municipality}:{start}:{end}"
+
+        def compute():
+            if start is not None or end is not None:
+                index = self.date_index(municipality)
+                rows = index.positions(start, end) if index is not None else array('q')
+            elif municipality is not None:
+                rows = self.municipality_index.rows_for(municipality) or array('q')
+            else:
+                rows = None
+            return AggregationKernel(self.store, rows).group_by(period, metrics, aggregations, by_municipality)
+        return self._memoized(key, compute)
+
+    def rolling_metrics(self, municipality: Optional[str] = None,
+                        metric: str = 'new_cases') -> Optional[RollingMetrics]:
+        """Métricas em janelas móveis da série diária de todos ou de um município
+
+        A série diária vem de um group_by por dia (uma passada pelas linhas do
+        município); as janelas usam somas prefixadas. None se não houver dados.
+        """
+        def compute():
+            days = self.group_by('day', [metric], ['sum'], municipality=municipality)
+            if not days:
+                return None
+            return RollingMetrics.from_days([day['period_code'] for day in days],
+                                            [day[f"{metric}_sum"] for day in days])
+        return self._memoized(f"rolling:{municipality}:{metric}", compute)
+
+    def rolling_metrics_by_municipality(self, metric: str = 'new_cases') -> Dict[str, RollingMetrics]:
+        """Métricas em janelas móveis de cada município, com uma única passada pelos dados"""
+        def compute():
+            ordinals: Dict[str, List[int]] = {}
+            values: Dict[str, List[int]] = {}
+            for day in self.group_by('day', [metric], ['sum'], by_municipality=True):
+                ordinals.setdefault(day['municipality'], []).append(day['period_code'])
+                values.setdefault(day['municipality'], []).append(day[f"{metric}_sum"])
+            return {name: RollingMetrics.from_days(ordinals[name], values[name]) for name in ordinals}
+        return self._memoized(f"rolling_by_municipality:{metric}", compute)
+
+    def date_index(self, municipality: Optional[str] = None) -> Optional[DateIndex]:
+        """Índice por data de todos os dados ou de um município (None se ele não existir)"""
+        if municipality is None:
+            return self._date_index_entry(None).refresh(self.store)
+        rows = self.municipality_index.rows_for(municipality)
+        if rows is None:
+            return None
+        return self._date_index_entry(municipality).refresh(self.store, rows)
+
+    def _date_index_entry(self, municipality: Optional[str]) -> DateIndex:
+        """Índice guardado do município, marcado como o mais usado
+
+        Índices montados sobre um store anterior (outra carga) são descartados, e
+        no máximo DATE_INDEX_LIMIT ficam guardados. Os do store atual continuam
+        entre versões, pois refresh só indexa as linhas acrescentadas.
+        """
+        indexes = self._date_indexes
+        index = indexes.pop(municipality, None)
+        if index is None:
+            index = DateIndex()
+        stale = [key for key, other in indexes.items() if other.store is not None and other.store is not self.store]
+        for key in stale:
+            del indexes[key]
+        indexes[municipality] = index
+        while len(indexes) > self.DATE_INDEX_LIMIT:
+            del indexes[next(iter(indexes))]
+        return index
+
+    @staticmethod
+    def to_date_ordinal(value: Any) -> Optional[int]:
+        """Converte data (date, datetime, texto ou ordinal) em ordinal; None fica None"""
+        if value is None or isinstance(value, int):
+            return value
+        if isinstance(value, date):
+            return value.toordinal()
+        return DateParser.parse_any(value).toordinal()
+
+    def range_stats(self, start: Any = None, end: Any = None, municipality: Optional[str] = None) -> Dict[str, Any]:
+        """Totais de um intervalo de datas (inclusivo), de todos ou de um município
+
+        Usa o índice por data: duas buscas binárias e uma subtração por campo,
+        sem percorrer as linhas. Retorna {} quando não há registros no intervalo.
+        """
+        index = self.date_index(municipality)
+        if index is None:
+            return {}
+        totals = index.range_totals(self.to_date_ordinal(start), self.to_date_ordinal(end))
+        if not totals['records']:
+            return {}
+
+        total_cases = totals['new_cases']
+        total_deaths = totals['new_deaths']
+        return {
+            'total_records': totals['records'],
+            'date_range': f"{datetime.fromordinal(totals['first_date']).strftime('%d/%m/%Y')} - "
+                          f"{datetime.fromordinal(totals['last_date']).strftime('%d/%m/%Y')}",
+            'total_new_cases': total_cases,
+            'total_new_deaths': total_deaths,
+            'total_new_vaccinated': totals['new_vaccinated'],
+            'mortality_rate': (total_deaths / total_cases * 100) if total_cases > 0 else 0,
+        }
+
+    def top_k_municipalities(self, metric: str = 'new_cases', n: int = 10) -> List[Tuple[str, int]]:
+        """Os n municípios com maior total da métrica (máximo, se acumulada)"""
+        if metric not in CovidColumnStore.METRIC_FIELDS:
+            raise ValueError(f"Métrica desconhecida: {metric}")
+
+        totals = self._memoized(f"per_municipality:{metric}",
+                                lambda: AggregationKernel(self.store).per_municipality(metric))
+        names = self.store.municipalities
+        # Seleção por heap: O(m log n) em vez de ordenar todos os municípios
+        return [(names[code], value) for code, value in
+                heapq.nlargest(n, totals.items(), key=lambda item: (item[1], -item[0]))]
+
+
+def _parse_csv_byte_range(task: Tuple[str, int, int, str, CsvSchema, int]) -> CovidColumnStore:
+    """Worker do carregamento paralelo: converte uma faixa de bytes em um store parcial"""
+    file_path, start, end, encoding, schema, batch_size = task
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode(encoding)
+
+    rows = csv.reader(io.StringIO(text, newline=''), delimiter=schema.delimiter)
+    return FlexibleDataProcessor._extract_rows(ExtractionPlan(schema), rows, batch_size)
+
+
+def _env_workers() -> int:
+    """Processos de carga indicados por COVID_ANALYZER_WORKERS (padrão: 1)"""
+    try:
+        return max(0, int(os.environ.get('COVID_ANALYZER_WORKERS', '1')))
+    except ValueError:
+        return 1
+
+
+def _env_cache() -> bool:
+    """Cache de colunas ligado por COVID_ANALYZER_CACHE=1 (padrão: desligado)"""
+    return os.environ.get('COVID_ANALYZER_CACHE', '').strip().lower() in ('1', 'true', 'yes', 'sim', 'on')
+
+
+def create_processor(args: argparse.Namespace) -> 'FlexibleDataProcessor':
+    """Processador com as opções de carga comuns à linha de comando e à interface gráfica"""
+    return FlexibleDataProcessor(cache=DatasetCache() if args.cache else None,
+                                 workers=args.workers or os.cpu_count() or 1,
+                                 profile_memory=args.load_report)
+
+
+def _build_cli_parser() -> argparse.ArgumentParser:
+    """Argumentos da linha de comando (sem arquivos, abre a interface gráfica)"""
+    parser = argparse.ArgumentParser(
+        prog='covid_analyzer',
+        description="COVID-19 Data Analyzer. Sem arquivos, abre a interface gráfica; com arquivos, "
+                    "calcula os relatórios em lote, sem tkinter, e os imprime ou exporta em JSON ou CSV.")
+    parser.add_argument('files', nargs='*', metavar='ARQUIVO', help="arquivos CSV/TXT a analisar")
+    parser.add_argument('--stats', action='store_true',
+                        help="estatísticas gerais (padrão quando nenhum relatório é pedido)")
+    parser.add_argument('--monthly', action='store_true', help="resumo mensal")
+    parser.add_argument('--group-by', choices=AggregationKernel.PERIODS, metavar='PERÍODO',
+                        help=f"agrupamento por período: {', '.join(AggregationKernel.PERIODS)}")
+    parser.add_argument('--metrics', nargs='+', choices=CovidColumnStore.METRIC_FIELDS, metavar='MÉTRICA',
+                        default=list(AggregationKernel.SUM_FIELDS), help="métricas do agrupamento")
+    parser.add_argument('--aggregations', nargs='+', choices=AggregationKernel.AGGREGATIONS, metavar='AGREGAÇÃO',
+                        default=['sum'], help=f"agregações: {', '.join(AggregationKernel.AGGREGATIONS)}")
+    parser.add_argument('--by-municipality', action='store_true', help="agrupa também por município")
+    parser.add_argument('--municipality', metavar='NOME', help="restringe os relatórios a um município")
+    parser.add_argument('--start', metavar='DATA', help="data inicial (inclusiva)")
+    parser.add_argument('--end', metavar='DATA', help="data final (inclusiva)")
+    parser.add_argument('--format', choices=('json', 'csv'),
+                        help="formato da saída (padrão: pela extensão de --output, senão json)")
+    parser.add_argument('-o', '--output', metavar='ARQUIVO', help="grava a saída no arquivo em vez de imprimir")
+    # As opções de carga valem também para a interface gráfica
+    parser.add_argument('--backend', choices=COMPUTE_BACKENDS, help="backend de cálculo (padrão: auto)")
+    parser.add_argument('--workers', type=int, default=_env_workers(),
+                        help="processos para carregar arquivos grandes; 0 usa todos os processadores "
+                             "(padrão: COVID_ANALYZER_WORKERS ou 1)")
+    parser.add_argument('--cache', action='store_true', default=_env_cache(),
+                        help="usa o cache de colunas em disco (padrão: ligado se COVID_ANALYZER_CACHE=1)")
+    parser.add_argument('--export', metavar='ARQUIVO',
+                        help="exporta os dados processados (.csv, .tsv, com .gz/.xz opcional); "
+                             "com vários arquivos de entrada, exporta só o último")
+    parser.add_argument('--export-without-aggregates', action='store_true',
+                        help="não inclui na exportação as linhas agregadas (estado) separadas dos municípios")
+    parser.add_argument('--load-report', action='store_true',
+                        help="imprime em stderr o tempo de cada etapa da carga, o pico de memória e os fallbacks")
+    return parser
+
+
+def _cli_reports(processor: 'FlexibleDataProcessor', args: argparse.Namespace) -> Dict[str, Any]:
+    """Calcula os relatórios pedidos para o arquivo carregado no processador"""
+    reports: Dict[str, Any] = {}
+    if args.stats:
+        if args.start or args.end:
+            reports['statistics'] = processor.range_stats(args.start, args.end, args.municipality)
+        elif args.municipality:
+            reports['statistics'] = processor.get_municipality_statistics(args.municipality)
+        else:
+            reports['statistics'] = processor.get_statistics()
+    if args.monthly:
+        summary = processor.get_monthly_summary(args.municipality, args.start, args.end)
+        reports['monthly_summary'] = [dict(month=month, **values) for month, values in summary.items()]
+    if args.group_by:
+        reports['group_by'] = processor.group_by(args.group_by, args.metrics, args.aggregations,
+                                                 args.by_municipality, args.municipality, args.start, args.end)
+    return reports
+
+
+def _write_cli_csv(output, results: Dict[str, Dict[str, Any]], report: str):
+    """Grava um relatório de todos os arquivos como uma única tabela CSV"""
+    rows = []
+    for file_path, reports in results.items():
+        value = reports.get(report)
+        if isinstance(value, dict):
+            # Estatísticas: uma linha por arquivo, sem o mapeamento de colunas
+            value = [{key: item for key, item in value.items() if not isinstance(item, dict)}] if value else []
+        rows.extend(dict(file=file_path, **row) for row in value or [])
+
+    fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+    writer = csv.DictWriter(output, fieldnames=fieldnames or ['file'])
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def _cli_export(processor: 'FlexibleDataProcessor', args: argparse.Namespace):
+    """Exporta os dados processados e informa (em stderr) as linhas agregadas incluídas ou deixadas de fora"""
+    include_aggregates = not args.export_without_aggregates
+    if not processor.export_to_csv(args.export, include_aggregates=include_aggregates):
+        raise ValueError(f"não foi possível exportar para {args.export}")
+
+    aggregate_rows = processor.aggregate_row_count
+    exported = len(processor.store) + (aggregate_rows if include_aggregates else 0)
+    message = f"Exportados {exported:,} registros para {args.export}"
+    if aggregate_rows:
+        message += (f" (incluindo {aggregate_rows:,} linhas agregadas)" if include_aggregates
+                    else f" ({aggregate_rows:,} linhas agregadas não exportadas)")
+    print(message)
+
+
+def run_cli(args: argparse.Namespace) -> int:
+    """Modo em lote: carrega cada arquivo e imprime ou grava os relatórios; retorna o código de saída"""
+    if not (args.stats or args.monthly or args.group_by):
+        args.stats = True
+    output_format = args.format or ('csv' if args.output and args.output.lower().endswith('.csv') else 'json')
+    if output_format == 'csv' and args.stats + args.monthly + bool(args.group_by) > 1:
+        print("Erro: a saída CSV aceita um relatório por vez (--stats, --monthly ou --group-by)", file=sys.stderr)
+        return 2
+    if args.backend:
+        set_compute_backend(args.backend)
+
+    status = 0
+    results: Dict[str, Dict[str, Any]] = {}
+    for file_path in args.files:
+        processor = create_processor(args)
+        # Mensagens do processador vão para stderr, para não misturar com a saída
+        with contextlib.redirect_stdout(sys.stderr):
+            try:
+                loaded = processor.load_from_csv_file(file_path)
+                if args.load_report:
+                    print(f"Relatório de carga: {file_path}")
+                    for line in processor.last_load_report.describe():
+                        print(f"  {line}")
+                if not loaded:
+                    print(f"Erro: nenhum registro carregado de {file_path}")
+                    status = 1
+                    continue
+                results[file_path] = _cli_reports(processor, args)
+                if args.export and file_path == args.files[-1]:
+                    _cli_export(processor, args)
+            except ValueError as e:
+                print(f"Erro ao processar {file_path}: {e}")
+                status = 1
+            finally:
+                processor.close_line_index()
+
+    output = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        if output_format == 'csv':
+            report = 'statistics' if args.stats else 'monthly_summary' if args.monthly else 'group_by'
+            _write_cli_csv(output, results, report)
+        else:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+            output.write('\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return status
+
+
+# tkinter só é importado pela interface gráfica, para que o núcleo e o modo em
+# lote funcionem (e iniciem rápido) em servidores sem Tk
+tk = ttk = messagebox = filedialog = None
+
+
+def _import_tkinter():
+    """Importa o tkinter sob demanda, na primeira vez que a interface é usada"""
+    global tk, ttk, messagebox, filedialog
+    if tk is None:
+        import tkinter
+        from tkinter import ttk as tkinter_ttk, messagebox as tkinter_messagebox, filedialog as tkinter_filedialog
+        tk, ttk, messagebox, filedialog = tkinter, tkinter_ttk, tkinter_messagebox, tkinter_filedialog
+    return tk
+
 
 class SimpleChart:
     """Classe para criar gráficos simples usando Canvas do Tkinter"""
 
-    def __init__(self, canvas: tk.Canvas):
+    def __init__(self, canvas: 'tk.Canvas'):
         self.canvas = canvas
         self.margin = 60
 
@@ -680,9 +4165,11 @@ class SimpleChart:
         chart_width = canvas_width - 2 * self.margin
         chart_height = canvas_height - 2 * self.margin
 
+        # Escala do menor valor (ou zero) ao maior; séries como crescimento % podem ser negativas
         max_value = max(data.values())
-        if max_value == 0:
-            max_value = 1
+        min_value = min(0, min(data.values()))
+        if max_value == min_value:
+            max_value = min_value + 1
 
         # Título
         self.canvas.create_text(
@@ -712,7 +4199,7 @@ class SimpleChart:
 
         for i, (label, value) in enumerate(points):
             x = self.margin + i * step_x
-            y = canvas_height - self.margin - (value / max_value) * chart_height
+            y = canvas_height - self.margin - ((value - min_value) / (max_value - min_value)) * chart_height
 
             # Ponto
             self.canvas.create_oval(
@@ -733,7 +4220,7 @@ class SimpleChart:
             if i % max(1, len(points) // 6) == 0:  # Mostrar apenas alguns labels
                 self.canvas.create_text(
                     x, canvas_height - self.margin + 15,
-                    text=label[:6],
+                    text=label[:10],
                     font=("Arial", 8),
                     angle=45
                 )
@@ -743,10 +4230,10 @@ class SimpleChart:
         # Escala Y
         for i in range(5):
             y_pos = canvas_height - self.margin - (i / 4) * chart_height
-            value = int((i / 4) * max_value)
+            value = min_value + (i / 4) * (max_value - min_value)
             self.canvas.create_text(
                 self.margin - 10, y_pos,
-                text=str(value),
+                text=f"{value:.2f}" if max_value - min_value < 10 else str(int(value)),
                 font=("Arial", 8),
                 anchor="e"
             )
@@ -755,10 +4242,34 @@ class SimpleChart:
 class FlexibleMainApplication:
     """Aplicação principal com processamento flexível de CSV/TXT"""
 
-    def __init__(self, root: tk.Tk):
+    # Intervalo de verificação do arquivo acompanhado (ms)
+    WATCH_INTERVAL_MS = 2000
+    # Opção do filtro de município que mostra todos os dados
+    ALL_MUNICIPALITIES = "Todos os municípios"
+
+    # Gráficos de janelas móveis: opção -> (métrica, série de RollingMetrics, título)
+    ROLLING_CHARTS = {
+        "Média Móvel 7 dias - Casos (Linha)":
+            ('new_cases', 'moving_average_7', "📈 Média Móvel de 7 Dias - Casos"),
+        "Média Móvel 14 dias - Casos (Linha)":
+            ('new_cases', 'moving_average_14', "📈 Média Móvel de 14 Dias - Casos"),
+        "Média Móvel 7 dias - Óbitos (Linha)":
+            ('new_deaths', 'moving_average_7', "💀 Média Móvel de 7 Dias - Óbitos"),
+        "Crescimento Semanal % - Casos (Linha)":
+            ('new_cases', 'week_over_week_growth', "📊 Crescimento Semanal dos Casos (%)"),
+        "Tempo de Duplicação - Casos (Linha)":
+            ('new_cases', 'doubling_time', "⏱️ Tempo de Duplicação dos Casos (dias)"),
+        "Razão Rt Estimada - Casos (Linha)":
+            ('new_cases', 'rt_ratio', "🦠 Razão Tipo Rt dos Casos"),
+    }
+
+    def __init__(self, root: 'tk.Tk', processor: Optional[FlexibleDataProcessor] = None):
+        _import_tkinter()
         self.root = root
-        self.processor = FlexibleDataProcessor()
+        # Sem processador, usa as mesmas opções padrão da linha de comando
+        self.processor = processor or create_processor(_build_cli_parser().parse_args([]))
         self.chart = None
+        self._watch_job = None
         self.setup_ui()
         self.load_initial_data()
 
@@ -794,6 +4305,9 @@ class FlexibleMainApplication:
         ttk.Button(button_frame1, text="🔍 Analisar Estrutura",
                    command=self.analyze_structure).pack(side="left", padx=5)
 
+        ttk.Button(button_frame1, text="🧹 Limpar Cache",
+                   command=self.clear_cache).pack(side="left", padx=5)
+
         # Segunda linha - seletor de gráfico
         button_frame2 = ttk.Frame(control_frame)
         button_frame2.pack(fill="x")
@@ -809,17 +4323,50 @@ class FlexibleMainApplication:
             "Óbitos Acumulados por Mês (Linha)",
             "Vacinados Acumulados por Mês (Linha)",
             "Comparativo Casos vs Óbitos (Barras)",
-            "Tendência Mensal (Linha)"
+            "Tendência Mensal (Linha)",
+            *self.ROLLING_CHARTS
         ]
         self.chart_type.pack(side="left", padx=5)
         self.chart_type.set("Casos Novos por Mês (Barras)")
 
+        ttk.Label(button_frame2, text="Município:").pack(side="left", padx=(10, 5))
+
+        self.municipality_filter = ttk.Combobox(button_frame2, width=25, state="readonly")
+        self.municipality_filter['values'] = [self.ALL_MUNICIPALITIES]
+        self.municipality_filter.pack(side="left", padx=5)
+        self.municipality_filter.set(self.ALL_MUNICIPALITIES)
+        self.municipality_filter.bind("<<ComboboxSelected>>", lambda event: self.refresh_data())
+
         ttk.Button(button_frame2, text="📈 Gerar Gráfico",
                    command=self.generate_chart).pack(side="left", padx=5)
 
         ttk.Button(button_frame2, text="🔄 Atualizar",
                    command=self.refresh_data).pack(side="left", padx=5)
 
+        self.watch_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(button_frame2, text="👁️ Acompanhar arquivo", variable=self.watch_var,
+                        command=self.toggle_file_watch).pack(side="left", padx=5)
+
+        # Terceira linha - intervalo de datas
+        button_frame3 = ttk.Frame(control_frame)
+        button_frame3.pack(fill="x", pady=(5, 0))
+
+        ttk.Label(button_frame3, text="Período (DD/MM/AAAA) de:").pack(side="left", padx=(0, 5))
+        self.date_start_entry = ttk.Entry(button_frame3, width=12)
+        self.date_start_entry.pack(side="left", padx=5)
+        self.date_start_entry.bind("<Return>", lambda event: self.apply_date_range())
+
+        ttk.Label(button_frame3, text="até:").pack(side="left", padx=5)
+        self.date_end_entry = ttk.Entry(button_frame3, width=12)
+        self.date_end_entry.pack(side="left", padx=5)
+        self.date_end_entry.bind("<Return>", lambda event: self.apply_date_range())
+
+        ttk.Button(button_frame3, text="📅 Aplicar Período",
+                   command=self.apply_date_range).pack(side="left", padx=5)
+
+        ttk.Button(button_frame3, text="✖ Todo o Período",
+                   command=self.clear_date_range).pack(side="left", padx=5)
+
         # Frame do meio - informações
         info_frame = ttk.LabelFrame(main_frame, text="Informações dos Dados Carregados", padding=10)
         info_frame.pack(fill="x", pady=(0, 10))
@@ -885,7 +4432,8 @@ class FlexibleMainApplication:
                                     f"📊 Registros: {len(self.processor.data):,}\n"
                                     f"🏛️ Municípios: {stats.get('unique_municipalities', 'N/A')}\n"
                                     f"📅 Período: {stats.get('date_range', 'N/A')}\n"
-                                    f"📋 Colunas detectadas: {stats.get('columns_detected', 'N/A')}")
+                                    f"📋 Colunas detectadas: {stats.get('columns_detected', 'N/A')}\n"
+                                    f"🔤 Codificação: {self.processor.last_probe.encoding}")
 
                 if self.chart:
                     self.generate_chart()
@@ -910,40 +4458,26 @@ class FlexibleMainApplication:
         )
 
         if file_path:
-            encodings_tried = []
-            content = None
-
-            # Tenta múltiplas codificações
-            for encoding in ['utf-8', 'utf-8-sig', 'latin1', 'cp1252', 'iso-8859-1']:
-                try:
-                    with open(file_path, 'r', encoding=encoding) as file:
-                        content = file.read()
-                        encodings_tried.append(f"✅ {encoding}")
-                        break
-                except UnicodeDecodeError:
-                    encodings_tried.append(f"❌ {encoding}")
-                    continue
-                except Exception as e:
-                    encodings_tried.append(f"❌ {encoding} ({str(e)})")
-                    continue
-
-            if content and self.processor.load_data_from_text(content):
+            if self.processor.load_from_csv_file(file_path):
                 self.update_info_display()
                 stats = self.processor.get_statistics()
+                probe = self.processor.last_probe
 
                 messagebox.showinfo("✅ Texto Processado",
                                     f"Arquivo de texto carregado!\n\n"
                                     f"📁 Arquivo: {file_path.split('/')[-1]}\n"
                                     f"📊 Registros: {len(self.processor.data):,}\n"
-                                    f"🔤 Codificação usada: {encodings_tried[-1]}\n"
+                                    f"🔤 Codificação usada: {probe.encoding if probe else 'N/A'}\n"
                                     f"📋 Colunas: {stats.get('columns_detected', 'N/A')}")
 
                 if self.chart:
                     self.generate_chart()
             else:
+                probe = self.processor.last_probe
+                details = "\n".join(probe.describe()) if probe else "Arquivo não pôde ser aberto"
                 messagebox.showerror("❌ Erro de Leitura",
                                      f"Não foi possível ler o arquivo.\n\n"
-                                     f"Codificações tentadas:\n" + "\n".join(encodings_tried))
+                                     f"Sondagem do arquivo:\n{details}")
 
     def export_csv_data(self):
         """Exporta dados atuais para arquivo CSV"""
@@ -957,21 +4491,81 @@ class FlexibleMainApplication:
             filetypes=[
                 ("Arquivo CSV", "*.csv"),
                 ("Arquivo TSV", "*.tsv"),
+                ("CSV compactado (gzip)", "*.csv.gz"),
+                ("TSV compactado (gzip)", "*.tsv.gz"),
+                ("CSV compactado (xz)", "*.csv.xz"),
                 ("Todos os arquivos", "*.*")
             ]
         )
 
         if file_path:
-            if self.processor.export_to_csv(file_path):
-                stats = self.processor.get_statistics()
+            # Linhas agregadas (estado) separadas pela normalização: o usuário escolhe
+            aggregate_rows = self.processor.aggregate_row_count
+            include_aggregates = bool(aggregate_rows) and messagebox.askyesno(
+                "🧮 Linhas Agregadas",
+                f"O arquivo tem {aggregate_rows:,} linhas agregadas (estado) separadas dos municípios.\n\n"
+                f"Incluí-las no fim do arquivo exportado?")
+            if self.processor.export_to_csv(file_path, include_aggregates=include_aggregates):
+                delimiter, compression = self.processor.export_format(file_path)
+                file_format = "TSV" if delimiter == '\t' else "CSV"
+                if compression:
+                    file_format += f" ({compression})"
+                exported = len(self.processor.data) + (aggregate_rows if include_aggregates else 0)
+                if not aggregate_rows:
+                    aggregate_note = ""
+                elif include_aggregates:
+                    aggregate_note = f"🧮 Incluindo {aggregate_rows:,} linhas agregadas (estado)\n"
+                else:
+                    aggregate_note = f"🧮 Linhas agregadas (estado) não exportadas: {aggregate_rows:,}\n"
                 messagebox.showinfo("💾 Exportação Concluída",
                                     f"Dados exportados com sucesso!\n\n"
                                     f"📁 Arquivo: {file_path.split('/')[-1]}\n"
-                                    f"📊 Registros exportados: {len(self.processor.data):,}\n"
-                                    f"📋 Formato: CSV UTF-8")
+                                    f"📊 Registros exportados: {exported:,}\n"
+                                    f"{aggregate_note}"
+                                    f"📋 Formato: {file_format} UTF-8")
             else:
                 messagebox.showerror("❌ Erro de Exportação", "Erro ao salvar o arquivo CSV")
 
+    def toggle_file_watch(self):
+        """Liga ou desliga o acompanhamento do arquivo carregado"""
+        if self._watch_job is not None:
+            self.root.after_cancel(self._watch_job)
+            self._watch_job = None
+
+        if not self.watch_var.get():
+            return
+
+        if not self.processor.source_path:
+            messagebox.showwarning("⚠️ Aviso", "Carregue um arquivo antes de acompanhá-lo")
+            self.watch_var.set(False)
+            return
+
+        self._watch_job = self.root.after(self.WATCH_INTERVAL_MS, self.poll_watched_file)
+
+    def poll_watched_file(self):
+        """Anexa as linhas novas do arquivo acompanhado e atualiza a tela"""
+        self._watch_job = None
+        if not self.watch_var.get() or not self.processor.source_path:
+            return
+
+        if self.processor.append_from_file() > 0:
+            self.update_info_display()
+            if self.chart:
+                self.generate_chart()
+
+        self._watch_job = self.root.after(self.WATCH_INTERVAL_MS, self.poll_watched_file)
+
+    def clear_cache(self):
+        """Remove os arquivos processados guardados em cache"""
+        # Com o cache desligado, ainda limpa as entradas de execuções anteriores
+        cache = self.processor.cache or DatasetCache()
+        removed = cache.clear()
+        messagebox.showinfo("🧹 Cache Limpo",
+                            f"Entradas removidas: {removed}\n\n"
+                            f"📁 Pasta: {cache.cache_dir}"
+                            + ("" if self.processor.cache else "\n\nO cache está desligado (use --cache ou "
+                                                               "COVID_ANALYZER_CACHE=1)."))
+
     def analyze_structure(self):
         """Analisa e mostra a estrutura dos dados carregados"""
         if not self.processor.data:
@@ -996,6 +4590,17 @@ class FlexibleMainApplication:
         canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
         canvas.configure(yscrollcommand=scrollbar.set)
 
+        # Resultado da sondagem do arquivo (sem reprocessar)
+        probe = self.processor.last_probe
+        if probe is not None:
+            probe_frame = ttk.LabelFrame(scrollable_frame, text="🔎 Sondagem do Arquivo", padding=10)
+            probe_frame.pack(fill="x", padx=10, pady=5)
+
+            ttk.Label(probe_frame, text=f"Arquivo: {os.path.basename(probe.file_path)}",
+                      font=("Arial", 10, "bold")).pack(anchor="w")
+            for line in probe.describe():
+                ttk.Label(probe_frame, text=line).pack(anchor="w", padx=20)
+
         # Análise de colunas originais
         columns_frame = ttk.LabelFrame(scrollable_frame, text="📋 Colunas Detectadas", padding=10)
         columns_frame.pack(fill="x", padx=10, pady=5)
@@ -1029,6 +4634,43 @@ class FlexibleMainApplication:
             status = "✅" if original_column != "❌ Não encontrado" else "❌"
             ttk.Label(mapping_frame, text=f"{status} {description}: {original_column}").pack(anchor="w")
 
+        # Feed só com acumulados: métricas derivadas e linhas agregadas separadas
+        normalizer = self.processor.feed_normalizer
+        if normalizer is not None:
+            feed_frame = ttk.LabelFrame(scrollable_frame, text="🧮 Normalização do Feed", padding=10)
+            feed_frame.pack(fill="x", padx=10, pady=5)
+            for new_field, accumulated_field in normalizer.derived_fields:
+                ttk.Label(feed_frame, text=f"• {mapping_info[new_field]}: derivados de "
+                                           f"{reverse_mapping[accumulated_field]}").pack(anchor="w")
+            if normalizer.derived_fields:
+                ttk.Label(feed_frame, text=f"• Correções (deltas negativos): {normalizer.corrections:,}"
+                          ).pack(anchor="w")
+            state_rows = len(self.processor.state_store) if self.processor.state_store is not None else 0
+            ttk.Label(feed_frame, text=f"• Linhas agregadas (estado) separadas: {state_rows:,}").pack(anchor="w")
+
+        # Memória por registro, com as colunas extras codificadas por dicionário
+        report = self.processor.store.memory_report()
+        memory_frame = ttk.LabelFrame(scrollable_frame, text="💾 Memória", padding=10)
+        memory_frame.pack(fill="x", padx=10, pady=5)
+        ttk.Label(memory_frame, text=f"Bytes por registro: {report['after_per_record']:.1f} "
+                                     f"(sem codificação: {report['before_per_record']:.1f})",
+                  font=("Arial", 10, "bold")).pack(anchor="w")
+        for column in self.processor.store.extra_columns:
+            info = report['columns'][column]
+            ttk.Label(memory_frame, text=f"• {column}: {info['encoding']}, "
+                                         f"{info['after'] / max(report['rows'], 1):.1f} bytes/registro"
+                      ).pack(anchor="w", padx=20)
+
+        # Tempo por etapa da última carga e caminhos de fallback tomados
+        load_report = self.processor.last_load_report
+        if load_report is not None:
+            load_frame = ttk.LabelFrame(scrollable_frame, text="⏱️ Relatório de Carga", padding=10)
+            load_frame.pack(fill="x", padx=10, pady=5)
+            lines = load_report.describe()
+            ttk.Label(load_frame, text=lines[0], font=("Arial", 10, "bold")).pack(anchor="w")
+            for line in lines[1:]:
+                ttk.Label(load_frame, text=f"• {line}").pack(anchor="w", padx=20)
+
         # Amostra de dados
         sample_frame = ttk.LabelFrame(scrollable_frame, text="📊 Amostra dos Dados (Primeiros 5 registros)", padding=10)
         sample_frame.pack(fill="both", expand=True, padx=10, pady=5)
@@ -1090,16 +4732,85 @@ class FlexibleMainApplication:
         else:
             print("❌ Erro ao carregar dados de exemplo")
 
+    def selected_municipality(self) -> Optional[str]:
+        """Município escolhido no filtro (None para todos)"""
+        municipality = self.municipality_filter.get()
+        return None if municipality in ("", self.ALL_MUNICIPALITIES) else municipality
+
+    def selected_date_range(self) -> Tuple[Optional[int], Optional[int]]:
+        """Ordinais das datas de início e fim digitadas (None quando em branco)
+
+        Uma data que não pode ser interpretada é avisada e apagada do campo, para
+        que todos os chamadores (informações, gráfico, recarga) usem o mesmo período.
+        """
+        ordinals = []
+        for entry in (self.date_start_entry, self.date_end_entry):
+            value = entry.get().strip()
+            ordinal = None
+            if value:
+                try:
+                    ordinal = DateParser.parse_any(value).toordinal()
+                except ValueError:
+                    entry.delete(0, "end")
+                    messagebox.showwarning("⚠️ Data inválida",
+                                           f"Não foi possível interpretar a data: {value}\n"
+                                           f"O campo foi limpo e o período ignorado.")
+            ordinals.append(ordinal)
+        return ordinals[0], ordinals[1]
+
+    def apply_date_range(self):
+        """Aplica o período digitado (validado em selected_date_range) a informações e gráfico"""
+        self.refresh_data()
+
+    def clear_date_range(self):
+        """Volta a considerar todo o período dos dados"""
+        self.date_start_entry.delete(0, "end")
+        self.date_end_entry.delete(0, "end")
+        self.refresh_data()
+
+    def update_municipality_filter(self):
+        """Atualiza as opções do filtro com os municípios carregados"""
+        values = [self.ALL_MUNICIPALITIES] + self.processor.get_municipalities()
+        self.municipality_filter['values'] = values
+        if self.municipality_filter.get() not in values:
+            self.municipality_filter.set(self.ALL_MUNICIPALITIES)
+
     def update_info_display(self):
         """Atualiza as informações exibidas na interface"""
+        self.update_municipality_filter()
         if not self.processor.data:
             self.info_label.config(text="Nenhum dado carregado")
             return
 
-        stats = self.processor.get_statistics()
+        municipality = self.selected_municipality()
+        start, end = self.selected_date_range()
+        if start or end:
+            # Totais do período pelo índice por data (buscas binárias)
+            stats = self.processor.range_stats(start, end, municipality)
+            if not stats:
+                self.info_label.config(text="Nenhum registro no período selecionado")
+                return
+            scope = f"🏛️ Município: {municipality}" if municipality else "🏛️ Todos os municípios"
+            self.info_label.config(text=(
+                f"📅 Período: {stats['date_range']} | "
+                f"📊 Registros: {stats['total_records']:,} | "
+                f"{scope} | "
+                f"📈 Novos casos: {stats['total_new_cases']:,} | "
+                f"💀 Novos óbitos: {stats['total_new_deaths']:,} | "
+                f"💊 Taxa mortalidade: {stats['mortality_rate']:.2f}%"
+            ))
+            return
+
+        if municipality:
+            stats = self.processor.get_municipality_statistics(municipality)
+            scope = f"🏛️ Município: {municipality}"
+        else:
+            stats = self.processor.get_statistics()
+            scope = f"🏛️ Municípios: {stats['unique_municipalities']}"
+
         info_text = (
             f"📊 Registros: {stats['total_records']:,} | "
-            f"🏛️ Municípios: {stats['unique_municipalities']} | "
+            f"{scope} | "
             f"📅 Período: {stats['date_range']} | "
             f"📈 Novos casos: {stats['total_new_cases']:,} | "
             f"💀 Novos óbitos: {stats['total_new_deaths']:,} | "
@@ -1172,7 +4883,7 @@ class FlexibleMainApplication:
             tree.heading(col, text=col)
             tree.column(col, width=140)
 
-        for month, data in sorted(monthly_summary.items()):
+        for month, data in monthly_summary.items():
             tree.insert('', 'end', values=(
                 month,
                 f"{data['new_cases']:,}",
@@ -1208,63 +4919,102 @@ class FlexibleMainApplication:
             ttk.Label(struct_content, text=f"• {original_col} → {mapped_type}",
                       font=("Arial", 10)).pack(anchor="w", padx=20)
 
+        # Aba 4: Ranking de Municípios
+        ranking_frame = ttk.Frame(notebook)
+        notebook.add(ranking_frame, text="🏆 Municípios")
+
+        rankings = [
+            ("📈 Mais novos casos", 'new_cases'),
+            ("💀 Mais novos óbitos", 'new_deaths'),
+            ("🔺 Maior número de casos acumulados", 'accumulated_cases'),
+        ]
+        for title, metric in rankings:
+            ranking_content = ttk.LabelFrame(ranking_frame, text=title, padding=10)
+            ranking_content.pack(fill="x", padx=10, pady=5)
+
+            for position, (name, value) in enumerate(self.processor.top_k_municipalities(metric, 10), start=1):
+                ttk.Label(ranking_content, text=f"{position}. {name}: {value:,}",
+                          font=("Arial", 10)).pack(anchor="w", padx=20)
+
     def generate_chart(self):
         """Gera gráfico baseado na seleção do usuário"""
         if not self.processor.data or not self.chart:
             return
 
         chart_selection = self.chart_type.get()
-        monthly_summary = self.processor.get_monthly_summary()
+        municipality = self.selected_municipality()
+        start, end = self.selected_date_range()
+        monthly_summary = self.processor.get_monthly_summary(municipality, start, end)
+        scope_parts = [municipality] if municipality else []
+        if start or end:
+            start_label, end_label = (date.fromordinal(ordinal).strftime('%d/%m/%Y') if ordinal else '...'
+                                      for ordinal in (start, end))
+            scope_parts.append(f"{start_label} a {end_label}")
+        scope = ", ".join(scope_parts)
 
         if not monthly_summary:
             return
 
         try:
-            if "Casos Novos" in chart_selection:
-                data = {month: summary['new_cases'] for month, summary in sorted(monthly_summary.items())}
-                self.chart.draw_bar_chart(data, "📈 Novos Casos por Mês")
+            if chart_selection in self.ROLLING_CHARTS:
+                metric, series, title = self.ROLLING_CHARTS[chart_selection]
+                rolling = self.processor.rolling_metrics(municipality, metric)
+                data = rolling.series(series, start, end) if rolling else {}
+                self.chart.draw_line_chart(data, self._chart_title(title, scope))
+
+            elif "Casos Novos" in chart_selection:
+                data = {month: summary['new_cases'] for month, summary in monthly_summary.items()}
+                self.chart.draw_bar_chart(data, self._chart_title("📈 Novos Casos por Mês", scope))
 
             elif "Óbitos Novos" in chart_selection:
-                data = {month: summary['new_deaths'] for month, summary in sorted(monthly_summary.items())}
-                self.chart.draw_bar_chart(data, "💀 Novos Óbitos por Mês")
+                data = {month: summary['new_deaths'] for month, summary in monthly_summary.items()}
+                self.chart.draw_bar_chart(data, self._chart_title("💀 Novos Óbitos por Mês", scope))
 
             elif "Vacinados Novos" in chart_selection:
-                data = {month: summary['new_vaccinated'] for month, summary in sorted(monthly_summary.items())}
-                self.chart.draw_bar_chart(data, "💉 Novos Vacinados por Mês")
+                data = {month: summary['new_vaccinated'] for month, summary in monthly_summary.items()}
+                self.chart.draw_bar_chart(data, self._chart_title("💉 Novos Vacinados por Mês", scope))
 
             elif "Casos Acumulados" in chart_selection:
-                data = {month: summary['max_accumulated_cases'] for month, summary in sorted(monthly_summary.items())}
-                self.chart.draw_line_chart(data, "📊 Casos Acumulados por Mês")
+                data = {month: summary['max_accumulated_cases'] for month, summary in monthly_summary.items()}
+                self.chart.draw_line_chart(data, self._chart_title("📊 Casos Acumulados por Mês", scope))
 
             elif "Óbitos Acumulados" in chart_selection:
-                data = {month: summary['max_accumulated_deaths'] for month, summary in sorted(monthly_summary.items())}
-                self.chart.draw_line_chart(data, "📉 Óbitos Acumulados por Mês")
+                data = {month: summary['max_accumulated_deaths'] for month, summary in monthly_summary.items()}
+                self.chart.draw_line_chart(data, self._chart_title("📉 Óbitos Acumulados por Mês", scope))
 
             elif "Vacinados Acumulados" in chart_selection:
-                data = {month: summary['max_accumulated_vaccinated'] for month, summary in
-                        sorted(monthly_summary.items())}
-                self.chart.draw_line_chart(data, "💉 Vacinados Acumulados por Mês")
+                data = {month: summary['max_accumulated_vaccinated']
+                        for month, summary in monthly_summary.items()}
+                self.chart.draw_line_chart(data, self._chart_title("💉 Vacinados Acumulados por Mês", scope))
 
             elif "Comparativo" in chart_selection:
                 data = {}
-                for month, summary in sorted(monthly_summary.items()):
+                for month, summary in monthly_summary.items():
                     data[f"{month}(C)"] = summary['new_cases']
                     data[f"{month}(O)"] = summary['new_deaths']
-                self.chart.draw_bar_chart(data, "⚖️ Casos vs Óbitos por Mês")
+                self.chart.draw_bar_chart(data, self._chart_title("⚖️ Casos vs Óbitos por Mês", scope))
 
             elif "Tendência" in chart_selection:
-                data = {month: summary['new_cases'] + summary['new_deaths'] for month, summary in
-                        sorted(monthly_summary.items())}
-                self.chart.draw_line_chart(data, "📈 Tendência Geral (Casos + Óbitos)")
+                data = {month: summary['new_cases'] + summary['new_deaths']
+                        for month, summary in monthly_summary.items()}
+                self.chart.draw_line_chart(data, self._chart_title("📈 Tendência Geral (Casos + Óbitos)", scope))
 
         except Exception as e:
             print(f"Erro ao gerar gráfico: {e}")
             messagebox.showerror("Erro", f"Erro ao gerar gráfico: {str(e)}")
 
+    @staticmethod
+    def _chart_title(title: str, scope: str) -> str:
+        """Acrescenta o filtro aplicado (município, período) ao título do gráfico"""
+        return f"{title} - {scope}" if scope else title
 
-def main():
-    """Função principal da aplicação"""
-    root = tk.Tk()
+
+def run_gui(args: Optional[argparse.Namespace] = None):
+    """Abre a interface gráfica com as opções de carga da linha de comando"""
+    args = args or _build_cli_parser().parse_args([])
+    if args.backend:
+        set_compute_backend(args.backend)
+    root = _import_tkinter().Tk()
 
     # Configura ícone se disponível
     try:
@@ -1272,7 +5022,7 @@ def main():
     except:
         pass
 
-    app = FlexibleMainApplication(root)
+    app = FlexibleMainApplication(root, create_processor(args))
 
     # Centraliza a janela
     root.update_idletasks()
@@ -1285,5 +5035,14 @@ def main():
     root.mainloop()
 
 
+def main(argv: Optional[List[str]] = None) -> int:
+    """Função principal da aplicação: interface gráfica ou, com arquivos, modo em lote"""
+    args = _build_cli_parser().parse_args(argv)
+    if not args.files:
+        run_gui(args)
+        return 0
+    return run_cli(args)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
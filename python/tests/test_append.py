@@ -0,0 +1,70 @@
+"""Leitura incremental: append_from_file deve equivaler a uma carga completa"""
+import pytest
+
+import benchmark_covid
+from covid_analyzer import FlexibleDataProcessor
+
+LOAD_MODES = {
+    'sequencial': {},
+    'mmap': {'use_mmap': True},
+    'paralelo': {'workers': 2},
+}
+
+
+def store_rows(processor):
+    store = processor.store
+    names = [store.municipalities[code] for code in store.municipality_codes]
+    return list(store.dates), names, {field: list(values) for field, values in store.metrics.items()}
+
+
+def assert_same_as_full_load(processor, path):
+    full = FlexibleDataProcessor()
+    assert full.load_from_csv_file(path)
+    assert store_rows(processor) == store_rows(full)
+    assert processor.get_statistics() == full.get_statistics()
+    assert processor.source_offset == full.source_offset
+
+
+@pytest.fixture
+def synthetic_lines(tmp_path):
+    path = tmp_path / 'completo.csv'
+    benchmark_covid.write_synthetic_csv(str(path), 3_000)
+    return path.read_bytes().splitlines(keepends=True)
+
+
+@pytest.fixture(params=sorted(LOAD_MODES))
+def processor(request, monkeypatch):
+    # Arquivos pequenos também passam pelo modo paralelo
+    monkeypatch.setattr(FlexibleDataProcessor, 'PARALLEL_MIN_BYTES', 0)
+    return FlexibleDataProcessor(**LOAD_MODES[request.param])
+
+
+def test_append_equals_full_reload(tmp_path, synthetic_lines, processor):
+    path = tmp_path / 'dados.csv'
+    path.write_bytes(b''.join(synthetic_lines[:2_000]))
+    assert processor.load_from_csv_file(str(path))
+
+    with open(path, 'ab') as file:
+        file.write(b''.join(synthetic_lines[2_000:]))
+    assert processor.append_from_file() == len(synthetic_lines) - 2_000
+    assert_same_as_full_load(processor, str(path))
+    processor.close_line_index()
+
+
+def test_partial_last_line_waits_for_append(tmp_path, synthetic_lines, processor):
+    path = tmp_path / 'dados.csv'
+    head = b''.join(synthetic_lines[:2_000])
+    partial = synthetic_lines[2_000][:12]
+    path.write_bytes(head + partial)
+
+    assert processor.load_from_csv_file(str(path))
+    assert len(processor.store) == 2_000 - 1
+    assert processor.source_offset == len(head)
+    assert processor.last_probe.pending_bytes == len(partial)
+
+    # A linha é concluída e outras chegam depois
+    with open(path, 'ab') as file:
+        file.write(synthetic_lines[2_000][12:] + b''.join(synthetic_lines[2_001:]))
+    assert processor.append_from_file() == len(synthetic_lines) - 2_000
+    assert_same_as_full_load(processor, str(path))
+    processor.close_line_index()
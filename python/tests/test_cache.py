@@ -0,0 +1,95 @@
+"""Cache binário de arquivos processados (DatasetCache)"""
+import os
+import shutil
+
+import pytest
+
+import benchmark_covid
+from covid_analyzer import DatasetCache, FlexibleDataProcessor
+
+
+def store_rows(store):
+    if store is None:
+        return None
+    extras = {name: list(values) for name, values in store.extra_values.items()}
+    return list(store.dates), list(store.municipality_codes), store.municipalities, dict(store.metrics), extras
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DatasetCache(str(tmp_path / 'cache'))
+
+
+@pytest.mark.parametrize('source', benchmark_covid.example_files(), ids=os.path.basename)
+def test_round_trip_matches_parsed_load(source, tmp_path, cache):
+    path = str(tmp_path / os.path.basename(source))
+    shutil.copyfile(source, path)
+
+    parsed = FlexibleDataProcessor(cache=cache)
+    assert parsed.load_from_csv_file(path)
+    assert parsed.last_load_report.mode != 'cache'
+
+    cached = FlexibleDataProcessor(cache=cache)
+    assert cached.load_from_csv_file(path)
+    assert cached.last_load_report.mode == 'cache'
+    assert store_rows(cached.store) == store_rows(parsed.store)
+    assert store_rows(cached.state_store) == store_rows(parsed.state_store)
+    assert cached.original_columns == parsed.original_columns
+    assert cached.column_mapping == parsed.column_mapping
+    assert cached.aggregate_row_count == parsed.aggregate_row_count
+    assert cached.get_statistics() == parsed.get_statistics()
+    assert cached.source_offset == parsed.source_offset
+
+
+def test_changed_file_invalidates_entry(tmp_path, cache):
+    path = str(tmp_path / 'dados.csv')
+    benchmark_covid.write_synthetic_csv(path, 500)
+    processor = FlexibleDataProcessor(cache=cache)
+    assert processor.load_from_csv_file(path)
+    assert cache.load(path) is not None
+
+    # Mesmo tamanho, conteúdo diferente: o hash não coincide
+    with open(path, 'r+b') as file:
+        file.seek(-3, os.SEEK_END)
+        file.write(b'99\n')
+    assert cache.load(path) is None
+
+    reloaded = FlexibleDataProcessor(cache=cache)
+    assert reloaded.load_from_csv_file(path)
+    assert reloaded.last_load_report.mode != 'cache'
+    assert reloaded.store.metrics['accumulated_vaccinated'][-1] % 100 == 99
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = DatasetCache(str(tmp_path / 'cache'), max_entries=2)
+    paths = []
+    for name in ('a', 'b', 'c'):
+        path = str(tmp_path / f'{name}.csv')
+        benchmark_covid.write_synthetic_csv(path, 200, seed=ord(name))
+        paths.append(path)
+
+    processor = FlexibleDataProcessor(cache=cache)
+    for age, path in zip((200, 100), paths[:2]):
+        assert processor.load_from_csv_file(path)
+        entry = cache._entry_path(path)
+        old = os.stat(entry).st_mtime - age
+        os.utime(entry, (old, old))
+
+    # Ler 'a' do cache o torna o mais recente; 'b' passa a ser o menos usado
+    assert cache.load(paths[0]) is not None
+    assert processor.load_from_csv_file(paths[2])
+
+    assert cache.load(paths[0]) is not None
+    assert cache.load(paths[1]) is None
+    assert cache.load(paths[2]) is not None
+
+
+def test_clear_removes_all_entries(tmp_path, cache):
+    for name in ('a', 'b'):
+        path = str(tmp_path / f'{name}.csv')
+        benchmark_covid.write_synthetic_csv(path, 200, seed=ord(name))
+        assert FlexibleDataProcessor(cache=cache).load_from_csv_file(path)
+
+    assert cache.clear() == 2
+    assert cache.clear() == 0
+    assert not [name for name in os.listdir(cache.cache_dir) if name.endswith(DatasetCache.FILE_SUFFIX)]
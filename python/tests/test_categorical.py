@@ -0,0 +1,39 @@
+"""Coluna categórica (CategoricalColumn): códigos e dicionário"""
+import os
+import subprocess
+import sys
+
+import covid_analyzer
+from covid_analyzer import CategoricalColumn
+
+SCRIPT = ("from covid_analyzer import CategoricalColumn; "
+          "column = CategoricalColumn(['Aracaju', 'Lagarto']); "
+          "column.extend(['Itabaiana', 'Aracaju', 'Estância', 'Itabaiana', 'Propriá', 'Lagarto']); "
+          "print(column.categories, list(column.codes))")
+
+
+def test_new_values_get_codes_in_first_seen_order():
+    column = CategoricalColumn(['b', 'a'])
+    column.extend(['c', 'a', 'e', 'c', 'd'])
+    assert column.categories == ['b', 'a', 'c', 'e', 'd']
+    assert list(column.codes) == [0, 1, 2, 1, 3, 2, 4]
+    assert list(column) == ['b', 'a', 'c', 'a', 'e', 'c', 'd']
+
+
+def test_codes_do_not_depend_on_hash_seed():
+    outputs = set()
+    for seed in ('0', '1', '2'):
+        result = subprocess.run([sys.executable, '-c', SCRIPT], capture_output=True, text=True, check=True,
+                                env={'PYTHONHASHSEED': seed,
+                                     'PYTHONPATH': os.path.dirname(os.path.abspath(covid_analyzer.__file__))})
+        outputs.add(result.stdout)
+    assert len(outputs) == 1
+
+
+def test_codes_widen_past_one_byte():
+    column = CategoricalColumn(str(i) for i in range(300))
+    assert column.codes.typecode == 'H'
+    assert column[299] == '299'
+    column.extend(['0', '299', 'novo'])
+    assert column[-3:] == ['0', '299', 'novo']
+    assert column.categories[-1] == 'novo'
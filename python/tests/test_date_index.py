@@ -0,0 +1,110 @@
+"""Índice por data com somas prefixadas (DateIndex) e range_stats"""
+import itertools
+import random
+from datetime import date
+
+import pytest
+
+import benchmark_covid
+from covid_analyzer import (DateIndex, FlexibleDataProcessor, get_compute_backend, set_compute_backend,
+                            _import_numpy)
+
+BACKENDS = ['python'] + (['numpy'] if _import_numpy() is not None else [])
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    previous = get_compute_backend()
+    set_compute_backend(request.param)
+    yield request.param
+    set_compute_backend(previous if previous == 'python' else 'auto')
+
+
+@pytest.fixture(scope='module')
+def synthetic_csv(tmp_path_factory):
+    path = tmp_path_factory.mktemp('datas') / 'dados.csv'
+    benchmark_covid.write_synthetic_csv(str(path), 5_000)
+    return str(path)
+
+
+def brute_force_totals(store, start, end, rows=None):
+    rows = range(len(store)) if rows is None else rows
+    selected = [row for row in rows if (start is None or store.dates[row] >= start)
+                and (end is None or store.dates[row] <= end)]
+    totals = {field: sum(store.metrics[field][row] for row in selected) for field in DateIndex.SUM_FIELDS}
+    totals['records'] = len(selected)
+    totals['first_date'] = min((store.dates[row] for row in selected), default=None)
+    totals['last_date'] = max((store.dates[row] for row in selected), default=None)
+    return totals
+
+
+def test_prefix_sums_match_cumulative_sums(synthetic_csv, backend):
+    processor = FlexibleDataProcessor()
+    assert processor.load_from_csv_file(synthetic_csv)
+    index = processor.date_index()
+    store = processor.store
+
+    assert list(index.dates) == sorted(store.dates)
+    assert sorted(index.order) == list(range(len(store)))
+    for field in DateIndex.SUM_FIELDS:
+        values = [store.metrics[field][row] for row in index.order]
+        assert list(index.prefix[field]) == [0] + list(itertools.accumulate(values))
+
+
+def test_range_totals_match_brute_force(synthetic_csv, backend):
+    processor = FlexibleDataProcessor()
+    assert processor.load_from_csv_file(synthetic_csv)
+    index = processor.date_index()
+    first, last = index.dates[0], index.dates[-1]
+
+    rng = random.Random(7)
+    ranges = [(None, None), (first, first), (last, last), (first - 10, first - 1), (last + 1, last + 10),
+              (last, first), (None, first + 5), (last - 5, None)]
+    ranges += [tuple(sorted(rng.randint(first - 3, last + 3) for _ in range(2))) for _ in range(50)]
+    for start, end in ranges:
+        assert index.range_totals(start, end) == brute_force_totals(processor.store, start, end)
+
+
+def test_range_stats_accepts_dates_and_municipality(synthetic_csv, backend):
+    processor = FlexibleDataProcessor()
+    assert processor.load_from_csv_file(synthetic_csv)
+    store = processor.store
+    start, end = date(2020, 3, 5), date(2020, 3, 20)
+
+    stats = processor.range_stats(start, end)
+    expected = brute_force_totals(store, start.toordinal(), end.toordinal())
+    assert stats['total_records'] == expected['records']
+    assert stats['total_new_cases'] == expected['new_cases']
+    assert stats['date_range'] == "05/03/2020 - 20/03/2020"
+    assert processor.range_stats('2020-03-05', '20/03/2020') == stats
+    assert processor.range_stats(start.toordinal(), end.toordinal()) == stats
+
+    municipality = 'Município 007'
+    rows = processor.municipality_index.rows_for(municipality)
+    expected = brute_force_totals(store, start.toordinal(), end.toordinal(), rows)
+    stats = processor.range_stats(start, end, municipality)
+    assert stats['total_records'] == expected['records']
+    assert stats['total_new_deaths'] == expected['new_deaths']
+
+    assert processor.range_stats(date(2019, 1, 1), date(2019, 12, 31)) == {}
+    assert processor.range_stats(municipality='Inexistente') == {}
+
+
+def test_index_after_out_of_order_append(tmp_path, backend):
+    path = tmp_path / 'dados.csv'
+    benchmark_covid.write_synthetic_csv(str(path), 3_000)
+    lines = path.read_bytes().splitlines(keepends=True)
+    path.write_bytes(b''.join(lines[:2_000]))
+
+    processor = FlexibleDataProcessor()
+    assert processor.load_from_csv_file(str(path))
+    processor.date_index()
+
+    # As últimas linhas do arquivo sintético têm datas atrasadas
+    with open(path, 'ab') as file:
+        file.write(b''.join(lines[2_000:]))
+    assert processor.append_from_file() > 0
+
+    index = processor.date_index()
+    assert list(index.dates) == sorted(processor.store.dates)
+    assert index.range_totals() == brute_force_totals(processor.store, None, None)
@@ -0,0 +1,77 @@
+"""Detecção do formato de data por coluna e conversão com fallback (DateParser)"""
+from datetime import date
+
+import pytest
+
+from covid_analyzer import DateParser, FlexibleDataProcessor
+
+
+@pytest.mark.parametrize('values, expected', [
+    (['2021-03-01', '2021-12-31'], '%Y-%m-%d'),
+    (['01/03/2021', '31/12/2021'], '%d/%m/%Y'),
+    (['03/01/2021', '12/31/2021'], '%m/%d/%Y'),
+    (['20210301', '20211231'], '%Y%m%d'),
+    (['01.03.2021', '31.12.2021', 'sem data'], '%d.%m.%Y'),
+    (['', '  ', 'texto'], None),
+    ([], None),
+])
+def test_detect_format(values, expected):
+    assert DateParser.detect(values) == expected
+
+
+@pytest.mark.parametrize('date_format, text', [
+    ('%Y-%m-%d', '2021-03-05'),
+    ('%d/%m/%Y', '05/03/2021'),
+    ('%m-%d-%Y', '03-05-2021'),
+    ('%Y%m%d', '20210305'),
+    ('%d%m%Y', '05032021'),
+])
+def test_detected_format_parses_without_fallback(date_format, text):
+    parser = DateParser(date_format)
+    assert parser.parse_ordinal(text) == date(2021, 3, 5).toordinal()
+    assert parser.fallback_count == 0
+
+
+@pytest.mark.parametrize('text', ['31/02/2021', '2021-13-01', 'abc', '5/3', '2021-02-30', '00/00/0000'])
+def test_invalid_dates_raise_value_error(text):
+    parser = DateParser('%d/%m/%Y')
+    with pytest.raises(ValueError):
+        parser.parse_ordinal(text)
+    with pytest.raises(ValueError):
+        DateParser.parse_any(text)
+
+
+def test_values_outside_detected_format_fall_back_once():
+    parser = DateParser('%d/%m/%Y')
+    # Fora do formato, mas reconhecido pela busca completa
+    assert parser.parse_ordinal('2021-03-05') == date(2021, 3, 5).toordinal()
+    assert parser.parse_ordinal(' 05/03/2021 ') == date(2021, 3, 5).toordinal()
+    assert parser.fallback_count == 2
+    # Valores repetidos vêm da memória, sem novo fallback
+    parser.parse_ordinal('2021-03-05')
+    assert parser.fallback_count == 2
+
+
+def test_fixed_width_parser_rejects_wrong_separators_and_digits():
+    parser = DateParser('%d/%m/%Y')
+    convert = parser._convert
+    for text in ('05-03-2021', '5/03/2021x', 'ab/03/2021', '05/3/2021'):
+        with pytest.raises(ValueError):
+            convert(text)
+
+
+def test_memo_is_bounded(monkeypatch):
+    monkeypatch.setattr(DateParser, 'MEMO_LIMIT', 3)
+    parser = DateParser('%Y-%m-%d')
+    for day in range(1, 10):
+        parser.parse_ordinal(f"2021-03-{day:02d}")
+    assert len(parser._memo) <= 3
+
+
+def test_loader_keeps_rows_with_dates_in_another_format():
+    text = ("data,municipio,casos_novos\n05/03/2021,Aracaju,1\n06/03/2021,Aracaju,2\n"
+            "2021-03-07,Aracaju,3\n08/03/2021,Aracaju,4\n")
+    processor = FlexibleDataProcessor()
+    assert processor.load_data_from_text(text)
+    assert [date.fromordinal(ordinal) for ordinal in processor.store.dates] == \
+        [date(2021, 3, day) for day in (5, 6, 7, 8)]
@@ -0,0 +1,105 @@
+"""Exportação em CSV/TSV, com compressão gzip ou xz"""
+import csv
+import gzip
+import io
+import lzma
+import os
+
+import pytest
+
+import benchmark_covid
+from covid_analyzer import FlexibleDataProcessor
+
+
+def read_rows(data: bytes, delimiter: str):
+    return list(csv.reader(io.StringIO(data.decode('utf-8'), newline=''), delimiter=delimiter))
+
+
+@pytest.fixture(params=benchmark_covid.example_files(), ids=os.path.basename)
+def processor(request):
+    processor = FlexibleDataProcessor()
+    assert processor.load_from_csv_file(request.param)
+    return processor
+
+
+def test_export_format_from_suffix():
+    assert FlexibleDataProcessor.export_format('dados.csv') == (',', None)
+    assert FlexibleDataProcessor.export_format('dados.TSV') == ('\t', None)
+    assert FlexibleDataProcessor.export_format('dados.tsv.gz') == ('\t', 'gzip')
+    assert FlexibleDataProcessor.export_format('dados.csv.xz') == (',', 'xz')
+    assert FlexibleDataProcessor.export_format('dados.txt') == (',', None)
+
+
+def test_compressed_exports_match_plain_export(processor, tmp_path):
+    plain = tmp_path / 'dados.csv'
+    assert processor.export_to_csv(str(plain))
+    expected = plain.read_bytes()
+
+    assert processor.export_to_csv(str(tmp_path / 'dados.csv.gz'))
+    assert gzip.decompress((tmp_path / 'dados.csv.gz').read_bytes()) == expected
+    assert processor.export_to_csv(str(tmp_path / 'dados.csv.xz'))
+    assert lzma.decompress((tmp_path / 'dados.csv.xz').read_bytes()) == expected
+
+    # Compressão explícita, sem sufixo
+    assert processor.export_to_csv(str(tmp_path / 'dados_gzip.csv'), compression='gzip')
+    assert gzip.decompress((tmp_path / 'dados_gzip.csv').read_bytes()) == expected
+    assert not processor.export_to_csv(str(tmp_path / 'dados.zip'), compression='zip')
+
+
+def test_tsv_has_same_fields_as_csv(processor, tmp_path):
+    assert processor.export_to_csv(str(tmp_path / 'dados.csv'))
+    assert processor.export_to_csv(str(tmp_path / 'dados.tsv.gz'))
+    csv_rows = read_rows((tmp_path / 'dados.csv').read_bytes(), ',')
+    tsv_rows = read_rows(gzip.decompress((tmp_path / 'dados.tsv.gz').read_bytes()), '\t')
+    assert tsv_rows == csv_rows
+    assert len(csv_rows) == 1 + len(processor.store) + processor.aggregate_row_count
+
+
+@pytest.mark.parametrize('name', ['dados.csv', 'dados.tsv'])
+def test_export_round_trip(tmp_path, name):
+    source = str(tmp_path / 'origem.csv')
+    benchmark_covid.write_synthetic_csv(source, 3_000)
+    processor = FlexibleDataProcessor()
+    assert processor.load_from_csv_file(source)
+
+    path = str(tmp_path / name)
+    assert processor.export_to_csv(path)
+    reloaded = FlexibleDataProcessor()
+    assert reloaded.load_from_csv_file(path)
+
+    expected, actual = processor.get_statistics(), reloaded.get_statistics()
+    for key in ('total_records', 'unique_municipalities', 'date_range', 'total_new_cases', 'total_new_deaths',
+                'max_accumulated_cases'):
+        assert actual[key] == expected[key]
+
+
+def test_values_with_delimiters_and_quotes_are_quoted(tmp_path):
+    text = ('data;estado;municipio;casos_novos;obitos_novos\n'
+            '2021-03-01;"Sergipe, com vírgula";Aracaju;1;0\n'
+            '2021-03-02;"aspas ""internas""";Aracaju;2;0\n'
+            '2021-03-03;"tab\taqui";Aracaju;3;1\n')
+    processor = FlexibleDataProcessor()
+    assert processor.load_data_from_text(text)
+
+    for name, delimiter in (('dados.csv', ','), ('dados.tsv.xz', '\t')):
+        path = tmp_path / name
+        assert processor.export_to_csv(str(path))
+        data = path.read_bytes()
+        rows = read_rows(lzma.decompress(data) if name.endswith('.xz') else data, delimiter)
+        states = [row[rows[0].index('estado')] for row in rows[1:]]
+        assert states == ['Sergipe, com vírgula', 'aspas "internas"', 'tab\taqui']
+
+
+def test_aggregate_rows_can_be_left_out(tmp_path):
+    # O arquivo do Java mistura linhas do estado às dos municípios
+    path = next(path for path in benchmark_covid.example_files() if 'java' in os.path.basename(path))
+    processor = FlexibleDataProcessor()
+    assert processor.load_from_csv_file(path)
+    assert processor.aggregate_row_count > 0
+
+    assert processor.export_to_csv(str(tmp_path / 'com.csv.gz'))
+    assert processor.export_to_csv(str(tmp_path / 'sem.csv.gz'), include_aggregates=False)
+    with_aggregates = read_rows(gzip.decompress((tmp_path / 'com.csv.gz').read_bytes()), ',')
+    without = read_rows(gzip.decompress((tmp_path / 'sem.csv.gz').read_bytes()), ',')
+    assert len(with_aggregates) == 1 + len(processor.store) + processor.aggregate_row_count
+    assert with_aggregates[:len(without)] == without
@@ -0,0 +1,107 @@
+"""Agrupamento por período (group_by): ordem, rótulos e valores"""
+import collections
+from datetime import date
+
+import pytest
+
+from covid_analyzer import (AggregationKernel, FlexibleDataProcessor, get_compute_backend, set_compute_backend,
+                            _import_numpy)
+
+BACKENDS = ['python'] + (['numpy'] if _import_numpy() is not None else [])
+
+# Municípios fora de ordem alfabética e datas que cruzam semana ISO, trimestre e ano
+CSV_TEXT = """data,municipio,casos_novos,obitos_novos,vacinados_novos
+2021-01-04,Tobias Barreto,5,1,10
+2020-12-31,Aracaju,3,0,7
+2021-01-03,Tobias Barreto,-2,0,1
+2021-01-03,Aracaju,8,2,0
+2021-04-01,Estância,4,0,2
+2020-12-31,Aracaju,6,1,3
+2021-03-31,Aracaju,1,0,0
+"""
+
+
+@pytest.fixture(params=BACKENDS)
+def processor(request):
+    previous = get_compute_backend()
+    set_compute_backend(request.param)
+    processor = FlexibleDataProcessor()
+    assert processor.load_data_from_text(CSV_TEXT)
+    yield processor
+    set_compute_backend(previous if previous == 'python' else 'auto')
+
+
+def brute_force(store, period, metric, by_municipality):
+    groups = collections.defaultdict(list)
+    for row in range(len(store)):
+        code = AggregationKernel.period_code(store.dates[row], period)
+        name = store.municipalities[store.municipality_codes[row]] if by_municipality else ''
+        groups[(code, name)].append((store.dates[row], store.metrics[metric][row]))
+    result = {}
+    for key, items in groups.items():
+        values = [value for _, value in items]
+        latest = max(ordinal for ordinal, _ in items)
+        result[key] = {'records': len(items), 'sum': sum(values), 'max': max(values), 'min': min(values),
+                       'mean': sum(values) / len(values),
+                       'last': [value for ordinal, value in items if ordinal == latest][-1]}
+    return result
+
+
+@pytest.mark.parametrize('period, labels', [
+    ('day', ['31/12/2020', '03/01/2021', '04/01/2021', '31/03/2021', '01/04/2021']),
+    ('week', ['2020-S53', '2021-S01', '2021-S13']),
+    ('month', ['12/2020', '01/2021', '03/2021', '04/2021']),
+    ('quarter', ['T4/2020', 'T1/2021', 'T2/2021']),
+    ('year', ['2020', '2021']),
+])
+def test_periods_are_chronological_with_labels(processor, period, labels):
+    rows = processor.group_by(period)
+    assert [row['period'] for row in rows] == labels
+    codes = [row['period_code'] for row in rows]
+    assert codes == sorted(codes)
+    assert sum(row['records'] for row in rows) == len(processor.store)
+
+
+def test_municipalities_sorted_by_name_within_period(processor):
+    rows = processor.group_by('quarter', by_municipality=True)
+    keys = [(row['period'], row['municipality']) for row in rows]
+    assert keys == [('T4/2020', 'Aracaju'), ('T1/2021', 'Aracaju'), ('T1/2021', 'Tobias Barreto'),
+                    ('T2/2021', 'Estância')]
+
+
+@pytest.mark.parametrize('by_municipality', [False, True])
+@pytest.mark.parametrize('period', AggregationKernel.PERIODS)
+def test_aggregations_match_brute_force(processor, period, by_municipality):
+    aggregations = AggregationKernel.AGGREGATIONS
+    rows = processor.group_by(period, ('new_cases', 'new_vaccinated'), aggregations, by_municipality)
+    for metric in ('new_cases', 'new_vaccinated'):
+        expected = brute_force(processor.store, period, metric, by_municipality)
+        assert len(rows) == len(expected)
+        for row in rows:
+            group = expected[(row['period_code'], row.get('municipality', ''))]
+            assert row['records'] == group['records']
+            for aggregation in aggregations:
+                assert row[f"{metric}_{aggregation}"] == pytest.approx(group[aggregation])
+
+
+def test_filters_and_invalid_arguments(processor):
+    rows = processor.group_by('month', municipality='Aracaju', start=date(2021, 1, 1))
+    assert [(row['period'], row['new_cases_sum']) for row in rows] == [('01/2021', 8), ('03/2021', 1)]
+
+    with pytest.raises(ValueError):
+        processor.group_by('decade')
+    with pytest.raises(ValueError):
+        processor.group_by('month', aggregations=('median',))
+    with pytest.raises(ValueError):
+        processor.group_by('month', metrics=('casos',))
+
+
+def test_large_sums_stay_exact():
+    np = pytest.importorskip('numpy')
+    kernel = AggregationKernel(FlexibleDataProcessor().store, use_numpy=True)
+    kernel.np = np
+    codes = np.array([0, 1, 0, 1, 0], dtype=np.intp)
+    # Acima de 2 ** 53 o float64 do bincount perderia unidades
+    column = np.array([2 ** 53 + 1, 1, 2 ** 53 + 3, 2, 5], dtype=np.int64)
+    assert kernel._group_sums(codes, column, 2).tolist() == [2 ** 54 + 9, 3]
+    assert kernel._group_sums(codes, np.arange(1, 6, dtype=np.int64), 2).tolist() == [9, 6]
@@ -0,0 +1,71 @@
+"""Resultados derivados guardados (_memoized) e índices por data entre versões dos dados"""
+import benchmark_covid
+from covid_analyzer import FlexibleDataProcessor
+
+
+def growing_processor(tmp_path):
+    path = tmp_path / 'dados.csv'
+    benchmark_covid.write_synthetic_csv(str(path), 2_000)
+    lines = path.read_bytes().splitlines(keepends=True)
+    path.write_bytes(b''.join(lines[:1_000]))
+    processor = FlexibleDataProcessor()
+    assert processor.load_from_csv_file(str(path))
+    return processor, path, lines[1_000:]
+
+
+def test_old_versions_are_dropped(tmp_path):
+    processor, path, new_lines = growing_processor(tmp_path)
+    statistics = processor.get_statistics()
+    processor.get_monthly_summary()
+    processor.group_by('week')
+    assert len(processor._derived) == 3
+
+    with open(path, 'ab') as file:
+        file.write(b''.join(new_lines))
+    assert processor.append_from_file() > 0
+
+    assert processor.get_statistics() is not statistics
+    assert list(processor._derived) == ['statistics']
+    assert processor._derived_version == processor.data_version
+
+
+def test_results_are_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(FlexibleDataProcessor, 'DERIVED_LIMIT', 5)
+    processor, _, _ = growing_processor(tmp_path)
+    first = processor.group_by('day', start=737_500)
+    for offset in range(1, 10):
+        processor.group_by('day', start=737_500 + offset)
+    assert len(processor._derived) == 5
+    # O mais antigo saiu e é recalculado
+    assert processor.group_by('day', start=737_500) is not first
+
+
+def test_date_indexes_are_capped_and_kept_across_appends(tmp_path, monkeypatch):
+    monkeypatch.setattr(FlexibleDataProcessor, 'DATE_INDEX_LIMIT', 3)
+    processor, path, new_lines = growing_processor(tmp_path)
+    names = processor.get_municipalities()[:5]
+    for name in names:
+        processor.range_stats(municipality=name)
+    assert list(processor._date_indexes) == names[2:]
+
+    index = processor.date_index(names[-1])
+    with open(path, 'ab') as file:
+        file.write(b''.join(new_lines))
+    assert processor.append_from_file() > 0
+    # Mesmo store: o índice é atualizado com as linhas novas, não refeito do zero
+    assert processor.date_index(names[-1]) is index
+    assert len(index) == len(processor.municipality_index.rows_for(names[-1]))
+
+
+def test_date_indexes_of_previous_load_are_dropped(tmp_path):
+    processor, _, _ = growing_processor(tmp_path)
+    for name in processor.get_municipalities()[:4]:
+        processor.date_index(name)
+    old_store = processor.store
+
+    other = tmp_path / 'outro.csv'
+    benchmark_covid.write_synthetic_csv(str(other), 500, seed=7)
+    assert processor.load_from_csv_file(str(other))
+    processor.date_index()
+    assert list(processor._date_indexes) == [None]
+    assert all(index.store is not old_store for index in processor._date_indexes.values())
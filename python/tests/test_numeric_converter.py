@@ -0,0 +1,71 @@
+"""Conversão numérica em lote por coluna e fallback tolerante (NumericColumnConverter)"""
+import pytest
+
+from covid_analyzer import (FlexibleDataProcessor, NumericColumnConverter, get_compute_backend,
+                            set_compute_backend, _import_numpy)
+
+BACKENDS = ['python'] + (['numpy'] if _import_numpy() is not None else [])
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    previous = get_compute_backend()
+    set_compute_backend(request.param)
+    yield request.param
+    set_compute_backend(previous if previous == 'python' else 'auto')
+
+
+@pytest.mark.parametrize('values, style', [
+    (['1', '22', '-3', ''], (True, '.', '')),
+    (['14027,55365', '1,5', '3'], (False, ',', '')),
+    (['1.234,5', '2'], (False, ',', '.')),
+    (['1,234.5', '2'], (False, '.', ',')),
+    (['1.234.567', '2.000'], (False, ',', '.')),
+    (['1,234,567'], (False, '.', ',')),
+    (['1.5', '2'], (False, '.', '')),
+    ([], (False, '.', '')),
+])
+def test_detect_style(values, style):
+    converter = NumericColumnConverter.detect(values)
+    assert (converter.digits_only, converter.decimal, converter.thousands) == style
+
+
+@pytest.mark.parametrize('values, expected, fallbacks', [
+    (['1', '-3', '4x', '', ' 5', '007'], [1, 0, 4, 0, 5, 7], 2),
+    (['abc', 'R$ 12', '9' * 30], [0, 12, NumericColumnConverter.INT64_MAX], 2),
+])
+def test_digit_columns_with_dirty_cells(backend, values, expected, fallbacks):
+    converter = NumericColumnConverter(digits_only=True)
+    assert list(converter.convert(values)) == expected
+    assert converter.fallback_count == fallbacks
+
+
+def test_clean_digit_column_has_no_fallback(backend):
+    converter = NumericColumnConverter(digits_only=True)
+    assert list(converter.convert(['10', '0', '123456789012'])) == [10, 0, 123456789012]
+    assert converter.fallback_count == 0
+
+
+def test_decimal_columns_with_dirty_cells():
+    converter = NumericColumnConverter(decimal=',', thousands='.')
+    result = converter.convert(['14.027,55', '3', '', 'n/d', '-2,5', '1,2,3'])
+    assert list(result) == [14027, 3, 0, 0, 0, 0]
+    # Células vazias não contam como fallback; negativos viram 0 sem fallback
+    assert converter.fallback_count == 2
+
+
+def test_tolerant_conversion_never_raises():
+    for value in ('', '   ', 'abc', '--', '.', ',', '1.2.3', '12a', '-7'):
+        assert isinstance(FlexibleDataProcessor._safe_get_numeric(value), int)
+    assert FlexibleDataProcessor._safe_get_numeric('abc') == 0
+    assert FlexibleDataProcessor._safe_get_numeric(' 42 ') == 42
+    assert FlexibleDataProcessor._safe_get_numeric('1,5') == 1
+
+
+def test_loader_converts_java_style_decimals():
+    text = ("data;municipio;casos_novos;obitos_novos\n2021-03-01;Aracaju;14027,55365;1,2\n"
+            "2021-03-02;Aracaju;sem dado;3\n")
+    processor = FlexibleDataProcessor()
+    assert processor.load_data_from_text(text)
+    assert list(processor.store.metrics['new_cases']) == [14027, 0]
+    assert list(processor.store.metrics['new_deaths']) == [1, 3]
@@ -0,0 +1,57 @@
+"""Carregamento paralelo com campos entre aspas e opções comuns às duas interfaces"""
+import covid_analyzer
+from covid_analyzer import FlexibleDataProcessor
+
+HEADER = "data,municipio,casos_novos,obitos_novos,observacao\n"
+
+
+def write_quoted_csv(path, rows=4_000):
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        file.write(HEADER)
+        for row in range(rows):
+            note = '"revisão\nlinha ""2""\n' + 'x\n' * 40 + '"' if row % 25 == 0 else 'ok'
+            file.write(f"2021-01-{row % 28 + 1:02d},Município {row % 30:02d},{row % 17},{row % 3},{note}\n")
+
+
+def store_rows(processor):
+    store = processor.store
+    extras = {name: list(values) for name, values in store.extra_values.items()}
+    return list(store.dates), list(store.municipality_codes), dict(store.metrics), extras
+
+
+def test_boundary_inside_quoted_field_is_merged(tmp_path):
+    path = tmp_path / 'aspas.csv'
+    path.write_bytes(b'a,"b\nc"\nd,e\n')
+    inside = len(b'a,"b\n')
+    assert FlexibleDataProcessor._merge_quoted_ranges(str(path), [(0, inside), (inside, 13)]) == [(0, 13)]
+    assert FlexibleDataProcessor._merge_quoted_ranges(str(path), [(0, 8), (8, 13)]) == [(0, 8), (8, 13)]
+
+
+def test_parallel_load_with_multiline_quotes(tmp_path, monkeypatch):
+    path = str(tmp_path / 'observacoes.csv')
+    write_quoted_csv(path)
+    monkeypatch.setattr(FlexibleDataProcessor, 'PARALLEL_MIN_BYTES', 0)
+    monkeypatch.setattr(FlexibleDataProcessor, 'PARALLEL_CHUNK_BYTES', 16 * 1024)
+
+    serial = FlexibleDataProcessor()
+    parallel = FlexibleDataProcessor(workers=2)
+    assert serial.load_from_csv_file(path)
+    assert parallel.load_from_csv_file(path)
+    assert parallel.last_load_report.mode == 'parallel'
+    assert len(parallel.store) == 4_000
+    assert store_rows(parallel) == store_rows(serial)
+
+
+def test_front_ends_share_load_options(monkeypatch):
+    monkeypatch.delenv('COVID_ANALYZER_WORKERS', raising=False)
+    monkeypatch.delenv('COVID_ANALYZER_CACHE', raising=False)
+    processor = covid_analyzer.create_processor(covid_analyzer._build_cli_parser().parse_args([]))
+    assert processor.cache is None and processor.workers == 1
+
+    monkeypatch.setenv('COVID_ANALYZER_WORKERS', '3')
+    monkeypatch.setenv('COVID_ANALYZER_CACHE', '1')
+    processor = covid_analyzer.create_processor(covid_analyzer._build_cli_parser().parse_args([]))
+    assert processor.cache is not None and processor.workers == 3
+
+    args = covid_analyzer._build_cli_parser().parse_args(['--workers', '2'])
+    assert covid_analyzer.create_processor(args).workers == 2
@@ -0,0 +1,44 @@
+"""Paridade entre os backends de cálculo 'python' e 'numpy'"""
+import os
+
+import pytest
+
+import benchmark_covid
+from covid_analyzer import get_compute_backend, set_compute_backend
+
+pytest.importorskip('numpy')
+
+
+@pytest.fixture(scope='module')
+def synthetic_csv(tmp_path_factory):
+    path = tmp_path_factory.mktemp('parity') / 'sintetico.csv'
+    benchmark_covid.write_synthetic_csv(str(path), 20_000)
+    return str(path)
+
+
+@pytest.fixture
+def restore_backend():
+    backend = get_compute_backend()
+    yield
+    set_compute_backend(backend if backend == 'python' else 'auto')
+
+
+def backend_results(path, use_mmap):
+    results = {}
+    for name in ('python', 'numpy'):
+        set_compute_backend(name)
+        results[name] = benchmark_covid.parity_results(path, use_mmap)
+    return results
+
+
+@pytest.mark.usefixtures('restore_backend')
+@pytest.mark.parametrize('use_mmap', [False, True], ids=['sequencial', 'mmap'])
+@pytest.mark.parametrize('source', ['sintetico'] + benchmark_covid.example_files(), ids=os.path.basename)
+def test_backends_agree(source, use_mmap, synthetic_csv):
+    path = synthetic_csv if source == 'sintetico' else source
+    results = backend_results(path, use_mmap)
+
+    assert results['python'].get('load', True), f"não foi possível carregar {path}"
+    different = sorted(key for key in results['python'] if results['python'][key] != results['numpy'].get(key))
+    assert not different
+    assert results['python'].keys() == results['numpy'].keys()
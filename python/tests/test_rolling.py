@@ -0,0 +1,97 @@
+"""Janelas móveis (RollingMetrics) nas bordas da série"""
+import math
+from datetime import date
+
+import pytest
+
+from covid_analyzer import FlexibleDataProcessor, RollingMetrics
+
+FIRST = date(2021, 3, 1).toordinal()
+
+
+def naive_window(daily, day, window):
+    if day < 0 or day + 1 < window:
+        return None
+    return sum(daily[day + 1 - window:day + 1])
+
+
+def test_windows_undefined_until_enough_history():
+    metrics = RollingMetrics(FIRST, range(1, 21))
+    average = metrics.moving_average(7)
+    assert average[:6] == [None] * 6
+    assert average[6] == pytest.approx(sum(range(1, 8)) / 7)
+    assert average[-1] == pytest.approx(sum(range(14, 21)) / 7)
+    assert metrics.moving_average(14)[:13] == [None] * 13
+
+    growth = metrics.week_over_week_growth()
+    assert growth[:13] == [None] * 13
+    assert growth[13] == pytest.approx((sum(range(8, 15)) / sum(range(1, 8)) - 1) * 100)
+
+    rt = metrics.rt_ratio()
+    assert rt[:6 + RollingMetrics.SERIAL_INTERVAL_DAYS] == [None] * 10
+    assert rt[10] == pytest.approx(sum(range(5, 12)) / sum(range(1, 8)))
+
+
+def test_window_sums_match_naive_sums_at_both_edges():
+    daily = [3, 0, 0, 5, 1, 0, 2, 9, 0, 0, 4]
+    metrics = RollingMetrics(FIRST, daily)
+    for window in (1, 7, len(daily), len(daily) + 1):
+        for day in range(-2, len(daily)):
+            assert metrics.window_sum(day, window) == naive_window(daily, day, window)
+
+
+def test_short_and_zero_series():
+    single = RollingMetrics(FIRST, [5])
+    assert single.moving_average(7) == [None]
+    assert single.week_over_week_growth() == [None]
+    assert single.doubling_time() == [None]
+    assert single.rt_ratio() == [None]
+
+    # Sem casos não há divisão por zero: os valores ficam indefinidos
+    zeros = RollingMetrics(FIRST, [0] * 21)
+    assert zeros.moving_average(7)[-1] == 0
+    assert set(zeros.week_over_week_growth()) == {None}
+    assert set(zeros.rt_ratio()) == {None}
+    assert set(zeros.doubling_time()) == {None}
+
+
+def test_doubling_time_at_start_and_when_flat():
+    metrics = RollingMetrics(FIRST, [1] * 7 + [0] * 7)
+    doubling = metrics.doubling_time(7)
+    # Nos primeiros dias o total anterior à janela é 0: não há tempo de duplicação
+    assert doubling[:7] == [None] * 7
+    assert doubling[7] == pytest.approx(7 * math.log(2) / math.log(7 / 1))
+    assert doubling[-1] is None
+
+
+def test_from_days_fills_gaps_with_zero():
+    metrics = RollingMetrics.from_days([FIRST, FIRST + 3, FIRST + 3, FIRST + 4], [2, 1, 4, 6])
+    assert metrics.daily == [2, 0, 0, 5, 6]
+    assert len(metrics) == 5
+
+
+def test_series_trim_uses_days_before_start():
+    metrics = RollingMetrics(FIRST, range(1, 15))
+    full = metrics.series('moving_average_7')
+    trimmed = metrics.series('moving_average_7', start=FIRST + 8, end=FIRST + 10)
+    assert list(trimmed) == ['09/03/2021', '10/03/2021', '11/03/2021']
+    assert trimmed == {label: full[label] for label in trimmed}
+    assert metrics.series('moving_average_7', start=FIRST + 100) == {}
+    with pytest.raises(ValueError):
+        metrics.series('media')
+
+
+def test_processor_rolling_series_per_municipality():
+    text = "data,municipio,casos_novos\n" + "".join(
+        f"{date.fromordinal(FIRST + day).isoformat()},{name},{day + offset}\n"
+        for day in range(10) for name, offset in (('Aracaju', 0), ('Lagarto', 100)) if day != 4 or name == 'Aracaju')
+    processor = FlexibleDataProcessor()
+    assert processor.load_data_from_text(text)
+
+    lagarto = processor.rolling_metrics('Lagarto')
+    assert lagarto.first_ordinal == FIRST
+    assert lagarto.daily[4] == 0
+    assert processor.rolling_metrics_by_municipality()['Lagarto'].daily == lagarto.daily
+    total = processor.rolling_metrics()
+    assert total.daily == [a + b for a, b in zip(processor.rolling_metrics('Aracaju').daily, lagarto.daily)]
+    assert processor.rolling_metrics('Inexistente') is None
@@ -0,0 +1,77 @@
+"""Acumuladores incrementais (RunningAggregates) depois de append_from_file"""
+import pytest
+
+import benchmark_covid
+from covid_analyzer import FlexibleDataProcessor, RunningAggregates
+
+WRITERS = {
+    'python': benchmark_covid.write_synthetic_csv,
+    'java': benchmark_covid.write_synthetic_java_csv,
+}
+
+
+@pytest.fixture(params=sorted(WRITERS))
+def growing_file(request, tmp_path):
+    full = tmp_path / 'completo.csv'
+    WRITERS[request.param](str(full), 3_000)
+    lines = full.read_bytes().splitlines(keepends=True)
+    path = tmp_path / 'dados.csv'
+    path.write_bytes(b''.join(lines[:1_500]))
+    return path, lines
+
+
+def test_aggregates_after_append_match_full_load(growing_file):
+    path, lines = growing_file
+    processor = FlexibleDataProcessor()
+    assert processor.load_from_csv_file(str(path))
+    # Aquece os acumuladores antes das linhas novas
+    processor.get_statistics()
+    processor.get_monthly_summary()
+
+    with open(path, 'ab') as file:
+        file.write(b''.join(lines[1_500:]))
+    assert processor.append_from_file() > 0
+
+    full = FlexibleDataProcessor()
+    assert full.load_from_csv_file(str(path))
+    assert processor.get_statistics() == full.get_statistics()
+    assert processor.get_monthly_summary() == full.get_monthly_summary()
+    assert list(processor.get_monthly_summary()) == list(full.get_monthly_summary())
+
+
+def test_plain_append_is_incremental(tmp_path):
+    path = tmp_path / 'dados.csv'
+    benchmark_covid.write_synthetic_csv(str(path), 2_000)
+    lines = path.read_bytes().splitlines(keepends=True)
+    path.write_bytes(b''.join(lines[:1_000]))
+
+    processor = FlexibleDataProcessor()
+    assert processor.load_from_csv_file(str(path))
+    aggregates = processor.aggregates.refresh(processor.store)
+    totals = aggregates.totals
+
+    with open(path, 'ab') as file:
+        file.write(b''.join(lines[1_000:]))
+    assert processor.append_from_file() == len(lines) - 1_000
+
+    # Mesmo objeto de totais: as linhas novas foram somadas, sem recálculo completo
+    refreshed = processor.aggregates.refresh(processor.store)
+    assert refreshed.totals is totals
+    assert refreshed.rows == len(processor.store)
+
+    fresh = RunningAggregates(processor._month_key).refresh(processor.store)
+    assert refreshed.totals == fresh.totals
+    assert refreshed.groups == fresh.groups
+
+
+def test_rewritten_store_is_recomputed(tmp_path):
+    path = tmp_path / 'dados.csv'
+    benchmark_covid.write_synthetic_csv(str(path), 1_000)
+    processor = FlexibleDataProcessor()
+    assert processor.load_from_csv_file(str(path))
+    before = dict(processor.aggregates.refresh(processor.store).totals)
+
+    processor.store.metrics['new_cases'][0] += 1_000
+    processor.store.touch(rewritten=True)
+    after = processor.aggregates.refresh(processor.store).totals
+    assert after['new_cases'] == before['new_cases'] + 1_000
@@ -0,0 +1,45 @@
+"""Séries temporais por município (series_for) em todas as frequências"""
+import pytest
+
+from covid_analyzer import AggregationKernel, FlexibleDataProcessor
+
+CSV_TEXT = """data,municipio,casos_novos,casos_acumulados
+2020-12-31,Aracaju,3,10
+2021-01-03,Aracaju,8,18
+2021-01-04,Aracaju,5,23
+2021-03-31,Aracaju,1,24
+2021-04-01,Aracaju,4,28
+2021-04-01,Lagarto,7,7
+"""
+
+
+@pytest.fixture
+def processor():
+    processor = FlexibleDataProcessor()
+    assert processor.load_data_from_text(CSV_TEXT)
+    return processor
+
+
+@pytest.mark.parametrize('freq, new_cases, accumulated', [
+    ('day', {'31/12/2020': 3, '03/01/2021': 8, '04/01/2021': 5, '31/03/2021': 1, '01/04/2021': 4},
+     {'31/12/2020': 10, '03/01/2021': 18, '04/01/2021': 23, '31/03/2021': 24, '01/04/2021': 28}),
+    ('week', {'2020-S53': 11, '2021-S01': 5, '2021-S13': 5}, {'2020-S53': 18, '2021-S01': 23, '2021-S13': 28}),
+    ('month', {'12/2020': 3, '01/2021': 13, '03/2021': 1, '04/2021': 4},
+     {'12/2020': 10, '01/2021': 23, '03/2021': 24, '04/2021': 28}),
+    ('quarter', {'T4/2020': 3, 'T1/2021': 14, 'T2/2021': 4}, {'T4/2020': 10, 'T1/2021': 24, 'T2/2021': 28}),
+    ('year', {'2020': 3, '2021': 18}, {'2020': 10, '2021': 28}),
+])
+def test_series_for_every_period(processor, freq, new_cases, accumulated):
+    series = processor.series_for('Aracaju', 'new_cases', freq)
+    assert series == new_cases
+    assert list(series) == list(new_cases)
+    assert processor.series_for('Aracaju', 'accumulated_cases', freq) == accumulated
+
+
+def test_series_frequencies_follow_group_by_periods(processor):
+    assert tuple(processor.SERIES_FREQUENCIES) == AggregationKernel.PERIODS
+    assert processor.series_for('Inexistente', 'new_cases', 'week') == {}
+    with pytest.raises(ValueError):
+        processor.series_for('Aracaju', 'new_cases', 'decade')
+    with pytest.raises(ValueError):
+        processor.series_for('Aracaju', 'casos', 'month')
@@ -0,0 +1,37 @@
+"""Partida a frio do módulo: sem tkinter e abaixo do limite de tempo"""
+import compileall
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from benchmark_covid import STARTUP_LIMIT_MS
+
+MODULE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_COMMAND = [sys.executable, '-c', "import sys, covid_analyzer; sys.exit('tkinter' in sys.modules)"]
+
+
+@pytest.fixture(scope='module', autouse=True)
+def compiled_module():
+    # Mede a importação, não a compilação: garante o .pyc mesmo com PYTHONDONTWRITEBYTECODE
+    compileall.compile_file(os.path.join(MODULE_DIR, 'covid_analyzer.py'), quiet=1)
+
+
+def run_import():
+    return subprocess.run(IMPORT_COMMAND, cwd=MODULE_DIR, capture_output=True, text=True)
+
+
+def test_import_does_not_load_tkinter():
+    result = run_import()
+    assert result.returncode == 0, result.stderr or "tkinter foi importado junto com covid_analyzer"
+
+
+def test_import_time_within_limit():
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        run_import()
+        best = min(best, time.perf_counter() - start)
+    assert best * 1000 < STARTUP_LIMIT_MS, f"importação levou {best * 1000:.1f} ms"